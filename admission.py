@@ -0,0 +1,175 @@
+"""
+Admission control for the processing pipeline.
+
+Every upload batch reserves a slot sized by its file count and bytes before
+it is processed. Batches run while the in-flight totals stay within
+max_files / max_bytes (a batch larger than the limits still runs, alone,
+once nothing else is in flight); the others wait in a FIFO queue of at most
+max_queue batches, so a big batch is never starved by smaller ones behind it.
+
+When the queue is full, or a batch has waited longer than its timeout,
+admission fails with Rejected. Its retry_after is an estimate of when the
+work ahead will be done, from the recent processing time per file.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+# Weight of the latest batch in the running seconds-per-file estimate
+EWMA_WEIGHT = 0.3
+
+
+class Rejected(Exception):
+    """The pipeline is saturated; try again in retry_after seconds."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Server busy ({reason.replace('_', ' ')}), retry in {retry_after}s")
+        self.reason = reason  # 'queue_full' or 'timeout'
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """One batch's reservation. wait() until admitted, release() when done (also a context manager)."""
+
+    def __init__(self, controller, files, nbytes):
+        self.files = files
+        self.nbytes = nbytes
+        self.queued_at = time.monotonic()
+        self.admitted_at = None
+        self.released = False
+        self._controller = controller
+
+    @property
+    def wait_seconds(self):
+        end = self.admitted_at if self.admitted_at is not None else time.monotonic()
+        return end - self.queued_at
+
+    def wait(self, timeout=None):
+        """Block until the batch is admitted; raises Rejected('timeout') after `timeout` seconds."""
+        self._controller._wait(self, timeout)
+        return self
+
+    def release(self):
+        """Free the batch's capacity, or leave the queue if it was never admitted. Idempotent."""
+        self._controller._release(self)
+
+    def resize(self, files):
+        """Correct the batch's file count once it is known (reserved before the request was parsed)."""
+        self._controller._resize(self, files)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionController:
+    """Caps in-flight files and bytes, with a bounded FIFO queue for the excess.
+
+    None for max_files, max_bytes or max_queue means no limit.
+    """
+
+    def __init__(self, max_files=None, max_bytes=None, max_queue=None, default_seconds_per_file=1.0,
+                 max_retry_after=300):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_queue = max_queue
+        self.max_retry_after = max_retry_after
+        self._seconds_per_file = default_seconds_per_file
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._files = 0
+        self._bytes = 0
+        self._batches = 0
+
+    def reserve(self, files, nbytes=0):
+        """Admit a batch right away or queue it. Returns a Ticket; raises Rejected('queue_full')."""
+        with self._cond:
+            ticket = Ticket(self, files, nbytes)
+            if not self._queue and self._fits(ticket):
+                self._admit(ticket)
+                return ticket
+            if self.max_queue is not None and len(self._queue) >= self.max_queue:
+                raise Rejected('queue_full', self._retry_after(self._queued_files() + files))
+            self._queue.append(ticket)
+            return ticket
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            return {
+                'in_flight_batches': self._batches,
+                'in_flight_files': self._files,
+                'in_flight_bytes': self._bytes,
+                'queued_batches': len(self._queue),
+                'queued_files': self._queued_files(),
+                'oldest_wait_seconds': now - self._queue[0].queued_at if self._queue else 0.0,
+                'seconds_per_file': self._seconds_per_file,
+            }
+
+    def _fits(self, ticket):
+        if self._batches == 0:
+            return True
+        if self.max_files is not None and self._files + ticket.files > self.max_files:
+            return False
+        return self.max_bytes is None or self._bytes + ticket.nbytes <= self.max_bytes
+
+    def _admit(self, ticket):
+        ticket.admitted_at = time.monotonic()
+        self._files += ticket.files
+        self._bytes += ticket.nbytes
+        self._batches += 1
+
+    def _admit_waiting(self):
+        # Strictly in order: the head of the queue blocks the batches behind it
+        while self._queue and self._fits(self._queue[0]):
+            self._admit(self._queue.popleft())
+        self._cond.notify_all()
+
+    def _queued_files(self):
+        return sum(ticket.files for ticket in self._queue)
+
+    def _retry_after(self, files_ahead):
+        seconds = (self._files + files_ahead) * self._seconds_per_file
+        return int(min(self.max_retry_after, max(1, math.ceil(seconds))))
+
+    def _wait(self, ticket, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while ticket.admitted_at is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    position = self._queue.index(ticket)
+                    files_ahead = sum(self._queue[i].files for i in range(position + 1))
+                    self._queue.remove(ticket)
+                    ticket.released = True
+                    self._admit_waiting()
+                    raise Rejected('timeout', self._retry_after(files_ahead))
+                self._cond.wait(remaining)
+
+    def _resize(self, ticket, files):
+        with self._cond:
+            if ticket.admitted_at is not None and not ticket.released:
+                self._files += files - ticket.files
+            ticket.files = files
+            # A queued batch that shrank may fit now
+            self._admit_waiting()
+
+    def _release(self, ticket):
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.admitted_at is None:
+                self._queue.remove(ticket)
+            else:
+                self._files -= ticket.files
+                self._bytes -= ticket.nbytes
+                self._batches -= 1
+                if ticket.files:
+                    per_file = (time.monotonic() - ticket.admitted_at) / ticket.files
+                    self._seconds_per_file += EWMA_WEIGHT * (per_file - self._seconds_per_file)
+            self._admit_waiting()
@@ -1,14 +1,38 @@
 import os
 import re
+import time
+import logging
 from datetime import datetime
-from flask import Flask, request, render_template, session, send_file, jsonify
+from flask import Blueprint, Flask, Response, request, render_template, session, send_file, jsonify
 from werkzeug.utils import secure_filename
-import PyPDF2
-import pandas as pd
-from openpyxl import load_workbook
 import tempfile
 import shutil
+import uuid
+import pickle
+import gzip
+import zlib
+import queue
+import json
+import threading
+import hashlib
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import wait, FIRST_COMPLETED
 from config import *
+from jobs import JobManager
+from cache import ScorecardCache
+from metrics import MetricsRegistry
+from artifacts import ArtifactStore
+from admission import AdmissionController, Rejected
+from workers import WorkerPool
+from store import Query, ScorecardStore, StoreWriter
+from upload_sessions import UploadError, UploadSessions
+from extractors import backend_chain
+
+try:
+    import fcntl  # cross-process master workbook lock (not on Windows)
+except ImportError:
+    fcntl = None
 
 """
 WELL Certification PDF Parser with Robust Scoring Rules
@@ -35,23 +59,205 @@ Excel Writing:
 - Ensures proper Excel formatting and calculations
 """
 
-app = Flask(__name__)
-app.secret_key = SECRET_KEY
-app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
-
-# Ensure directories exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(PROCESSED_FOLDER, exist_ok=True)
+logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Routes live on a blueprint; create_app() builds the Flask app around it (wsgi.py for production servers)
+bp = Blueprint('pdfconvert', __name__)
+
+# Background batches for /upload?mode=async; job state is shared through JOB_CONFIG['folder']
+job_manager = JobManager(max_workers=JOB_CONFIG['max_concurrent_jobs'], job_ttl=JOB_CONFIG['job_ttl'],
+                         folder=JOB_CONFIG.get('folder'))
+
+# Caps the files/bytes being processed at once; excess batches queue, and /upload answers 503 once
+# the queue is full (per server process)
+admission = AdmissionController(
+    max_files=ADMISSION_CONFIG['max_in_flight_files'],
+    max_bytes=ADMISSION_CONFIG['max_in_flight_bytes'],
+    max_queue=ADMISSION_CONFIG['max_queue'],
+    max_retry_after=ADMISSION_CONFIG['max_retry_after'],
+)
+
+# Resumable chunked uploads (/uploads); each session's batch takes its files as they complete
+upload_sessions = UploadSessions(
+    UPLOAD_SESSION_CONFIG['folder'],
+    max_files=UPLOAD_SESSION_CONFIG['max_files'],
+    max_file_bytes=UPLOAD_SESSION_CONFIG['max_file_bytes'],
+    max_session_bytes=UPLOAD_SESSION_CONFIG['max_session_bytes'],
+    idle_timeout=UPLOAD_SESSION_CONFIG['idle_timeout'],
+)
+
+# Every parsed scorecard, by project ID and certification date, for /export (None when disabled)
+scorecard_store = ScorecardStore(STORE_CONFIG['path']) if STORE_CONFIG.get('enabled') else None
+
+# Bump whenever extraction or parsing output changes; it is part of every scorecard cache key
+PARSER_VERSION = 3
+
+# Text-extraction backends tried for each PDF, in order (see extractors.py)
+EXTRACTION_BACKENDS = backend_chain(PROCESSING_CONFIG.get('extraction_backend', 'auto'),
+                                    PROCESSING_CONFIG.get('extraction_fallback', True))
+
+# Parsed scorecards keyed by upload content hash (None when caching is disabled; opened by create_app)
+scorecard_cache = None
+
+def open_scorecard_cache():
+    """Open the on-disk scorecard cache (indexing its folder) if caching is enabled and it isn't open yet."""
+    global scorecard_cache
+    if CACHE_CONFIG.get('enabled') and scorecard_cache is None:
+        scorecard_cache = ScorecardCache(
+            CACHE_CONFIG['folder'],
+            # Adaptive and fixed page extraction, and each backend, give different text for the same PDF
+            version=f"{PARSER_VERSION}-{PROCESSING_CONFIG.get('page_mode', 'fixed')}-{EXTRACTION_BACKENDS[0].name}",
+            memory_entries=CACHE_CONFIG['memory_entries'],
+            max_disk_bytes=CACHE_CONFIG['max_disk_bytes'],
+            max_age=CACHE_CONFIG['max_age'],
+        )
+    return scorecard_cache
+
+# Output formats of a batch: format -> (file suffix, download mimetype)
+EXPORT_FORMATS = {
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'jsonl': ('.jsonl', 'application/x-ndjson'),
+}
+
+# Markdown of lean batches, kept next to their outputs for GET /markdown/<batch_id>/<index>
+MARKDOWN_SUFFIX = '.markdown.jsonl'
+
+# Generated workbooks and exports in PROCESSED_FOLDER; a background sweeper (started by
+# start_background_tasks) expires them and keeps the folder under its size quota, and removes
+# temp files (uploads, intermediate PDFs) left behind
+artifact_store = ArtifactStore(
+    PROCESSED_FOLDER,
+    max_age=CLEANUP_CONFIG['max_file_age'],
+    max_bytes=CLEANUP_CONFIG['max_total_bytes'],
+    suffixes=tuple(suffix for suffix, _ in EXPORT_FORMATS.values()) + (MARKDOWN_SUFFIX,),
+)
+
+# An upload saved to UPLOAD_FOLDER, with the SHA-256 of its bytes
+SavedUpload = namedtuple('SavedUpload', ['filename', 'path', 'size', 'sha256'])
+
+class SessionUploads:
+    """An upload session's files as a sequence of SavedUploads that fills in while the batch runs.
+
+    iter_saved_files asks arrived(index) before taking a file; until then its path may not
+    exist and its sha256 is None.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def __len__(self):
+        return len(self.session.files)
+
+    def __getitem__(self, index):
+        entry = self.session.files[index]
+        return SavedUpload(entry['filename'], self.session.path(index), entry['size'], self.session.sha256(index))
+
+    def arrived(self, index, block=False):
+        """Whether file `index` is complete; with block=True, wait for it (raises UploadAborted)."""
+        if block:
+            return self.session.wait_for(index, UPLOAD_SESSION_CONFIG['idle_timeout'])
+        return self.session.complete(index)
+
+# ---- Pipeline metrics (served on /metrics)
+metrics = MetricsRegistry(process_label='pid')
+STAGE_SECONDS = metrics.histogram('pdfconvert_stage_duration_seconds', 'Latency of each pipeline stage', ['stage'])
+STAGE_BYTES = metrics.counter('pdfconvert_stage_bytes_total', 'Bytes processed by each pipeline stage', ['stage'])
+STAGE_ERRORS = metrics.counter('pdfconvert_stage_errors_total', 'Failures in each pipeline stage', ['stage'])
+FILES_TOTAL = metrics.counter('pdfconvert_files_total', 'Uploaded files by outcome', ['status'])
+BATCH_FILES_PER_SECOND = metrics.gauge('pdfconvert_last_batch_files_per_second', 'Throughput of the most recent batch')
+CACHE_LOOKUPS = metrics.gauge('pdfconvert_cache_lookups', 'Scorecard cache lookups since start', ['result'])
+ARTIFACT_FILES = metrics.gauge('pdfconvert_artifact_files', 'Generated workbooks currently kept in PROCESSED_FOLDER')
+ARTIFACT_BYTES = metrics.gauge('pdfconvert_artifact_bytes', 'Total size of the kept generated workbooks')
+STARTUP_SECONDS = metrics.gauge('pdfconvert_startup_seconds', 'Time spent starting this server process', ['phase'])
+EXTRACTIONS = metrics.counter('pdfconvert_extractions_total', 'PDFs whose text was extracted, by backend', ['backend'])
+EXTRACTION_FALLBACKS = metrics.counter('pdfconvert_extraction_fallbacks_total',
+                                       'Extractions a backend failed (error or no text) and left to the next one', ['backend'])
+WORKER_EVENTS = metrics.gauge('pdfconvert_worker_events', 'PDF worker processes started, recycled, and stopped '
+                              'for a timeout or crash since start', ['event'])
+STORED_SCORECARDS = metrics.gauge('pdfconvert_stored_scorecards', 'Scorecards and distinct projects in the store', ['unit'])
+WORKERS = metrics.gauge('pdfconvert_workers', 'PDF worker processes and files waiting for one', ['state'])
+ADMISSION_WAIT = metrics.histogram('pdfconvert_admission_wait_seconds', 'Time batches waited for processing capacity')
+ADMISSION_REJECTED = metrics.counter('pdfconvert_admission_rejected_total', 'Uploads answered with 503', ['reason'])
+ADMISSION_IN_FLIGHT = metrics.gauge('pdfconvert_admission_in_flight', 'Batches, files and bytes being processed', ['unit'])
+ADMISSION_QUEUED = metrics.gauge('pdfconvert_admission_queued', 'Batches and files waiting for capacity', ['unit'])
+ADMISSION_OLDEST_WAIT = metrics.gauge('pdfconvert_admission_oldest_wait_seconds', 'How long the first queued batch has waited')
+
+def record_stage(stage, seconds, nbytes=0, error=False):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if nbytes:
+        STAGE_BYTES.inc(nbytes, stage=stage)
+    if error:
+        STAGE_ERRORS.inc(stage=stage)
+
+def _collect_cache_metrics():
+    if scorecard_cache is not None:
+        stats = scorecard_cache.stats()
+        CACHE_LOOKUPS.set(stats['hits'], result='hit')
+        CACHE_LOOKUPS.set(stats['misses'], result='miss')
+
+metrics.add_collector(_collect_cache_metrics)
+
+def _collect_artifact_metrics():
+    stats = artifact_store.stats()
+    ARTIFACT_FILES.set(stats['files'])
+    ARTIFACT_BYTES.set(stats['bytes'])
+
+metrics.add_collector(_collect_artifact_metrics)
+
+def _collect_admission_metrics():
+    stats = admission.stats()
+    for unit in ('batches', 'files', 'bytes'):
+        ADMISSION_IN_FLIGHT.set(stats[f'in_flight_{unit}'], unit=unit)
+    ADMISSION_QUEUED.set(stats['queued_batches'], unit='batches')
+    ADMISSION_QUEUED.set(stats['queued_files'], unit='files')
+    ADMISSION_OLDEST_WAIT.set(stats['oldest_wait_seconds'])
+
+metrics.add_collector(_collect_admission_metrics)
+
+def _collect_worker_metrics():
+    if _process_pool is not None:
+        stats = _process_pool.stats()
+        for event in ('started', 'recycled', 'timeouts', 'crashes'):
+            WORKER_EVENTS.set(stats[event], event=event)
+        for state in ('workers', 'busy', 'queued'):
+            WORKERS.set(stats[state], state=state)
+
+metrics.add_collector(_collect_worker_metrics)
+
+def _collect_store_metrics():
+    if scorecard_store is not None:
+        stats = scorecard_store.stats()
+        STORED_SCORECARDS.set(stats['scorecards'], unit='scorecards')
+        STORED_SCORECARDS.set(stats['projects'], unit='projects')
+
+metrics.add_collector(_collect_store_metrics)
 
 # Template path constant
 TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "template1.xlsx")  # put your real template here
 
+# Concept letters as used in part codes and in row 1 of the template header
+CONCEPT_LETTER_TO_NAME = {
+    "A":"Air","W":"Water","N":"Nourishment","L":"Light","V":"Movement",
+    "T":"Thermal Comfort","S":"Sound","X":"Materials","M":"Mind","C":"Community","I":"Innovation"
+}
+
+# Optional fallback if header lookup ever fails (your sheet letters)
+FALLBACK_SP_COLS = {"A":"AX","W":"BQ","N":"CL","L":"CZ","V":"DX","T":"EO","S":"FE","X":"GE","M":"HA","C":"IS","I":"JD"}
+
+# Part codes look like 'A05.1'
+PART_CODE_LENGTH = 5
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def extract_first_two_pages(pdf_path):
     """Extract first 2 pages from PDF using PyPDF2"""
     try:
+        import PyPDF2
+
         with open(pdf_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
             
@@ -79,233 +285,1608 @@ def extract_first_two_pages(pdf_path):
         return None, f"Error extracting pages: {str(e)}"
 
 def convert_to_markdown(pdf_path):
-    """Convert PDF to markdown using PyPDF2 text extraction"""
+    """Convert PDF to markdown using the configured text-extraction backend(s)"""
+    extraction, error = extract_markdown(pdf_path, os.path.basename(pdf_path),
+                                         error_prefix="Error converting to markdown")
+    return (extraction.markdown if extraction else None), error
+
+# Start of a score row ('A01.1 ...'), tolerant of the split codes PyPDF2 sometimes produces
+_PAGE_ROW_CODE_RE = re.compile(r"^\s*([AWNLVTSXMCI])\s*\d{2}\s*\.\s*\d", re.MULTILINE)
+LAST_CONCEPT = "I"
+
+# Where the score table stands after a page (adaptive page mode)
+TABLE_NOT_STARTED, TABLE_ROWS, TABLE_AT_LAST_CONCEPT = 'not_started', 'rows', 'last_concept'
+
+def scorecard_table_ended(text, state=TABLE_NOT_STARTED):
+    """Decide from one page's text whether the score table is over. Returns (state, ended, keep_page).
+
+    state is the outcome of the previous page. The table has ended at a page without score
+    rows after pages with rows, or at a page whose rows don't continue the last concept (I)
+    that the previous page ended on; such a page belongs to something else (keep_page is
+    False). A page ending on I rows never ends the table by itself, since running footers
+    ("Page 2 of 3") follow the last row of every page and the I rows may continue overleaf.
+    """
+    codes = list(_PAGE_ROW_CODE_RE.finditer(text or ""))
+    if not codes:
+        return state, state != TABLE_NOT_STARTED, True
+    if state == TABLE_AT_LAST_CONCEPT and codes[0].group(1) != LAST_CONCEPT:
+        return state, True, False
+    return (TABLE_AT_LAST_CONCEPT if codes[-1].group(1) == LAST_CONCEPT else TABLE_ROWS), False, True
+
+def read_markdown(backend, source, name, max_pages=None, adaptive=False):
+    """One backend's markdown for a PDF. Returns (markdown, pages_with_text); markdown is None if it has no pages.
+
+    With adaptive=True pages are read one at a time until the score table ends (see
+    scorecard_table_ended), up to max_pages; later pages are never loaded.
+    """
+    doc = backend.open(source)
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            markdown_content = []
-            markdown_content.append(f"# PDF Document: {os.path.basename(pdf_path)}\n")
-            
-            for page_num, page in enumerate(pdf_reader.pages, 1):
-                text = page.extract_text()
-                if text and text.strip():
-                    markdown_content.append(f"## Page {page_num}\n")
-                    markdown_content.append(text)
-                    markdown_content.append("\n")
-            
-            return '\n'.join(markdown_content), None
-            
-    except Exception as e:
-        return None, f"Error converting to markdown: {str(e)}"
+        if doc.page_count == 0:
+            return None, 0
+
+        markdown_content = []
+        markdown_content.append(f"# PDF Document: {name}\n")
+
+        state = TABLE_NOT_STARTED
+        text_pages = 0
+        for page_num in range(1, min(max_pages or doc.page_count, doc.page_count) + 1):
+            text = doc.page_text(page_num - 1)
+            ended = False
+            if adaptive:
+                state, ended, keep_page = scorecard_table_ended(text, state)
+                if not keep_page:
+                    break
+
+            if text and text.strip():
+                markdown_content.append(f"## Page {page_num}\n")
+                markdown_content.append(text)
+                markdown_content.append("\n")
+                text_pages += 1
+            if ended:
+                break
+
+        return '\n'.join(markdown_content), text_pages
+    finally:
+        doc.close()
+
+# Markdown of one PDF, the backend that produced it and the backends that were tried first and failed
+Extraction = namedtuple('Extraction', ['markdown', 'backend', 'fallbacks'])
+
+def extract_markdown(source, name, max_pages=None, adaptive=False, backends=None,
+                     error_prefix="Error extracting pages"):
+    """Read a PDF (path or binary stream) into markdown with the first backend that succeeds.
+
+    Returns (Extraction, error). Backends are tried in order (default EXTRACTION_BACKENDS);
+    one that raises or finds no text at all is skipped for the next. If every backend
+    reads the PDF but none finds text, the first one's (header-only) markdown is returned;
+    if none can read it, the last backend's error is.
+    """
+    fallbacks = []
+    last_error = None
+    empty = None
+
+    for backend in backends or EXTRACTION_BACKENDS:
+        try:
+            markdown_content, text_pages = read_markdown(backend, source, name, max_pages, adaptive)
+            error = None if markdown_content is not None else "PDF has no pages"
+        except Exception as e:
+            # str() of a MemoryError (worker memory ceiling) is empty
+            markdown_content, text_pages, error = None, 0, f"{error_prefix}: {str(e) or type(e).__name__}"
+
+        if error is None and text_pages:
+            return Extraction(markdown_content, backend.name, fallbacks), None
+        if error is None and empty is None:
+            empty = Extraction(markdown_content, backend.name, list(fallbacks))
+        last_error = error or last_error
+        fallbacks.append(backend.name)
+
+    if empty is not None:
+        return empty, None
+    return None, last_error
+
+def extract_scorecard(pdf_path, name):
+    """Single-pass extraction of a saved upload in the configured page mode. Returns (Extraction, error).
+
+    Backends read the file their own way (PyPDF2 through an mmap, PyMuPDF natively), never via a copy.
+    """
+    if PROCESSING_CONFIG.get('page_mode') == 'adaptive':
+        return extract_markdown(pdf_path, name, PROCESSING_CONFIG.get('max_pages', 20), True)
+    return extract_markdown(pdf_path, name, 2)
+
+def extract_markdown_from_file(pdf_path, name):
+    """Single-pass extraction from a saved upload. Returns (markdown, error)."""
+    extraction, error = extract_scorecard(pdf_path, name)
+    return (extraction.markdown if extraction else None), error
+
+def process_pdf_file(file_path, filename, file_size):
+    """Extract, convert and parse one saved upload, then delete it. Runs inside a pool worker process."""
+    try:
+        return extract_and_parse(file_path, filename, file_size)
+    finally:
+        # Clean up the upload
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+def extract_and_parse(file_path, filename, file_size):
+    """Extract, convert and parse one PDF, leaving the file itself in place.
+
+    The result carries a 'timings' list of (stage, seconds, bytes, failed) tuples and, once
+    text was extracted, the 'extraction' backend details; workers can't update the parent's
+    metrics, so iter_saved_files records them.
+    """
+    first_two_pages_path = None
+    timings = []
+
+    def timed(stage, nbytes, fn, *args, **kwargs):
+        start = time.perf_counter()
+        value, error = fn(*args, **kwargs)
+        timings.append((stage, time.perf_counter() - start, nbytes, bool(error)))
+        return value, error
 
-def create_combined_excel(results):
-    """Create WELL certification Excel by writing into the REAL template (preserves merged headers)."""
     try:
-        if not results:
-            return None, "No results to process"
+        if PROCESSING_CONFIG.get('single_pass_extraction'):
+            # One parse of the upload, no intermediate PDF
+            extraction, error = timed('extract_text', file_size, extract_scorecard, file_path, filename)
+        else:
+            # Extract first 2 pages, then convert them to markdown
+            first_two_pages_path, error = timed('extract_pages', file_size, extract_first_two_pages, file_path)
+            if not error:
+                extraction, error = timed('convert_text', os.path.getsize(first_two_pages_path),
+                                          extract_markdown, first_two_pages_path,
+                                          os.path.basename(first_two_pages_path),
+                                          error_prefix="Error converting to markdown")
+
+        if error:
+            return {
+                'filename': filename,
+                'status': 'error',
+                'message': error,
+                'file_size': file_size,
+                'timings': timings
+            }
+
+        markdown_content = extraction.markdown
+        start = time.perf_counter()
+        parsed = parse_well_markdown(markdown_content)
+        timings.append(('parse', time.perf_counter() - start, len(markdown_content), parsed is None))
 
-        # 1) Load the real template (do NOT rebuild headers/merges)
-        wb = load_workbook(TEMPLATE_PATH)
-        ws = wb.active
+        return {
+            'filename': filename,
+            'status': 'success',
+            'markdown': markdown_content,
+            'parsed': parsed,
+            'message': 'Successfully processed',
+            'file_size': file_size,
+            'timings': timings,
+            'extraction': {'backend': extraction.backend, 'fallbacks': extraction.fallbacks}
+        }
 
-        # 2) Build a 3-row header map so we can find exact columns
-        header_rows = [1, 2, 3]
-        max_col = ws.max_column
-        headers = []
-        for col in range(1, max_col + 1):
-            triple = tuple((ws.cell(r, col).value if ws.cell(r, col).value is not None else "") for r in header_rows)
-            headers.append(triple)
+    finally:
+        # Clean up the intermediate PDF
+        if first_two_pages_path and os.path.exists(first_two_pages_path):
+            os.remove(first_two_pages_path)
 
-        from openpyxl.styles import Alignment
-        from openpyxl.utils import column_index_from_string
+_process_pool = None
 
-        # headers is your 3-row header list: [(row1,row2,row3), ...]
+# Seconds between checks for newly completed session uploads while workers are busy
+UPLOAD_POLL_SECONDS = 0.1
 
-        def col_for_concept_subpoints(letter, concept_name):
-            """Find 'Sub-Points' column by header (row3 == 'Sub-Points' and (row1 letter OR row2 name))."""
-            for i, t in enumerate(headers, start=1):
-                r1 = (str(t[0]).strip() if t[0] else "")
-                r2 = (str(t[1]).strip() if t[1] else "")
-                r3 = (str(t[2]).strip() if t[2] else "")
-                if r3 == "Sub-Points" and (r1 == letter or r2 == concept_name):
-                    return i
-            return None
+def process_pool_size():
+    return PROCESSING_CONFIG.get('max_workers') or os.cpu_count() or 1
 
-        def col_for_concept_pct(letter):
-            """Find the % column by header (row3 == '%' and row1 == letter)."""
-            for i, t in enumerate(headers, start=1):
-                r1 = (str(t[0]).strip() if t[0] else "")
-                r3 = (str(t[2]).strip() if t[2] else "")
-                if r3 == "%" and r1 == letter:
-                    return i
-            return None
+def new_worker_pool(max_workers):
+    """A supervised pool applying PROCESSING_CONFIG's per-file time and memory budgets."""
+    return WorkerPool(max_workers,
+                      timeout=PROCESSING_CONFIG.get('file_timeout'),
+                      memory_mb=PROCESSING_CONFIG.get('worker_memory_mb'),
+                      max_tasks=PROCESSING_CONFIG.get('worker_max_files'))
 
-        # Optional fallback if header lookup ever fails (your sheet letters)
-        FALLBACK_SP_COLS = {"A":"AX","W":"BQ","N":"CL","L":"CZ","V":"DX","T":"EO","S":"FE","X":"GE","M":"HA","C":"IS","I":"JD"}
-        def sp_col_fallback(ws, letter):
-            try:
-                return column_index_from_string(FALLBACK_SP_COLS[letter])
-            except Exception:
-                return None
+def get_process_pool():
+    """Return the shared worker pool, or None when PDFs should be processed in-process."""
+    global _process_pool
+    max_workers = process_pool_size()
+    if max_workers <= 1 and not PROCESSING_CONFIG.get('isolate_files'):
+        return None
+    if _process_pool is None:
+        _process_pool = new_worker_pool(max_workers)
+    return _process_pool
 
-        CENTER = Alignment(horizontal="center", vertical="center")
+def cached_result(upload):
+    """Build a success result from the scorecard cache, or return None on a miss."""
+    if scorecard_cache is None:
+        return None
+    entry = scorecard_cache.get(upload.sha256)
+    if entry is None:
+        return None
+    return {
+        'filename': upload.filename,
+        'status': 'success',
+        'markdown': entry['markdown'],
+        'parsed': entry['parsed'],
+        'message': 'Successfully processed (cached)',
+        'file_size': upload.size,
+        'cached': True
+    }
+
+def store_result(upload, result):
+    """Remember a successfully parsed upload under its content hash."""
+    if scorecard_cache is not None and result.get('status') == 'success':
+        scorecard_cache.put(upload.sha256, {'markdown': result['markdown'], 'parsed': result['parsed']})
+
+def iter_saved_files(saved_files, on_result=None):
+    """Yield each SavedUpload's result in upload order while later files are still processing.
+
+    Only a small window of files (PROCESSING_CONFIG['in_flight_per_worker'] per worker) is
+    submitted ahead of the one being yielded, so memory stays bounded however big the
+    batch is. Uploads already in the scorecard cache are answered without touching the PDF.
+    on_result(index, result) is called as each file finishes, in completion order.
+    Pool workers enforce the per-file time and memory budgets (see new_worker_pool).
+
+    saved_files may be SessionUploads, whose files are still arriving: each is submitted once
+    complete, and the batch only blocks on an upload when nothing else is left to work on.
+    """
+
+    def finish(index, result):
+        for stage, seconds, nbytes, failed in result.pop('timings', ()):
+            record_stage(stage, seconds, nbytes, failed)
+        extraction = result.pop('extraction', None)
+        if extraction:
+            EXTRACTIONS.inc(backend=extraction['backend'])
+            for backend in extraction['fallbacks']:
+                EXTRACTION_FALLBACKS.inc(backend=backend)
+        FILES_TOTAL.inc(status='cached' if result.get('cached') else result.get('status', 'error'))
+        if on_result:
+            on_result(index, result)
+        return result
+
+    def collect(future, upload):
+        try:
+            result = future.result()
+            store_result(upload, result)
+        except Exception as e:
+            # A file that timed out, hit the memory ceiling or crashed its worker only fails itself
+            result = {
+                'filename': upload.filename,
+                'status': 'error',
+                'message': f"Error processing file: {str(e)}",
+                'file_size': upload.size
+            }
+        return result
+
+    pool = get_process_pool()
+    window = process_pool_size() * PROCESSING_CONFIG.get('in_flight_per_worker', 2)
+    pending = {}  # index -> future still running
+    ready = {}    # index -> result that finished ahead of its turn
+    next_submit = 0
+    # Files of an upload session arrive while the batch runs; poll for them while waiting on workers
+    arrived = getattr(saved_files, 'arrived', None)
+    poll = UPLOAD_POLL_SECONDS if arrived is not None else None
 
-        concept_letter_to_name = {
-            "A":"Air","W":"Water","N":"Nourishment","L":"Light","V":"Movement",
-            "T":"Thermal Comfort","S":"Sound","X":"Materials","M":"Mind","C":"Community","I":"Innovation"
+    try:
+        for next_yield in range(len(saved_files)):
+            while True:
+                # Keep up to `window` files in flight ahead of the one being yielded (in upload
+                # order, so a file still arriving holds back the ones after it)
+                while next_submit < len(saved_files) and next_submit < next_yield + window:
+                    if arrived is not None and not arrived(next_submit, block=next_submit == next_yield):
+                        break
+                    upload = saved_files[next_submit]
+                    result = cached_result(upload)
+                    if result is not None:
+                        if os.path.exists(upload.path):
+                            os.remove(upload.path)
+                        ready[next_submit] = finish(next_submit, result)
+                    elif pool is not None:
+                        pending[next_submit] = pool.submit(process_pdf_file, upload.path, upload.filename, upload.size)
+                    next_submit += 1
+
+                if next_yield in ready:
+                    break
+                if next_yield not in pending:
+                    # In-process mode: handle files one at a time, as they are reached
+                    upload = saved_files[next_yield]
+                    result = process_pdf_file(upload.path, upload.filename, upload.size)
+                    store_result(upload, result)
+                    ready[next_yield] = finish(next_yield, result)
+                    break
+
+                done, _ = wait(pending.values(), timeout=poll, return_when=FIRST_COMPLETED)
+                for index in [i for i, future in pending.items() if future in done]:
+                    ready[index] = finish(index, collect(pending.pop(index), saved_files[index]))
+
+            yield ready.pop(next_yield)
+
+    finally:
+        # Stopped early (error or abandoned consumer): don't start the rest
+        for future in pending.values():
+            future.cancel()
+        # Uploads whose worker died (or that were never reached) skipped the cleanup in process_pdf_file
+        discard_uploads(saved_files)
+
+def process_batch(saved_files, on_result=None, master=False, formats=('xlsx',), lean=False):
+    """Process a saved batch and build the combined Excel. Returns (response_data, error).
+
+    One pass over the batch: each file's result is written to every output (workbook,
+    exports, lean markdown) as soon as its turn comes in upload order. In lean mode the file's
+    text and parse are then dropped, so memory stays flat however many files there are.
+
+    formats lists the outputs to build from EXPORT_FORMATS; all share one file stem. Without
+    'xlsx' no workbook is written at all. With master=True the batch is also upserted into
+    the master workbook. With lean=True results (including those passed to on_result) are
+    reduced by lean_result and the markdown is kept for GET /markdown/<batch_id>/<index>.
+    """
+    start = time.perf_counter()
+
+    if not saved_files and 'xlsx' in formats:
+        return None, "No results to process"
+
+    stem = os.path.splitext(new_excel_path())[0]
+    batch_id = os.path.basename(stem)
+    if lean and on_result:
+        full_on_result = on_result
+        on_result = lambda index, result: full_on_result(index, lean_result(result, batch_id, index))
+
+    writers = open_writers(stem, formats, len(saved_files))
+    markdown_writer = MarkdownWriter(stem + MARKDOWN_SUFFIX) if lean else None
+    master_rows = [] if master else None
+    # Rows are scored a chunk at a time and handed to every writer
+    scorer = RowScorer(writers.values())
+    stored = StoreWriter(scorecard_store, scorer.chunk_rows) if scorecard_store is not None else None
+
+    results = []
+    try:
+        # Extract, convert and parse concurrently; results come back in upload order
+        for index, result in enumerate(iter_saved_files(saved_files, on_result)):
+            parsed = parsed_result(result)
+            if parsed:
+                scorer.add(parsed)
+                if stored is not None:
+                    stored.add(parsed, result.get('filename'), saved_files[index].sha256)
+                if master_rows is not None:
+                    master_rows.append({'status': 'success', 'parsed': parsed})
+            if markdown_writer:
+                markdown_writer.write(result.get('markdown'))
+            results.append(lean_result(result, batch_id, index) if lean else result)
+        scorer.flush()
+        if stored is not None:
+            stored.flush()
+    except Exception:
+        for writer in writers.values():
+            writer.abort()
+        if markdown_writer:
+            markdown_writer.abort()
+        raise
+
+    outputs, error = close_writers(writers)
+    if error:
+        if markdown_writer:
+            markdown_writer.abort()
+        return None, error
+    if markdown_writer:
+        markdown_writer.close()
+    excel_filename = outputs.pop('xlsx', None)
+    exports = outputs
+
+    master_summary = None
+    if master:
+        master_summary, master_error = upsert_master_excel(master_rows)
+        if master_error:
+            logger.error("Master workbook update failed: %s", master_error)
+            return None, master_error
+
+    elapsed = time.perf_counter() - start
+    if elapsed > 0:
+        BATCH_FILES_PER_SECOND.set(len(results) / elapsed)
+
+    logger.info("Processed %d files in %.2fs, outputs: %s", len(results), elapsed,
+                ', '.join(filter(None, [excel_filename] + list(exports.values()))))
+
+    if excel_filename:
+        response_data = {
+            'results': results,
+            # Get just the filename for the client (avoid session storage)
+            'excel_filename': excel_filename,
+            'message': f'Successfully processed {len(results)} files. Combined Excel file created.'
         }
+    else:
+        response_data = {
+            'results': results,
+            'message': f'Successfully processed {len(results)} files. {", ".join(exports).upper()} export created.'
+        }
+    if lean:
+        response_data['batch_id'] = batch_id
+        response_data['counts'] = {
+            'total': len(results),
+            'success': sum(1 for r in results if r.get('status') == 'success'),
+            'error': sum(1 for r in results if r.get('status') != 'success'),
+        }
+    if exports:
+        response_data['exports'] = exports
+    statistics = scorer.statistics.summary()
+    if statistics:
+        response_data['statistics'] = statistics
+    if master_summary is not None:
+        response_data['master'] = master_summary
+    if stored is not None:
+        response_data['stored'] = stored.stored
+    if scorecard_cache is not None:
+        hits = sum(1 for r in results if r.get('cached'))
+        response_data['cache'] = {'hits': hits, 'misses': len(results) - hits}
+    return response_data, None
+
+def open_writers(stem, formats, expected_rows):
+    """One output writer per format (EXPORT_FORMATS), all sharing the file stem."""
+    writers = {}
+    if 'xlsx' in formats:
+        writers['xlsx'] = excel_writer(expected_rows, stem + '.xlsx')
+    for fmt in formats:
+        if fmt != 'xlsx':
+            writers[fmt] = TableExportWriter(fmt, stem + EXPORT_FORMATS[fmt][0])
+    return writers
+
+def close_writers(writers):
+    """Finish every writer. Returns ({format: filename}, error); if one fails, all outputs are removed."""
+    outputs = {}
+    saved = []
+    for fmt, writer in writers.items():
+        path, error = writer.close()
+        if error:
+            logger.error("%s output failed: %s", fmt, error)
+            for other in writers.values():
+                other.abort()
+            # Outputs that were already saved (abort() can't take back a saved workbook)
+            for path in saved:
+                if os.path.exists(path):
+                    os.remove(path)
+            return None, error
+        saved.append(path)
+        outputs[fmt] = os.path.basename(path)
+    return outputs, None
+
+def select_concepts(parsed, letters):
+    """A copy of a parsed scorecard keeping only the parts of the given concept letters."""
+    return dict(parsed, parts=[part for part in parsed.get('parts', []) if part.get('code', '')[:1] in letters])
+
+def export_from_store(query, concepts=None, formats=('xlsx',)):
+    """Build the batch outputs for the stored scorecards matching a store Query, without any
+    PDF parsing. concepts: letters whose parts are kept (None keeps all). Returns (response_data, error).
+    """
+    start = time.perf_counter()
+    count = scorecard_store.count(query)
+    stem = os.path.splitext(artifact_store.new_path('well_certification_export'))[0]
+    writers = open_writers(stem, formats, count)
+    scorer = RowScorer(writers.values())
+    try:
+        for parsed in scorecard_store.iter_parsed(query, scorer.chunk_rows):
+            scorer.add(select_concepts(parsed, concepts) if concepts else parsed)
+        scorer.flush()
+    except Exception:
+        for writer in writers.values():
+            writer.abort()
+        raise
+
+    outputs, error = close_writers(writers)
+    if error:
+        return None, error
+    excel_filename = outputs.pop('xlsx', None)
+    logger.info("Exported %d stored scorecards in %.2fs, outputs: %s", count, time.perf_counter() - start,
+                ', '.join(filter(None, [excel_filename] + list(outputs.values()))))
+
+    response_data = {'projects': count,
+                     'message': f'Exported {count} stored scorecards.'}
+    if excel_filename:
+        response_data['excel_filename'] = excel_filename
+    if outputs:
+        response_data['exports'] = outputs
+    statistics = scorer.statistics.summary()
+    if statistics:
+        response_data['statistics'] = statistics
+    return response_data, None
+
+def wait_for_admission(ticket, timeout=None):
+    """Block until an admission ticket is admitted, recording the wait (raises Rejected on timeout)."""
+    ticket.wait(timeout)
+    ADMISSION_WAIT.observe(ticket.wait_seconds)
+
+def busy_response(rejected):
+    """503 for an upload turned away by admission control, with a Retry-After estimate."""
+    ADMISSION_REJECTED.inc(reason=rejected.reason)
+    logger.warning("Upload rejected: %s", rejected)
+    response = jsonify({'error': str(rejected), 'retry_after': rejected.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(rejected.retry_after)
+    return response
+
+def run_upload_job(job, saved_files, master=False, formats=('xlsx',), lean=False, ticket=None):
+    """Background body of an async upload job; with a ticket, waits its turn in the admission queue."""
+    if ticket is not None:
+        if ticket.admitted_at is None:
+            job.set_status('queued')
+        try:
+            wait_for_admission(ticket)
+        except Exception:
+            ticket.release()
+            discard_uploads(saved_files)
+            raise
+        job.set_status('running')
+    try:
+        response_data, error = process_batch(saved_files, on_result=job.set_file_result, master=master,
+                                             formats=formats, lean=lean)
+    finally:
+        if ticket is not None:
+            ticket.release()
+    if error:
+        job.fail(error)
+        return
+    job.complete(response_data)
+
+def run_session_job(job, session, master=False, formats=('xlsx',), lean=False, ticket=None):
+    """Background body of an upload session's job: processes its files as their last chunks arrive."""
+    try:
+        run_upload_job(job, SessionUploads(session), master, formats, lean, ticket)
+    finally:
+        # No more chunks once the batch is over (done, failed, or the session was cancelled/expired)
+        session.close('finished' if job.status == 'completed' else 'failed')
+
+def stream_upload_batch(saved_files, master=False, formats=('xlsx',), lean=False, ticket=None):
+    """Run a batch on a background thread; returns a generator of NDJSON records as files finish.
+
+    The batch starts right away, so its admission ticket (if any) is released when the
+    batch ends even if the client never reads the response.
+
+    Records, one JSON object per line:
+      {"type": "start", "total": N}
+      {"type": "file", "index": i, "completed": k, "total": N, "result": {...}}  (completion order)
+      {"type": "complete", "excel_filename": ..., "message": ..., ...}  (the /upload body minus 'results')
+      {"type": "error", "error": ...}
+    """
+    events = queue.Queue()
+
+    def run():
+        try:
+            response_data, error = process_batch(saved_files, master=master, formats=formats, lean=lean,
+                                                 on_result=lambda index, result: events.put(('file', index, result)))
+        except Exception as e:
+            logger.exception("Upload error: %s", e)
+            response_data, error = None, f'Unexpected error during processing: {str(e)}'
+        finally:
+            if ticket is not None:
+                ticket.release()
+        events.put(('done', response_data, error))
+
+    threading.Thread(target=run, name='upload-stream', daemon=True).start()
+
+    def records():
+        total = len(saved_files)
+        yield json.dumps({'type': 'start', 'total': total}) + '\n'
+        completed = 0
+        while True:
+            kind, first, second = events.get()
+            if kind == 'file':
+                completed += 1
+                yield json.dumps({'type': 'file', 'index': first, 'completed': completed,
+                                  'total': total, 'result': second}) + '\n'
+                continue
 
-        def find_col(predicate):
-            for idx, triple in enumerate(headers, start=1):
-                if predicate(triple):
-                    return idx
-            return None
-
-        def col_for_project_field(name):
-            nm = name.strip()
-            return find_col(lambda t: any(isinstance(x, str) and x.strip() == nm for x in t))
+            response_data, error = first, second
+            if error:
+                yield json.dumps({'type': 'error', 'error': error}) + '\n'
+            else:
+                # Every file was already sent; don't repeat them
+                final = {k: v for k, v in response_data.items() if k != 'results'}
+                yield json.dumps(dict(final, type='complete')) + '\n'
+            return
+
+    return records()
+
+def scorecard_summary(parsed):
+    """Headline fields and part counts of a parsed scorecard, for lean responses."""
+    values = [part.get('value') for part in parsed.get('parts', [])]
+    numeric = [v for v in values if isinstance(v, (int, float))]
+    return {
+        'project_id': parsed.get('project_id'),
+        'project_name': parsed.get('project_name'),
+        'date_cert': parsed.get('date_cert'),
+        'parts': len(values),
+        'scored_parts': len(numeric),
+        'total_points': round(sum(numeric), 3),
+    }
+
+def lean_result(result, batch_id, index):
+    """A per-file result without markdown or the full parse: status, summary and a markdown link."""
+    lean = {k: result[k] for k in ('filename', 'status', 'message', 'file_size', 'cached') if k in result}
+    if result.get('status') == 'success':
+        if result.get('parsed'):
+            lean['summary'] = scorecard_summary(result['parsed'])
+        lean['markdown_url'] = f'/markdown/{batch_id}/{index}'
+    return lean
+
+def compressed_stream(chunks, encoding, level=6):
+    """Compress a streamed response, flushing after every chunk so records still arrive one by one."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31 if encoding == 'gzip' else 15)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        yield data + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def response_encoding():
+    """'gzip' or 'deflate' if compression is enabled and the client accepts it, else None."""
+    if not COMPRESSION_CONFIG.get('enabled'):
+        return None
+    return request.accept_encodings.best_match(['gzip', 'deflate'])
+
+# Uploads this process saved whose batch hasn't finished. The sweeper leaves them alone however
+# long their batch waits for admission; upload names start with the saving process's PID so
+# each server process only sweeps its own uploads (and those of processes that have exited).
+_held_uploads = set()
+_held_uploads_lock = threading.Lock()
+
+def process_alive(pid):
+    if os.name == 'nt':
+        # os.kill(pid, 0) would send CTRL_C_EVENT; Windows runs a single server process anyway
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+def upload_in_use(path):
+    """Orphan filter for UPLOAD_FOLDER: True for an upload whose batch is still queued or running."""
+    owner = os.path.basename(path).split('-', 1)[0]
+    if owner == str(os.getpid()):
+        with _held_uploads_lock:
+            return path in _held_uploads
+    return owner.isdigit() and process_alive(int(owner))
+
+def save_uploads(files):
+    """Save allowed uploads to UPLOAD_FOLDER, hashing them on the way. Returns SavedUploads.
+
+    Saved uploads are held from the sweeper until discard_uploads (at the end of their batch).
+    If saving fails part-way, every file written so far is removed before re-raising.
+    """
+    saved_files = []
+    file_path = None
+    try:
+        for file in files:
+            if file and allowed_file(file.filename):
+                filename = secure_filename(file.filename)
+                # Unique on-disk name so files sharing a name in one batch don't overwrite each other
+                file_path = os.path.join(UPLOAD_FOLDER, f"{os.getpid()}-{uuid.uuid4().hex[:8]}_{filename}")
+                with _held_uploads_lock:
+                    _held_uploads.add(file_path)
+
+                start = time.perf_counter()
+                digest = hashlib.sha256()
+                with open(file_path, 'wb') as out:
+                    for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+                        digest.update(chunk)
+                        out.write(chunk)
 
-        def cols_for_part_code(code_prefix):
-            # 3rd row header starts with the code like 'A05.1'
-            cols = []
-            for idx, t in enumerate(headers, start=1):
-                third = t[2]
-                if isinstance(third, str) and third.startswith(code_prefix):
-                    cols.append(idx)
-            return cols
+                # Store file size before processing
+                file_size = os.path.getsize(file_path)
+                record_stage('save', time.perf_counter() - start, file_size)
+                saved_files.append(SavedUpload(filename, file_path, file_size, digest.hexdigest()))
+                file_path = None
+    except Exception:
+        discard_uploads(saved_files)
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    return saved_files
+
+def discard_uploads(saved_files):
+    """Delete saved uploads that are still on disk and stop holding them from the sweeper."""
+    for upload in saved_files:
+        if os.path.exists(upload.path):
+            os.remove(upload.path)
+        with _held_uploads_lock:
+            _held_uploads.discard(upload.path)
+
+class TemplateSchema:
+    """Column indexes compiled once from the template's 3-row header.
+
+    Every lookup create_combined_excel needs (project field, part code, concept
+    Sub-Points / % column) becomes a dict lookup instead of a scan of the header.
+    """
+
+    def __init__(self, headers):
+        # headers is the 3-row header list: [(row1,row2,row3), ...]
+        self.headers = headers
+        self.max_col = len(headers)
+        # load_template replaces this with the template's actual first free row
+        self.first_data_row = DATA_START_ROW
+
+        # First column whose header (any row) is exactly the field name
+        self.field_cols = {}
+        # 'A05.1' -> every column whose 3rd row header starts with that code
+        self.code_cols = {}
+        for idx, t in enumerate(headers, start=1):
+            for x in t:
+                if isinstance(x, str):
+                    self.field_cols.setdefault(x.strip(), idx)
+            third = t[2]
+            if isinstance(third, str) and len(third) >= PART_CODE_LENGTH:
+                self.code_cols.setdefault(third[:PART_CODE_LENGTH], []).append(idx)
 
+        from openpyxl.utils import column_index_from_string
 
+        self.subpoint_cols = {}
+        self.pct_cols = {}
+        for letter, concept_name in CONCEPT_LETTER_TO_NAME.items():
+            c_sp = self._scan_concept_subpoints(letter, concept_name)
+            if c_sp is None and letter in FALLBACK_SP_COLS:
+                c_sp = column_index_from_string(FALLBACK_SP_COLS[letter])
+            self.subpoint_cols[letter] = c_sp
+            self.pct_cols[letter] = self._scan_concept_pct(letter)
+
+    @classmethod
+    def from_worksheet(cls, ws, header_rows=3):
+        rows = ws.iter_rows(min_row=1, max_row=header_rows, max_col=ws.max_column, values_only=True)
+        headers = [tuple(v if v is not None else "" for v in column) for column in zip(*rows)]
+        return cls(headers)
+
+    def _scan_concept_subpoints(self, letter, concept_name):
+        """Find 'Sub-Points' column by header (row3 == 'Sub-Points' and (row1 letter OR row2 name))."""
+        for i, t in enumerate(self.headers, start=1):
+            r1 = (str(t[0]).strip() if t[0] else "")
+            r2 = (str(t[1]).strip() if t[1] else "")
+            r3 = (str(t[2]).strip() if t[2] else "")
+            if r3 == "Sub-Points" and (r1 == letter or r2 == concept_name):
+                return i
+        return None
 
-        # 3) Find next empty data row (stay BELOW the merged header block)
-        row_idx = 4
-        while any(ws.cell(row_idx, j).value not in (None, "") for j in range(1, max_col + 1)):
-            row_idx += 1
+    def _scan_concept_pct(self, letter):
+        """Find the % column by header (row3 == '%' and row1 == letter)."""
+        for i, t in enumerate(self.headers, start=1):
+            r1 = (str(t[0]).strip() if t[0] else "")
+            r3 = (str(t[2]).strip() if t[2] else "")
+            if r3 == "%" and r1 == letter:
+                return i
+        return None
 
-        processed = 0
+    def field_col(self, name):
+        return self.field_cols.get(name.strip())
+
+    def part_cols(self, code):
+        if len(code) == PART_CODE_LENGTH:
+            return self.code_cols.get(code, [])
+        # Unusual code length: fall back to a prefix scan of the 3rd header row
+        return [idx for idx, t in enumerate(self.headers, start=1)
+                if isinstance(t[2], str) and t[2].startswith(code)]
+
+    @property
+    def column_names(self):
+        """One unique flat name per template column, in template order (for CSV/Parquet/JSON exports).
+
+        Part columns keep their 3rd-row header ('A01.1 ...'); per-concept columns such as
+        'Sub-Points' and '%' are prefixed with the concept letter merged across row 1.
+        """
+        if getattr(self, '_column_names', None) is None:
+            names = []
+            seen = set()
+            concept = ""
+            for idx, (r1, r2, r3) in enumerate(self.headers, start=1):
+                r1, r2, r3 = (str(x).strip() for x in (r1, r2, r3))
+                concept = r1 or concept
+                if not r3:
+                    name = r1 or r2 or f"Column {idx}"
+                elif _FALLBACK_CODE_RE.match(r3):
+                    name = r3
+                else:
+                    name = f"{concept} {r3}".strip()
+                unique, n = name, 2
+                while unique in seen:
+                    unique, n = f"{name} ({n})", n + 1
+                seen.add(unique)
+                names.append(unique)
+            self._column_names = names
+        return self._column_names
+
+    @property
+    def vocabulary(self):
+        """The template's part codes (in column order) as the CodeVocabulary of its score matrices."""
+        if getattr(self, '_vocabulary', None) is None:
+            from scores import CodeVocabulary
+            self._vocabulary = CodeVocabulary(self.code_cols, CONCEPT_LETTER_TO_NAME)
+        return self._vocabulary
+
+DATA_START_ROW = 4  # first row below the merged 3-row header
+
+def first_empty_row(ws, max_col, start_row=DATA_START_ROW):
+    """First row at or below start_row with no values, found in one pass over the sheet."""
+    row_idx = start_row
+    for row in ws.iter_rows(min_row=start_row, max_col=max_col, values_only=True):
+        if all(v in (None, "") for v in row):
+            return row_idx
+        row_idx += 1
+    return row_idx
+
+_template_cache = {'key': None, 'workbook': None, 'schema': None}
+_template_lock = threading.Lock()
+
+def load_template(template_path=None):
+    """Return a fresh copy of the template workbook and its compiled TemplateSchema.
+
+    The template is parsed with load_workbook only when the file changes (keyed by
+    mtime and size); afterwards each call unpickles the cached workbook, which is
+    much cheaper than re-parsing the xlsx.
+    """
+    template_path = template_path or TEMPLATE_PATH
+    stat = os.stat(template_path)
+    key = (template_path, stat.st_mtime_ns, stat.st_size)
+
+    with _template_lock:
+        if _template_cache['key'] != key:
+            from openpyxl import load_workbook
+
+            wb = load_workbook(template_path)
+            _template_cache['workbook'] = pickle.dumps(wb, protocol=pickle.HIGHEST_PROTOCOL)
+            schema = TemplateSchema.from_worksheet(wb.active)
+            schema.first_data_row = first_empty_row(wb.active, schema.max_col)
+            _template_cache['schema'] = schema
+            _template_cache['key'] = key
+            return wb, _template_cache['schema']
+        pickled, schema = _template_cache['workbook'], _template_cache['schema']
+
+    return pickle.loads(pickled), schema
+
+def load_template_schema(template_path=None):
+    """The compiled TemplateSchema alone, without copying the template workbook."""
+    template_path = template_path or TEMPLATE_PATH
+    stat = os.stat(template_path)
+    with _template_lock:
+        if _template_cache['key'] == (template_path, stat.st_mtime_ns, stat.st_size):
+            return _template_cache['schema']
+    return load_template(template_path)[1]
+
+PERCENT_FORMAT = "0%"  # shows % sign with no decimals
+
+def parsed_results(results):
+    """Yield the parsed scorecard of every successful result, skipping ones that failed to parse."""
+    for result in results:
+        parsed = parsed_result(result)
+        if parsed:
+            yield parsed
+
+def score_rows(parsed_list, schema):
+    """Score a chunk of projects at once. Returns (ScoreMatrix, [row cells per project]).
+
+    Each row is {column: (value, centered, number_format)}, shared by the in-memory and
+    streaming writers and the exports so all produce identical cells. Concept Sub-Points,
+    Total Points and percentages come from the chunk's ScoreMatrix in a few array operations.
+    """
+    from scores import ScoreMatrix
+    matrix = ScoreMatrix.from_parsed(parsed_list, schema.vocabulary)
+    letters = list(CONCEPT_LETTER_TO_NAME)
+    subpoint_cols = [schema.subpoint_cols[letter] for letter in letters]
+    pct_cols = [schema.pct_cols[letter] for letter in letters]
+    c_total = schema.field_col("Total Points")
+    code_cols = [schema.part_cols(code) for code in matrix.codes]
+
+    totals = matrix.total_points
+    concept_points = matrix.concept_points.tolist()
+    shares = matrix.percentages(totals).tolist()
+    totals = totals.tolist()
+
+    rows = []
+    for i, parsed in enumerate(parsed_list):
+        cells = {}
+
+        # ---- Basic project info
+        for field_name, key in (("Project Name", "project_name"), ("Project ID", "project_id"),
+                                ("Date Certified", "date_cert")):
+            c = schema.field_col(field_name)
+            value = parsed.get(key)
+            if c is not None and value not in (None, ""):
+                cells[c] = (value, False, None)
+
+        # ---- Parts: numbers as numbers, 'p' and text statuses as text, all centered
+        for j, value in matrix.part_values[i].items():
+            for c in code_cols[j]:  # all columns whose 3rd header row starts with this code
+                cells[c] = (value, True, None)
+
+        # ---- Sub-Points per concept, centered
+        for c_sp, sp in zip(subpoint_cols, concept_points[i]):
+            if c_sp:
+                cells[c_sp] = (round(sp, 3), True, None)
+
+        # Total Points = sum of Sub-Points, centered
+        if c_total:
+            cells[c_total] = (round(totals[i], 3), True, None)
+
+        # ---- Percentages (A..I): subpoints / total_points, with % sign, no decimals, centered
+        if totals[i] > 0:
+            for c_pct, frac in zip(pct_cols, shares[i]):
+                if c_pct:
+                    cells[c_pct] = (frac, True, PERCENT_FORMAT)
+
+        rows.append(cells)
+    return matrix, rows
+
+class RowScorer:
+    """Buffers parsed scorecards and scores them EXCEL_CONFIG['score_chunk_rows'] at a time.
+
+    Each chunk's rows are computed once (score_rows) and handed to every writer's
+    write_cells, in order; the chunk's matrix is added to .statistics. Call flush() after
+    the last add(). A scoring failure is reported through each writer's fail().
+    """
+
+    def __init__(self, writers, schema=None, chunk_rows=None):
+        self.writers = list(writers)
+        self.schema = schema
+        self.chunk_rows = chunk_rows or EXCEL_CONFIG.get('score_chunk_rows', 256)
+        from scores import BatchStatistics
+        self.statistics = BatchStatistics(CONCEPT_LETTER_TO_NAME)
+        self.pending = []
+
+    def add(self, parsed):
+        self.pending.append(parsed)
+        if len(self.pending) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        chunk, self.pending = self.pending, []
+        if not chunk:
+            return
+        start = time.perf_counter()
+        try:
+            schema = self.schema = self.schema or load_template_schema()
+            matrix, rows = score_rows(chunk, schema)
+        except Exception as e:
+            record_stage('score_rows', time.perf_counter() - start, error=True)
+            for writer in self.writers:
+                writer.fail(e)
+            return
+        record_stage('score_rows', time.perf_counter() - start)
+        self.statistics.add(matrix)
+        for cells in rows:
+            for writer in self.writers:
+                writer.write_cells(cells)
+
+def new_excel_path():
+    return artifact_store.new_path('well_certification')
+
+def parsed_result(result):
+    """The parsed scorecard of a successful result (parsing it if the worker didn't), else None."""
+    if result.get("status") != "success":
+        return None
+    # Workers parse alongside extraction; only re-parse results that arrive without it
+    if "parsed" in result:
+        return result["parsed"]
+    return parse_well_markdown(result.get("markdown", ""))
+
+# ---- Output writers
+# Each writer takes one project row at a time (write_cells, as computed by score_rows) and
+# finishes its file on close(), which returns (path, error) like the rest of the pipeline.
+# Writers never raise: the first failure is kept and reported by close(), and abort() removes
+# a partial file. process_batch feeds the writers through a RowScorer as files finish, so a
+# file's text can be dropped once it is scored.
+
+class TemplateExcelWriter:
+    """Writes rows into a copy of the REAL template (preserves merged headers)."""
+
+    stage = 'excel_build'
+
+    def __init__(self, excel_path=None):
+        self.excel_path = excel_path
+        self.error = None
+        self.build_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            from openpyxl.styles import Alignment
+
+            # Load the real template (do NOT rebuild headers/merges) and its compiled column schema
+            self.wb, self.schema = load_template()
+            self.ws = self.wb.active
+            self.center = Alignment(horizontal="center", vertical="center")
+            # Next empty data row (BELOW the merged header block), found once per template change
+            self.row_idx = self.schema.first_data_row
+        except Exception as e:
+            self.fail(e)
+        self.build_seconds += time.perf_counter() - start
+
+    def fail(self, e):
+        if self.error is None:
+            STAGE_ERRORS.inc(stage=self.stage)
+            self.error = f"Error creating WELL certification Excel: {str(e)}"
+
+    def write_cells(self, cells):
+        if self.error:
+            return
+        start = time.perf_counter()
+        try:
+            self._write(cells)
+        except Exception as e:
+            self.fail(e)
+        self.build_seconds += time.perf_counter() - start
+
+    def _write(self, cells):
+        for c, (value, centered, number_format) in cells.items():
+            cell = self.ws.cell(self.row_idx, c, value)
+            if number_format:
+                cell.number_format = number_format
+            if centered:
+                cell.alignment = self.center
+        self.row_idx += 1
+
+    def close(self):
+        if self.error:
+            return None, self.error
+        record_stage(self.stage, self.build_seconds)
+        # Save to processed folder (an empty copy of the template if nothing parsed; helps debugging on the client)
+        return save_workbook(self.wb, self.excel_path)
+
+    def abort(self):
+        self.error = self.error or "aborted"
+
+class StreamingExcelWriter(TemplateExcelWriter):
+    """High-volume variant of TemplateExcelWriter built on a write-only workbook.
+
+    The template's header rows (values, styles, merges, widths) are copied once, then each
+    project row is streamed straight to the file, so memory stays flat however many rows
+    are written. Cell values and centered/percent formatting match TemplateExcelWriter.
+    """
+
+    def __init__(self, excel_path=None):
+        self.excel_path = excel_path
+        self.error = None
+        self.build_seconds = 0.0
+        start = time.perf_counter()
+        try:
+            self._start()
+        except Exception as e:
+            self.fail(e)
+        self.build_seconds += time.perf_counter() - start
+
+    def _start(self):
+        from copy import copy
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment
 
-        for result in results:
-            if result.get("status") != "success":
+        template_wb, self.schema = load_template()
+        template_ws = template_wb.active
+
+        self.wb = Workbook(write_only=True)
+        ws = self.ws = self.wb.create_sheet(template_ws.title)
+
+        # Sheet layout has to be in place before the first row is written
+        for key, dim in template_ws.column_dimensions.items():
+            ws.column_dimensions[key].width = dim.width
+            ws.column_dimensions[key].hidden = dim.hidden
+            ws.column_dimensions[key].min = dim.min
+            ws.column_dimensions[key].max = dim.max
+        for key, dim in template_ws.row_dimensions.items():
+            ws.row_dimensions[key].height = dim.height
+        for merged in template_ws.merged_cells.ranges:
+            ws.merged_cells.add(merged.coord)
+        ws.freeze_panes = template_ws.freeze_panes
+
+        # Header block: copy every template row with its styles
+        header_rows = 0
+        for template_row in template_ws.iter_rows(min_row=1, max_row=template_ws.max_row):
+            row = []
+            for src in template_row:
+                cell = WriteOnlyCell(ws, value=src.value)
+                if src.has_style:
+                    cell.font = copy(src.font)
+                    cell.fill = copy(src.fill)
+                    cell.border = copy(src.border)
+                    cell.alignment = copy(src.alignment)
+                    cell.number_format = src.number_format
+                    cell.protection = copy(src.protection)
+                row.append(cell)
+            ws.append(row)
+            header_rows += 1
+
+        # Data rows start right below the template, like the in-memory writer
+        for _ in range(header_rows, 3):
+            ws.append([])
+
+        # Resolve each data-cell style once; assigning style objects per cell re-registers them every time
+        self.center = Alignment(horizontal="center", vertical="center")
+        self.styles = {}
+        for centered, number_format in ((True, None), (True, PERCENT_FORMAT)):
+            prototype = WriteOnlyCell(ws)
+            prototype.alignment = self.center
+            if number_format:
+                prototype.number_format = number_format
+            self.styles[(centered, number_format)] = prototype._style
+
+    def _write(self, cells):
+        from copy import copy
+        from openpyxl.cell import WriteOnlyCell
+
+        row = [None] * max([self.schema.max_col] + list(cells))
+        for c, (value, centered, number_format) in cells.items():
+            if not centered and not number_format:
+                row[c - 1] = value
                 continue
+            cell = WriteOnlyCell(self.ws, value=value)
+            style = self.styles.get((centered, number_format))
+            if style is not None:
+                cell._style = copy(style)
+            else:
+                if number_format:
+                    cell.number_format = number_format
+                if centered:
+                    cell.alignment = self.center
+            row[c - 1] = cell
+        self.ws.append(row)
+
+    def close(self):
+        if self.error:
+            return None, self.error
+        # Rows are already written; saving only finishes the archive
+        record_stage(self.stage, self.build_seconds)
+        return save_workbook(self.wb, self.excel_path)
+
+    def abort(self):
+        self.error = self.error or "aborted"
+        if getattr(self, 'wb', None) is not None:
+            # A write-only workbook spools rows to a temp file until it is saved
+            try:
+                self.wb.close()
+            except Exception:
+                pass
 
-            parsed = parse_well_markdown(result.get("markdown", ""))
-            if not parsed:
-                continue
+def excel_writer(expected_rows, excel_path=None):
+    """The workbook writer for a batch of about expected_rows projects.
+
+    Batches of at least EXCEL_CONFIG['streaming_min_rows'] use the write-only StreamingExcelWriter.
+    """
+    streaming_min_rows = EXCEL_CONFIG.get('streaming_min_rows')
+    if streaming_min_rows is not None and expected_rows >= streaming_min_rows:
+        return StreamingExcelWriter(excel_path)
+    return TemplateExcelWriter(excel_path)
+
+def write_all(writer, results):
+    """Feed every successful result to a writer, a chunk at a time, and close it. Returns (path, error)."""
+    scorer = RowScorer([writer], getattr(writer, 'schema', None))
+    for parsed in parsed_results(results):
+        scorer.add(parsed)
+    scorer.flush()
+    return writer.close()
+
+def create_combined_excel(results, excel_path=None):
+    """Create WELL certification Excel by writing into the REAL template (preserves merged headers).
+
+    Batches larger than EXCEL_CONFIG['streaming_min_rows'] go through the write-only writer.
+    """
+    if not results:
+        return None, "No results to process"
+    successful = sum(1 for r in results if r.get("status") == "success")
+    return write_all(excel_writer(successful, excel_path), results)
+
+def save_workbook(wb, excel_path=None):
+    """Save a finished workbook (by default under a new name in PROCESSED_FOLDER). Returns (path, error)."""
+    excel_path = excel_path or new_excel_path()
+    start = time.perf_counter()
+    try:
+        wb.save(excel_path)
+    except Exception as e:
+        record_stage('excel_save', time.perf_counter() - start, error=True)
+        # Don't leave a truncated workbook behind
+        if os.path.exists(excel_path):
+            os.remove(excel_path)
+        return None, f"Error saving WELL certification Excel: {str(e)}"
+    record_stage('excel_save', time.perf_counter() - start, os.path.getsize(excel_path))
+    register_artifact(excel_path)
+    return excel_path, None
+
+def register_artifact(path):
+    """Track a generated file in the artifact store if it was written to PROCESSED_FOLDER."""
+    if os.path.dirname(os.path.abspath(path)) == os.path.abspath(artifact_store.folder):
+        artifact_store.add(path)
+
+def create_streaming_excel(results, excel_path=None):
+    """Write results through StreamingExcelWriter. Returns (path, error).
+
+    results may be any iterable (e.g. a generator yielding results as files finish);
+    excel_path defaults to a new file in PROCESSED_FOLDER.
+    """
+    if isinstance(results, list) and not results:
+        return None, "No results to process"
+    return write_all(StreamingExcelWriter(excel_path), results)
+
+# ---- Columnar exports (CSV, Parquet, JSON lines)
+# Same rows and column order as the template, built from score_rows without openpyxl.
+
+class TableExportWriter:
+    """Writes project rows as CSV, Parquet or JSON lines in template column order."""
+
+    def __init__(self, fmt, export_path):
+        self.fmt = fmt
+        self.export_path = export_path
+        self.stage = f'export_{fmt}'
+        self.error = None
+        self.file = None
+        self.rows = []
+        self.start = time.perf_counter()
+        try:
+            if fmt not in ('csv', 'jsonl', 'parquet'):
+                raise ValueError(f"Unsupported export format: {fmt}")
+            self.schema = load_template_schema()
+            self.columns = self.schema.column_names
+            if fmt == 'csv':
+                import csv
+                self.file = open(export_path, 'w', newline='', encoding='utf-8')
+                self.csv = csv.writer(self.file)
+                self.csv.writerow(self.columns)
+            elif fmt == 'jsonl':
+                self.file = open(export_path, 'w', encoding='utf-8')
+        except Exception as e:
+            self.fail(e)
+
+    def fail(self, e):
+        if self.error is None:
+            self.error = f"Error creating {self.fmt} export: {str(e)}"
+
+    def write_cells(self, cells):
+        if self.error:
+            return
+        try:
+            row = [cells[c][0] if c in cells else None for c in range(1, self.schema.max_col + 1)]
+            if self.fmt == 'csv':
+                self.csv.writerow(row)
+            elif self.fmt == 'jsonl':
+                self.file.write(json.dumps(dict(zip(self.columns, row))) + '\n')
+            else:
+                # Parquet is written column by column at the end; only the cell values are kept
+                self.rows.append(row)
+        except Exception as e:
+            self.fail(e)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        if not self.error and self.fmt == 'parquet':
+            self._write_parquet()
+        if self.error:
+            self.abort()
+            record_stage(self.stage, time.perf_counter() - self.start, error=True)
+            return None, self.error
+
+        record_stage(self.stage, time.perf_counter() - self.start, os.path.getsize(self.export_path))
+        register_artifact(self.export_path)
+        return self.export_path, None
+
+    def _write_parquet(self):
+        try:
+            import pandas as pd
+
+            df = pd.DataFrame(self.rows, columns=self.columns)
+            self.rows = []
+            # Part columns mix numeric scores with text statuses ('p', 'Achieved'); Parquet
+            # columns need one type, so those are stored as text
+            for name in df.columns:
+                values = df[name].dropna()
+                if not values.map(lambda v: isinstance(v, (int, float))).all():
+                    df[name] = df[name].map(lambda v: None if v is None else str(v))
+            df.to_parquet(self.export_path, index=False)
+        except ImportError:
+            self.error = "Parquet export requires pyarrow (pip install pyarrow)"
+        except Exception as e:
+            self.fail(e)
+
+    def abort(self):
+        self.error = self.error or "aborted"
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.export_path):
+            os.remove(self.export_path)
+
+class MarkdownWriter:
+    """Keeps a lean batch's markdown (one JSON string per line, in upload order) for /markdown."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, markdown):
+        self.file.write(json.dumps(markdown) + '\n')
+
+    def close(self):
+        self.file.close()
+        register_artifact(self.path)
+        return self.path, None
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+# ---- Master workbook: one persistent sheet, upserted by Project ID
+# Next to the workbook a small JSON index maps each Project ID to its row (plus a digest of
+# the row's cells), so an upload touches only new or changed rows instead of scanning or
+# rebuilding the sheet. The index is tied to the workbook's size/mtime and rebuilt from the
+# Project ID column if the workbook was edited elsewhere.
+
+_master_lock = threading.Lock()
+
+@contextmanager
+def master_lock(master_path):
+    """Serialize master workbook access across threads, and across server worker processes
+    through an flock()ed '<master>.lock' file where the platform has fcntl."""
+    with _master_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(master_path) or '.', exist_ok=True)
+        with open(master_path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def master_index_path(master_path):
+    return os.path.splitext(master_path)[0] + '.index.json'
+
+def row_digest(cells):
+    """Stable digest of a score_rows row, used to skip rewriting unchanged projects."""
+    payload = json.dumps(sorted((c, [value, centered, fmt]) for c, (value, centered, fmt) in cells.items()),
+                         default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def project_key(parsed):
+    project_id = str(parsed.get('project_id') or '').strip()
+    return project_id if project_id and project_id != 'Unknown' else None
+
+def load_master_index(master_path, ws, schema):
+    """Return {'next_row': int, 'rows': {project_id: [row, digest]}} for the master sheet."""
+    stat = os.stat(master_path)
+    try:
+        with open(master_index_path(master_path), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('size') == stat.st_size and index.get('mtime_ns') == stat.st_mtime_ns:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    # Missing or stale index: rebuild it with one pass over the sheet
+    logger.info("Rebuilding master workbook row index for %s", master_path)
+    id_col = schema.field_col("Project ID")
+    rows = {}
+    next_row = DATA_START_ROW
+    for row_idx, row in enumerate(ws.iter_rows(min_row=DATA_START_ROW, max_col=schema.max_col,
+                                               values_only=True), start=DATA_START_ROW):
+        if any(v not in (None, "") for v in row):
+            next_row = row_idx + 1
+            key = project_key({'project_id': row[id_col - 1]}) if id_col else None
+            if key:
+                # Digest unknown: the first upsert of this project rewrites the row
+                rows[key] = [row_idx, None]
+    return {'next_row': next_row, 'rows': rows}
+
+def upsert_master_excel(results, master_path=None):
+    """Insert new projects into the master workbook and update re-certified ones in place.
+
+    Returns ({'filename', 'inserted', 'updated', 'unchanged'}, error). Projects without a
+    Project ID are always appended. The workbook is only re-saved when a row changed.
+    """
+    master_path = master_path or MASTER_CONFIG['path']
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.styles import Alignment
 
-            # ---- Write basic project info
-            def set_field(field_name, value):
-                c = col_for_project_field(field_name)
-                if c is not None and value not in (None, ""):
-                    ws.cell(row_idx, c, value)
-
-            set_field("Project Name", parsed.get("project_name"))
-            set_field("Project ID", parsed.get("project_id"))
-            set_field("Date Certified", parsed.get("date_cert"))
-
-            # ---- Write parts with rules & accumulate subpoints
-            # Before the parts loop, start subpoints accumulator:
-            subpoints = {k: 0.0 for k in concept_letter_to_name}
-
-            # When writing each part value:
-            for part in parsed.get("parts", []):
-                code  = part.get("code", "")
-                value = part.get("value", "")
-                part_cols = cols_for_part_code(code)  # your existing function that finds all columns starting with this code
-
-                for c in part_cols:
-                    if isinstance(value, (int, float)):
-                        cell = ws.cell(row_idx, c, float(value))
-                    elif value in (None, ""):
-                        # leave cell empty
-                        continue
+        CENTER = Alignment(horizontal="center", vertical="center")
+        build_start = time.perf_counter()
+
+        with master_lock(master_path):
+            if os.path.exists(master_path):
+                wb = load_workbook(master_path)
+                ws = wb.active
+                schema = TemplateSchema.from_worksheet(ws)
+                index = load_master_index(master_path, ws, schema)
+            else:
+                wb, schema = load_template()
+                ws = wb.active
+                index = {'next_row': schema.first_data_row, 'rows': {}}
+
+            rows = index['rows']
+            counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+            parsed_list = list(parsed_results(results))
+            chunk_rows = EXCEL_CONFIG.get('score_chunk_rows', 256)
+            for chunk_start in range(0, len(parsed_list), chunk_rows):
+                chunk = parsed_list[chunk_start:chunk_start + chunk_rows]
+                for parsed, cells in zip(chunk, score_rows(chunk, schema)[1]):
+                    digest = row_digest(cells)
+                    key = project_key(parsed)
+                    existing = key in rows
+
+                    if existing:
+                        row_idx, old_digest = rows[key]
+                        if old_digest == digest:
+                            counts['unchanged'] += 1
+                            continue
+                        counts['updated'] += 1
                     else:
-                        cell = ws.cell(row_idx, c, value)
-                    cell.alignment = CENTER  # (3) center values, including 'p' and text statuses
-
-                # (1) Only numeric Achieved contributes to Sub-Points
-                if isinstance(value, (int, float)):
-                    subpoints[code[0]] += float(value)
-
-            # ---- Sub-Points per concept
-            # (1) Write Sub-Points per concept, centered
-            total_points = 0.0
-            for letter, sp in subpoints.items():
-                cname = concept_letter_to_name[letter]
-                c_sp = col_for_concept_subpoints(letter, cname) or sp_col_fallback(ws, letter)
-                if c_sp:
-                    cell = ws.cell(row_idx, c_sp, round(sp, 3))
-                    cell.alignment = CENTER
-                total_points += sp
-
-            # Total Points = sum of Sub-Points, centered
-            c_total = col_for_project_field("Total Points")
-            if c_total:
-                cell = ws.cell(row_idx, c_total, round(total_points, 3))
-                cell.alignment = CENTER
-
-            # ---- Percentages (A..I): subpoints / total_points * 100
-            # (2) Percent columns with % sign, no decimals, centered
-            if total_points > 0:
-                for letter, sp in subpoints.items():
-                    c_pct = col_for_concept_pct(letter)
-                    if c_pct:
-                        frac = sp / total_points  # 0.0–1.0
-                        cell = ws.cell(row_idx, c_pct, frac)
-                        cell.number_format = "0%"   # shows % sign with no decimals
-                        cell.alignment = CENTER
-
-            processed += 1
-            row_idx += 1
-
-        if processed == 0:
-            # Still produce an empty copy of the template (helps debugging on the client)
-            out_name = f"well_certification_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            excel_path = os.path.join(PROCESSED_FOLDER, out_name)
-            wb.save(excel_path)
-            return excel_path, None
-
-        # 4) Save to processed folder
-        out_name = f"well_certification_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        excel_path = os.path.join(PROCESSED_FOLDER, out_name)
-        wb.save(excel_path)
-        return excel_path, None
+                        row_idx = index['next_row']
+                        index['next_row'] += 1
+                        counts['inserted'] += 1
+
+                    for c in range(1, schema.max_col + 1):
+                        if c in cells:
+                            value, centered, number_format = cells[c]
+                            cell = ws.cell(row_idx, c, value)
+                            if number_format:
+                                cell.number_format = number_format
+                            if centered:
+                                cell.alignment = CENTER
+                        elif existing and ws.cell(row_idx, c).value is not None:
+                            # Clear scores the re-certified project no longer has
+                            ws.cell(row_idx, c).value = None
+                    if key:
+                        rows[key] = [row_idx, digest]
+
+            record_stage('excel_build', time.perf_counter() - build_start)
+
+            summary = dict(counts, filename=os.path.basename(master_path))
+            if not counts['inserted'] and not counts['updated'] and os.path.exists(master_path):
+                return summary, None
+
+            # Save to a temporary name first so readers never see a half-written master
+            os.makedirs(os.path.dirname(master_path) or '.', exist_ok=True)
+            tmp_path = f"{master_path}.{uuid.uuid4().hex[:8]}.tmp"
+            saved_path, error = save_workbook(wb, tmp_path)
+            if error:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return None, error
+            os.replace(tmp_path, master_path)
+
+            stat = os.stat(master_path)
+            index.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            with open(master_index_path(master_path), 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            return summary, None
 
     except Exception as e:
-        return None, f"Error creating WELL certification Excel: {str(e)}"
-
-def parse_well_markdown(markdown_content):
-    try:
-        def norm(s: str) -> str:
-            s2 = s.replace("β", "")
-            s2 = re.sub(r"(\b[AWNLVTSXMCI]\d{2})\.\s+(\d)\b", r"\1.\2", s2)      # A01. 1 -> A01.1
-            s2 = re.sub(r"(\d)\s*\.\s*(\d)", r"\1.\2", s2)                        # 0. 5 -> 0.5
-            # Only squeeze spaces/tabs, keep newlines for proper line-by-line parsing
-            s2 = re.sub(r'[ \t]+', ' ', s2)
-            return s2
-
-        text = norm(markdown_content)
-        
-        # Handle OCR variations of "Pending Documentation & On-Site"
+        STAGE_ERRORS.inc(stage='excel_build')
+        return None, f"Error updating master workbook: {str(e)}"
+
+# ---- Scorecard parser engine
+# All patterns are compiled once at import; parse_well_markdown normalizes the text in one
+# pass and classifies score rows with a single scan.
+
+_DECIMAL_SPACE_RE = re.compile(r"(\d)\s*\.\s*(\d)")   # 0. 5 -> 0.5, also A01. 1 -> A01.1
+_SPLIT_DECIMAL_RE = re.compile(r"\d\s+\.\s*\d|\d\.\s+\d")  # any decimal the fix above would change
+_SPACES_RE = re.compile(r"[ \t]+")                    # squeeze spaces/tabs, keep newlines
+
+# Basic fields - Accept 9–12 digits; keep leading zeros
+_PROJECT_RE = re.compile(r"\b(\d{9,12})\b\s*-\s*([^-()]+?)(?=\s*\(WELL|\s*Date:|\s*WELL|\s*$)")
+_PROJECT_ID_RE = re.compile(r"\b(\d{9,12})\b\s*-\s*")
+_PROJECT_NAME_RE = re.compile(r"\b\d{9,12}\b\s*-\s*(.*?)(?:\s*Date:|\s*WELL|\s*\(|$)")
+_DATE_RE = re.compile(r"Date:\s*(\d{1,2}\s+[A-Za-z]{3},\s*\d{4})")
+
+# Parts (rules) - Using the robust regex pattern
+# Matches:
+#   CODE  TITLE  POINTS(or 'No')  STATUS  [ACHIEVED?]
+ROW_RE = re.compile(
+    r"""^(?P<code>[A-Z][0-9]{2}\.\d)\s+
+        (?P<title>.+?)\s+
+        (?P<pts>(?:\d+(?:\.\d+)?(?:\+\d+(?:\.\d+)?)*)|No)\s+
+        (?P<status>Achieved|Not\s+Attempted|Pending\s+Documentation|Not\s+Applicable)
+        (?:\s+(?P<ach>(?:\d+(?:\.\d+)?(?:\+\d+(?:\.\d+)?)*)))?$""",
+    re.VERBOSE | re.MULTILINE
+)
+
+# Looser fallback for rows ROW_RE misses (e.g. 'Withdrawn', 'Pending', broken lines)
+PART_RE = re.compile(
+    r"(?P<code>[AWNLVTSXMCI]\d{2}\.\d)\s+"
+    r"(?P<title>.+?)\s+"
+    r"(?:(?P<pre>\d+(?:\.\d+)?)\s+)?"
+    r"(?P<status>Achieved|Not Attempted|Not Applicable|Withdrawn|"
+    r"Pending(?: Documentation)?|Pending Documentation)"
+    r"(?:\s+(?P<post>\d+(?:\.\d+)?))?",
+    flags=re.IGNORECASE | re.DOTALL | re.MULTILINE
+)
+
+# Every position where a PART_RE match could start
+_FALLBACK_CODE_RE = re.compile(r"[AWNLVTSXMCI]\d{2}\.\d", re.IGNORECASE)
+# Anything PART_RE could take for a status
+_STATUS_WORD_RE = re.compile(r"achieved|not attempted|not applicable|withdrawn|pending", re.IGNORECASE)
+
+def _normalize_scorecard_text(markdown_content):
+    """Repair extraction artifacts in one pass: stray β, split decimals/codes, space runs, OCR status variants."""
+    text = markdown_content.replace("β", "")
+    # Clean text is common; skip substitutions that would return it unchanged
+    if _SPLIT_DECIMAL_RE.search(text):
+        text = _DECIMAL_SPACE_RE.sub(r"\1.\2", text)
+    if "  " in text or "\t" in text:
+        text = _SPACES_RE.sub(" ", text)
+
+    # Handle OCR variations of "Pending Documentation & On-Site"
+    if "& On" in text:
         text = text.replace("Pending Documentation & On-Site", "Pending Documentation")
         text = text.replace("Pending Documentation & On Site", "Pending Documentation")
+    return text
 
-        # keep line breaks; only squeeze runs of spaces/tabs
-        text = re.sub(r'[ \t]+', ' ', text)
+def _sum_token(token):
+    """Convert '1+1' or '0.5+1' or '2' to a float sum; return None if token invalid or 'No'."""
+    if token is None:
+        return None
+    token = token.strip()
+    if token.lower() == 'no':
+        return None
+    parts = token.split('+')
+    try:
+        return sum(float(p) for p in parts)
+    except ValueError:
+        return None
+
+def _score_row(m):
+    """Cell value for a ROW_RE match."""
+    status = m.group('status').replace('\xa0', ' ').strip()
+
+    # Mapping according to the specified rules
+    if status == 'Pending Documentation':
+        return 'Pending Documentation'
+    if status == 'Not Applicable':
+        return 'Not Applicable'
+    if status == 'Not Attempted':
+        return None  # empty cell
+
+    # Achieved
+    if status == 'Achieved':
+        # Prefer explicit achieved value if present
+        achieved_val = _sum_token(m.group('ach'))
+        if achieved_val is not None:
+            return achieved_val  # includes 0 or 0.5 etc.
+        # Else fall back to attempted if numeric
+        attempted_val = _sum_token(m.group('pts'))
+        if attempted_val is not None:
+            return attempted_val
+        # Truly no numeric score → 'p'
+        return 'p'
+
+    # Fallback (shouldn't happen)
+    return None
+
+def _score_fallback(m):
+    """Cell value for a PART_RE match."""
+    status = (m.group("status") or "").strip().title()
+    post = m.group("post")
+
+    if status in ("Pending", "Pending Documentation"):
+        return "Pending Documentation"
+    elif status == "Not Applicable":
+        return "Not Applicable"
+    elif status == "Withdrawn":
+        return "Withdrawn"
+    elif status == "Achieved":
+        if post is not None:
+            try:
+                return float(post)
+            except ValueError:
+                return post
+        return "p"
+    # Not Attempted
+    return None   # truly empty
 
-        # Basic fields - Accept 9–12 digits; keep leading zeros
-        m = re.search(r"\b(\d{9,12})\b\s*-\s*([^-()]+?)(?=\s*\(WELL|\s*Date:|\s*WELL|\s*$)", text)
+def parse_well_markdown(markdown_content):
+    try:
+        text = _normalize_scorecard_text(markdown_content)
+
+        m = _PROJECT_RE.search(text)
         if m:
             project_id  = m.group(1)                # e.g., "02202255386"
             project_name = m.group(2).strip()       # e.g., "SAP Labs China, Shanghai Campus"
         else:
             # Fallbacks if OCR is messy: try looser name grab after a long digit cluster
-            mid = re.search(r"\b(\d{9,12})\b\s*-\s*", text)
+            mid = _PROJECT_ID_RE.search(text)
             project_id = mid.group(1) if mid else "Unknown"
             # Try to slice a reasonable name region
-            pname = re.search(r"\b\d{9,12}\b\s*-\s*(.*?)(?:\s*Date:|\s*WELL|\s*\(|$)", text)
+            pname = _PROJECT_NAME_RE.search(text)
             project_name = pname.group(1).strip() if pname else "Unknown Project"
 
-        m_date = re.search(r"Date:\s*(\d{1,2}\s+[A-Za-z]{3},\s*\d{4})", text)
+        m_date = _DATE_RE.search(text)
         date_cert = "Unknown"
         if m_date:
             try:
@@ -313,114 +1894,39 @@ def parse_well_markdown(markdown_content):
             except Exception:
                 pass
 
-        # Parts (rules) - Using the robust regex pattern
-        # Matches:
-        #   CODE  TITLE  POINTS(or 'No')  STATUS  [ACHIEVED?]
-        ROW_RE = re.compile(
-            r"""^(?P<code>[A-Z][0-9]{2}\.\d)\s+
-                (?P<title>.+?)\s+
-                (?P<pts>(?:\d+(?:\.\d+)?(?:\+\d+(?:\.\d+)?)*)|No)\s+
-                (?P<status>Achieved|Not\s+Attempted|Pending\s+Documentation|Not\s+Applicable)
-                (?:\s+(?P<ach>(?:\d+(?:\.\d+)?(?:\+\d+(?:\.\d+)?)*)))?$""",
-            re.VERBOSE | re.MULTILINE
-        )
-
-        def _sum_token(token: str):
-            """Convert '1+1' or '0.5+1' or '2' to a float sum; return None if token invalid or 'No'."""
-            if token is None:
-                return None
-            token = token.strip()
-            if token.lower() == 'no':
-                return None
-            parts = token.split('+')
-            try:
-                return sum(float(p) for p in parts)
-            except ValueError:
-                return None
-
-        def score_cell_from_line(line: str):
-            m = ROW_RE.match(line.strip())
-            if not m:
-                return None  # let caller ignore or log
-            
-            pts_attempted = m.group('pts')
-            status = m.group('status').replace('\xa0', ' ').strip()
-            pts_ach = m.group('ach')
-
-            attempted_val = _sum_token(pts_attempted)
-            achieved_val = _sum_token(pts_ach)
-
-            # Mapping according to the specified rules
-            if status == 'Pending Documentation':
-                return 'Pending Documentation'
-            if status == 'Not Applicable':
-                return 'Not Applicable'
-            if status == 'Not Attempted':
-                return None  # empty cell
-
-            # Achieved
-            if status == 'Achieved':
-                # Prefer explicit achieved value if present
-                if achieved_val is not None:
-                    return achieved_val  # includes 0 or 0.5 etc.
-                # Else fall back to attempted if numeric
-                if attempted_val is not None:
-                    return attempted_val
-                # Truly no numeric score → 'p'
-                return 'p'
-
-            # Fallback (shouldn't happen)
-            return None
-
-        # Parse parts using the new robust scoring logic
+        # One scan classifies every well-formed score row
         parts = []
-
+        row_codes = 0
+        needs_fallback = False
         for m in ROW_RE.finditer(text):
-            line = m.group(0)
             code = m.group('code')
-            value = score_cell_from_line(line)
+            if code[0] in CONCEPT_LETTER_TO_NAME:
+                row_codes += 1
+            value = _score_row(m)
             if value is not None:
                 parts.append({"code": code, "value": value})
+            elif m.group('status') != 'Not Attempted' or _STATUS_WORD_RE.search(text, m.end('code'), m.start('status')):
+                # PART_RE might read this empty row differently
+                needs_fallback = True
 
-        # Keep the old fallback, but also use finditer
+        # Codes with a value are final; the looser PART_RE pass may only add the others
         found_codes = {p["code"] for p in parts}
 
-        PART_RE = re.compile(
-            r"(?P<code>[AWNLVTSXMCI]\d{2}\.\d)\s+"
-            r"(?P<title>.+?)\s+"
-            r"(?:(?P<pre>\d+(?:\.\d+)?)\s+)?"
-            r"(?P<status>Achieved|Not Attempted|Not Applicable|Withdrawn|"
-            r"Pending(?: Documentation)?|Pending Documentation)"
-            r"(?:\s+(?P<post>\d+(?:\.\d+)?))?",
-            flags=re.IGNORECASE | re.DOTALL | re.MULTILINE
-        )
-
-        for m_old in PART_RE.finditer(text):
-            code = m_old.group("code")
-            if code in found_codes:
-                continue
-            status = (m_old.group("status") or "").strip().title()
-            post = m_old.group("post")
-
-            if status in ("Pending", "Pending Documentation"):
-                value = "Pending Documentation"
-            elif status == "Not Applicable":
-                value = "Not Applicable"
-            elif status == "Withdrawn":
-                value = "Withdrawn"
-            elif status == "Achieved":
-                if post is not None:
-                    try:
-                        value = float(post)
-                    except:
-                        value = post
-                else:
-                    value = "p"
-            else:  # Not Attempted
-                value = None   # truly empty
-
-            if value is not None:
-                parts.append({"code": code, "value": value})
+        # The fallback can only add something if a code appears outside the start of a
+        # well-formed row (row starts are a subset of all codes, so comparing counts is
+        # enough). Otherwise every PART_RE match starts at a row already scored, or at a
+        # plain 'Not Attempted' row that it would score as empty too, so the scan is skipped.
+        if not needs_fallback:
+            needs_fallback = len(_FALLBACK_CODE_RE.findall(text)) != row_codes
+
+        if needs_fallback:
+            for m_old in PART_RE.finditer(text):
+                code = m_old.group("code")
+                if code in found_codes:
+                    continue
+                value = _score_fallback(m_old)
+                if value is not None:
+                    parts.append({"code": code, "value": value})
 
         # We deliberately DO NOT compute totals here; create_combined_excel will compute Sub-Points, Total, and %.
 
@@ -432,125 +1938,426 @@ def parse_well_markdown(markdown_content):
         }
 
     except Exception as e:
-        print(f"Error parsing WELL markdown: {e}")
+        logger.warning("Error parsing WELL markdown: %s", e)
         return None
 
-@app.route('/')
+# Compress JSON and text bodies for clients that accept it. Downloads (send_file) are left
+# alone so ETag/Range keep working on the raw bytes; xlsx and Parquet are compressed already.
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/markdown', 'text/plain', 'text/html'}
+
+@bp.after_app_request
+def compress_response(response):
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES or not 200 <= response.status_code < 300):
+        return response
+    encoding = response_encoding()
+    if not encoding:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESSION_CONFIG['min_size']:
+        return response
+
+    level = COMPRESSION_CONFIG['level']
+    response.set_data(gzip.compress(data, level) if encoding == 'gzip' else zlib.compress(data, level))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/upload', methods=['POST'])
+def batch_options(args):
+    """master, formats and lean from an upload's query string. Returns ((master, formats, lean), error)."""
+    # master=1: also upsert the batch into the persistent master workbook
+    master = args.get('master', '').lower() in ('1', 'true', 'yes')
+
+    # view=lean: per-file status/summary only; markdown is fetched from /markdown on demand
+    lean = args.get('view') == 'lean'
+
+    # formats=xlsx,csv,parquet,jsonl: outputs to build (default: just the workbook)
+    formats = tuple(f.strip().lower() for f in args.get('formats', 'xlsx').split(',') if f.strip())
+    unknown = [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown or not formats:
+        return (master, formats, lean), (f"Unsupported format: {', '.join(unknown) or 'none given'}. "
+                                         f"Choose from {', '.join(EXPORT_FORMATS)}.")
+    return (master, formats, lean), None
+
+@bp.route('/upload', methods=['POST'])
 def upload_files():
+    saved_files = []
+    ticket = None
     try:
+        # Reserve processing capacity before the body is read (503 right away if the admission
+        # queue is full, without spooling the upload); the file count is corrected once it is parsed
+        ticket = admission.reserve(1, request.content_length or 0)
+
         if 'files' not in request.files:
             return jsonify({'error': 'No files provided'}), 400
         
         files = request.files.getlist('files')
         if not files or all(file.filename == '' for file in files):
             return jsonify({'error': 'No files selected'}), 400
-        
-        results = []
-        
-        for file in files:
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(file_path)
-                
-                # Store file size before processing
-                file_size = os.path.getsize(file_path)
-                
-                # Extract first 2 pages
-                first_two_pages_path, extract_error = extract_first_two_pages(file_path)
-                if extract_error:
-                    results.append({
-                        'filename': filename,
-                        'status': 'error',
-                        'message': extract_error,
-                        'file_size': file_size
-                    })
-                    continue
-                
-                # Convert to markdown
-                markdown_content, convert_error = convert_to_markdown(first_two_pages_path)
-                if convert_error:
-                    results.append({
-                        'filename': filename,
-                        'status': 'error',
-                        'message': convert_error,
-                        'file_size': file_size
-                    })
-                    continue
-                
-                results.append({
-                    'filename': filename,
-                    'status': 'success',
-                    'markdown': markdown_content,
-                    'message': 'Successfully processed',
-                    'file_size': file_size
-                })
-                
-                # Clean up temporary files
-                if os.path.exists(first_two_pages_path):
-                    os.remove(first_two_pages_path)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-        
-        # Create combined Excel file
-        excel_path, excel_error = create_combined_excel(results)
-        if excel_error:
-            return jsonify({'error': excel_error}), 500
-        
-        # Get just the filename for the client (avoid session storage)
-        excel_filename = os.path.basename(excel_path)
-        
-        print(f"Debug: Excel file created at: {excel_path}")
-        print(f"Debug: Excel filename: {excel_filename}")
-        
-        response_data = {
-            'results': results,
-            'excel_filename': excel_filename,
-            'message': f'Successfully processed {len(results)} files. Combined Excel file created.'
-        }
-        
-        print(f"Debug: Sending response to client: {response_data}")
+
+        ticket.resize(sum(1 for file in files if file and allowed_file(file.filename)))
+
+        # Save every upload first; the request's file streams are not usable from worker processes
+        saved_files = save_uploads(files)
+
+        (master, formats, lean), error = batch_options(request.args)
+        if error:
+            discard_uploads(saved_files)
+            ticket.release()
+            return jsonify({'error': error}), 400
+
+        # mode=stream: NDJSON, one record per file as soon as it is parsed, then the summary
+        if request.args.get('mode') == 'stream':
+            wait_for_admission(ticket, ADMISSION_CONFIG['max_wait'])
+            records = stream_upload_batch(saved_files, master, formats, lean, ticket)
+            ticket = None  # released by the batch thread
+            headers = {'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+            encoding = response_encoding()
+            if encoding:
+                records = compressed_stream(records, encoding, COMPRESSION_CONFIG['level'])
+                headers['Content-Encoding'] = encoding
+            return Response(records, mimetype='application/x-ndjson', headers=headers)
+
+        # mode=async: hand the batch to a background job and return its ID right away
+        # (it waits for admission in the background, however long the queue)
+        if request.args.get('mode') == 'async':
+            job = job_manager.submit([f.filename for f in saved_files], run_upload_job, saved_files, master, formats,
+                                     lean, ticket)
+            ticket = None  # released by the job
+            return jsonify({
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': f'/jobs/{job.id}',
+                'result_url': f'/jobs/{job.id}/result'
+            }), 202
+
+        wait_for_admission(ticket, ADMISSION_CONFIG['max_wait'])
+        response_data, error = process_batch(saved_files, master=master, formats=formats, lean=lean)
+        if error:
+            return jsonify({'error': error}), 500
         
         return jsonify(response_data)
-        
+
+    except Rejected as e:
+        discard_uploads(saved_files)
+        return busy_response(e)
     except Exception as e:
         # Log the error for debugging
-        print(f"Upload error: {str(e)}")
+        logger.exception("Upload error: %s", e)
+        discard_uploads(saved_files)
         return jsonify({'error': f'Unexpected error during processing: {str(e)}'}), 500
-
-@app.route('/download-excel')
+    finally:
+        if ticket is not None:
+            ticket.release()
+
+@bp.route('/uploads', methods=['POST'])
+def create_upload_session():
+    """Start a resumable upload: declare the batch's files, then PUT each one in chunks.
+
+    Body: {"files": [{"name": "a.pdf", "size": 123456}, ...]}; query string as for /upload
+    (master, formats, view). The batch starts right away as a background job and takes each
+    file as soon as its last chunk arrives.
+    """
+    data = request.get_json(silent=True) or {}
+    entries = data.get('files')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'No files declared'}), 400
+    declared = []
+    for entry in entries:
+        name = entry.get('name') if isinstance(entry, dict) else None
+        if not name or not allowed_file(name):
+            return jsonify({'error': f'Not a PDF file: {name}'}), 400
+        declared.append((secure_filename(name), entry.get('size')))
+
+    options, error = batch_options(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    master, formats, lean = options
+
+    ticket = None
+    try:
+        session = upload_sessions.create(declared, {'master': master, 'formats': formats, 'lean': lean})
+        # Reserve processing capacity (503 right away if the admission queue is full)
+        ticket = admission.reserve(len(declared), sum(size for _, size in declared))
+        job = job_manager.start([filename for filename, _ in declared], run_session_job, session, master,
+                                formats, lean, ticket)
+        ticket = None  # released by the job
+        session.job_id = job.id
+        session.save()
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    except Rejected as e:
+        upload_sessions.remove(session)
+        return busy_response(e)
+    finally:
+        if ticket is not None:
+            ticket.release()
+
+    return jsonify(dict(session.status(),
+                        chunk_size=UPLOAD_SESSION_CONFIG['chunk_size'],
+                        upload_url=f'/uploads/{session.id}/files/<index>?offset=<received>',
+                        status_url=f'/jobs/{job.id}',
+                        result_url=f'/jobs/{job.id}/result')), 201
+
+@bp.route('/uploads/<session_id>')
+def upload_session_status(session_id):
+    """Bytes received per file, to resume an interrupted upload"""
+    session = upload_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Upload session not found: {session_id}'}), 404
+    return jsonify(session.status())
+
+@bp.route('/uploads/<session_id>/files/<int:index>', methods=['PUT'])
+def upload_chunk(session_id, index):
+    """Append the request body to file `index` at ?offset= (the bytes received so far)"""
+    session = upload_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Upload session not found: {session_id}'}), 404
+    offset = request.args.get('offset', type=int)
+    if offset is None or offset < 0:
+        return jsonify({'error': 'offset is required'}), 400
+
+    start = time.perf_counter()
+    try:
+        received = session.write_chunk(index, offset, request.stream, request.content_length)
+    except UploadError as e:
+        body = {'error': str(e)}
+        if e.received is not None:
+            # Where the client should resume
+            body['received'] = e.received
+        return jsonify(body), e.status
+    record_stage('upload', time.perf_counter() - start, received - offset)
+    size = session.files[index]['size']
+    return jsonify({'index': index, 'received': received, 'size': size, 'complete': received == size})
+
+@bp.route('/uploads/<session_id>/finalize', methods=['POST'])
+def finalize_upload_session(session_id):
+    """Confirm every file has arrived; returns where to follow the batch (409 lists missing files)"""
+    session = upload_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Upload session not found: {session_id}'}), 404
+    status = session.status()
+    incomplete = [f['index'] for f in status['files'] if not f['complete']]
+    if incomplete:
+        return jsonify(dict(status, error=f'{len(incomplete)} files are incomplete', incomplete=incomplete)), 409
+    job = job_manager.get(session.job_id)
+    return jsonify({
+        'session_id': session.id,
+        'job_id': session.job_id,
+        'status': job.status if job is not None else 'unknown',
+        'status_url': f'/jobs/{session.job_id}',
+        'result_url': f'/jobs/{session.job_id}/result'
+    })
+
+@bp.route('/uploads/<session_id>', methods=['DELETE'])
+def cancel_upload_session(session_id):
+    """Cancel an upload; its batch fails if it is still waiting for files"""
+    session = upload_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Upload session not found: {session_id}'}), 404
+    session.close('cancelled')
+    return jsonify({'session_id': session.id, 'closed': session.closed})
+
+@bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Per-file progress of a background upload job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job not found: {job_id}'}), 404
+    return jsonify(job.to_dict())
+
+@bp.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Final /upload response of a finished job (202 while it is still running)"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job not found: {job_id}'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), 500
+    if job.status != 'completed':
+        return jsonify(job.to_dict()), 202
+    return jsonify(job.response)
+
+@bp.route('/download-excel')
 def download_excel():
-    """Download the combined Excel file using file parameter"""
+    """Download the combined Excel file (or a CSV/Parquet/JSONL export of the same batch) using file parameter"""
     try:
         filename = request.args.get('file')
         if not filename:
             return jsonify({'error': 'Missing file parameter.'}), 400
         
-        # Security: only allow files inside PROCESSED_FOLDER
+        # Security: only allow files inside PROCESSED_FOLDER (resolved through the artifact index)
         safe_name = os.path.basename(filename)
-        excel_path = os.path.join(PROCESSED_FOLDER, safe_name)
+
+        # format=csv|parquet|jsonl: the export built alongside this workbook (same file stem)
+        fmt = request.args.get('format')
+        if fmt:
+            if fmt not in EXPORT_FORMATS:
+                return jsonify({'error': f"Unsupported format: {fmt}. Choose from {', '.join(EXPORT_FORMATS)}."}), 400
+            safe_name = os.path.splitext(safe_name)[0] + EXPORT_FORMATS[fmt][0]
+        else:
+            fmt = next((f for f, (suffix, _) in EXPORT_FORMATS.items() if safe_name.endswith(suffix)), 'xlsx')
+
+        excel_path = artifact_store.path_for(safe_name)
         
-        print(f"Debug: Downloading file: {safe_name} from path: {excel_path}")
+        logger.debug("Downloading file: %s from path: %s", safe_name, excel_path)
         
-        if not os.path.exists(excel_path):
+        if excel_path is None:
+            if fmt != 'xlsx':
+                return jsonify({'error': f'{fmt} export not found: {safe_name}. Upload with formats={fmt} to create it.'}), 404
             return jsonify({'error': f'Excel file not found: {safe_name}. Please process files first.'}), 404
         
-        return send_file(
+        # Conditional response: ETag / Last-Modified revalidation and Range requests
+        response = send_file(
             excel_path, 
             as_attachment=True, 
             download_name=safe_name,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            mimetype=EXPORT_FORMATS[fmt][1],
+            conditional=True
         )
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
         
     except Exception as e:
-        print(f"Download error: {str(e)}")
+        logger.exception("Download error: %s", e)
         return jsonify({'error': f'Error downloading file: {str(e)}'}), 500
 
-@app.route('/clear-session', methods=['POST'])
+@bp.route('/download-master')
+def download_master():
+    """Download the master workbook maintained by /upload?master=1"""
+    try:
+        master_path = MASTER_CONFIG['path']
+        if not os.path.exists(master_path):
+            return jsonify({'error': 'Master workbook not found. Upload files with master=1 first.'}), 404
+
+        with master_lock(master_path):
+            # Open under the lock; upserts replace the file atomically, so the open copy stays intact
+            response = send_file(
+                master_path,
+                as_attachment=True,
+                download_name=os.path.basename(master_path),
+                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                conditional=True
+            )
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
+
+    except Exception as e:
+        logger.exception("Download error: %s", e)
+        return jsonify({'error': f'Error downloading master workbook: {str(e)}'}), 500
+
+@bp.route('/markdown/<batch_id>/<int:index>')
+def batch_markdown(batch_id, index):
+    """Markdown of one file of a lean (view=lean) batch"""
+    path = artifact_store.path_for(os.path.basename(batch_id) + MARKDOWN_SUFFIX)
+    if path is None:
+        return jsonify({'error': f'Markdown not found for batch: {batch_id}'}), 404
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f):
+            if line_no == index:
+                markdown = json.loads(line)
+                if markdown is None:
+                    return jsonify({'error': f'File {index} of batch {batch_id} has no markdown'}), 404
+                return Response(markdown, mimetype='text/markdown')
+    return jsonify({'error': f'No file {index} in batch {batch_id}'}), 404
+
+def store_query_from_request():
+    """(Query, concept letters or None, error) from the query string or a JSON body of /export and /projects.
+
+    from, to: ISO dates (inclusive) of certification; ids: project IDs (list or comma-separated);
+    concepts: letters or names (A, Air, ...); latest: only each project's newest certification.
+    """
+    args = request.get_json(silent=True) or request.args
+
+    def values(name):
+        value = args.get(name)
+        if value is None or value == '':
+            return None
+        items = value if isinstance(value, list) else str(value).split(',')
+        return [str(item).strip() for item in items if str(item).strip()]
+
+    dates = {}
+    for name in ('from', 'to'):
+        value = args.get(name)
+        if value:
+            try:
+                dates[name] = datetime.strptime(str(value), '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                return None, None, f"Invalid '{name}' date: {value} (use YYYY-MM-DD)"
+
+    concepts = None
+    if values('concepts'):
+        names = {name.lower(): letter for letter, name in CONCEPT_LETTER_TO_NAME.items()}
+        concepts = set()
+        for item in values('concepts'):
+            letter = item.upper() if item.upper() in CONCEPT_LETTER_TO_NAME else names.get(item.lower())
+            if letter is None:
+                return None, None, (f"Unknown concept: {item}. Choose from "
+                                    f"{', '.join(f'{k} ({v})' for k, v in CONCEPT_LETTER_TO_NAME.items())}.")
+            concepts.add(letter)
+
+    latest = str(args.get('latest', '')).lower() in ('1', 'true', 'yes')
+    return Query(dates.get('from'), dates.get('to'), values('ids'), latest), concepts, None
+
+@bp.route('/export', methods=['GET', 'POST'])
+def export_store():
+    """Build the template workbook (and exports) for stored scorecards matching a query, without PDFs"""
+    if scorecard_store is None:
+        return jsonify({'error': 'The scorecard store is disabled'}), 404
+    try:
+        query, concepts, error = store_query_from_request()
+        if error:
+            return jsonify({'error': error}), 400
+        args = request.get_json(silent=True) or request.args
+        formats = args.get('formats', 'xlsx')
+        formats = tuple(f.strip().lower() for f in (formats if isinstance(formats, list) else formats.split(','))
+                        if f.strip())
+        unknown = [f for f in formats if f not in EXPORT_FORMATS]
+        if unknown or not formats:
+            return jsonify({'error': f"Unsupported format: {', '.join(unknown) or 'none given'}. "
+                                     f"Choose from {', '.join(EXPORT_FORMATS)}."}), 400
+        if not scorecard_store.count(query):
+            return jsonify({'error': 'No stored scorecards match the query'}), 404
+
+        response_data, error = export_from_store(query, concepts, formats)
+        if error:
+            return jsonify({'error': error}), 500
+        return jsonify(response_data)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception("Export error: %s", e)
+        return jsonify({'error': f'Error exporting stored scorecards: {str(e)}'}), 500
+
+@bp.route('/projects', methods=['GET', 'POST'])
+def list_projects():
+    """Stored scorecards matching a query (same arguments as /export), without their parts"""
+    if scorecard_store is None:
+        return jsonify({'error': 'The scorecard store is disabled'}), 404
+    try:
+        query, _, error = store_query_from_request()
+        if error:
+            return jsonify({'error': error}), 400
+        limit = STORE_CONFIG['max_listed_projects']
+        return jsonify({'count': scorecard_store.count(query), 'projects': scorecard_store.projects(query, limit)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception("Store query error: %s", e)
+        return jsonify({'error': f'Error querying stored scorecards: {str(e)}'}), 500
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    """Pipeline metrics in Prometheus text format"""
+    return Response(metrics.render(), content_type=metrics.content_type)
+
+@bp.route('/clear-session', methods=['POST'])
 def clear_session():
     """Clear session (kept for compatibility but simplified)"""
     try:
@@ -559,5 +2366,73 @@ def clear_session():
     except Exception as e:
         return jsonify({'error': f'Error clearing session: {str(e)}'}), 500
 
+# ---- App factory
+# Production servers import wsgi.py (create_app() once per server, before forking its workers
+# with gunicorn's preload_app); `python app.py` runs the Flask development server.
+
+_background_started = set()
+
+def start_background_tasks():
+    """Start this process's background threads (the artifact sweeper). Safe to call again,
+    and needed again in each forked server worker since threads don't survive fork."""
+    if os.getpid() in _background_started:
+        return
+    _background_started.add(os.getpid())
+    if CLEANUP_CONFIG.get('auto_cleanup'):
+        artifact_store.start_sweeper(
+            CLEANUP_CONFIG['cleanup_interval'],
+            orphan_folders=(UPLOAD_FOLDER, PROCESSED_FOLDER),
+            orphan_max_age=CLEANUP_CONFIG['orphan_max_age'],
+            keep=upload_in_use,
+        )
+
+def warm_up():
+    """Load what the first request would otherwise pay for: the template and its compiled
+    schema, the extraction engines, openpyxl and numpy (scores.py). Done before forking, workers share it."""
+    if os.path.exists(TEMPLATE_PATH):
+        load_template_schema().vocabulary
+    else:
+        logger.warning("Template %s not found; it will be loaded on first use", TEMPLATE_PATH)
+    for backend in EXTRACTION_BACKENDS:
+        backend.load()
+    import openpyxl  # noqa: F401
+    import scores  # noqa: F401
+
+def create_app(config=None, warm=True, started=None):
+    """Build the Flask app: folders, artifact index, cache, background tasks and warm-up.
+
+    config: extra Flask config values (e.g. {'TESTING': True}).
+    started: time.perf_counter() taken before importing this module, to report import time.
+    """
+    init_started = time.perf_counter()
+    if started is not None:
+        STARTUP_SECONDS.set(init_started - started, phase='import')
+
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+    if config:
+        app.config.update(config)
+    app.register_blueprint(bp)
+
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(PROCESSED_FOLDER, exist_ok=True)
+    artifact_store.load()
+    open_scorecard_cache()
+    start_background_tasks()
+    STARTUP_SECONDS.set(time.perf_counter() - init_started, phase='init')
+
+    if warm:
+        warm_started = time.perf_counter()
+        warm_up()
+        STARTUP_SECONDS.set(time.perf_counter() - warm_started, phase='warm_up')
+
+    total = time.perf_counter() - (init_started if started is None else started)
+    logger.info("App ready in %.3fs (pid %d, %d PDF workers, extraction: %s)", total, os.getpid(),
+                process_pool_size(), ', '.join(backend.name for backend in EXTRACTION_BACKENDS))
+    if SECRET_KEY == 'your-secret-key-here' and not DEBUG:
+        logger.warning("Using the default SECRET_KEY; set PDFCONVERT_SECRET_KEY in production")
+    return app
+
 if __name__ == '__main__':
-    app.run(debug=DEBUG, host=HOST, port=PORT)
+    create_app().run(debug=DEBUG, host=HOST, port=PORT)
@@ -0,0 +1,183 @@
+"""
+Managed store for generated files (the combined Excel workbooks).
+
+Every file the app generates is registered in an in-memory index of
+name -> (size, created), seeded from the folder once at startup (load()). Downloads
+resolve names through the index instead of touching the directory, and a
+background sweeper removes files older than max_age and then the oldest ones
+until the folder fits max_bytes. The sweeper also removes orphaned temporary
+files (stale uploads, half-written outputs) from the folders it is given.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore:
+    """Index of generated files in one folder with TTL and total-size eviction."""
+
+    def __init__(self, folder, max_age=86400, max_bytes=1024 * 1024 * 1024, suffixes=('.xlsx',)):
+        self.folder = folder
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.suffixes = tuple(suffixes)
+        self._lock = threading.Lock()
+        self._files = {}
+        self._bytes = 0
+        self._sweeper = None
+        self._sweeper_pid = None
+        self._stop = threading.Event()
+
+    def load(self):
+        """Create the folder if needed and index the artifacts already in it."""
+        os.makedirs(self.folder, exist_ok=True)
+        for entry in os.scandir(self.folder):
+            if entry.is_file() and entry.name.endswith(self.suffixes):
+                stat = entry.stat()
+                with self._lock:
+                    if entry.name not in self._files:
+                        self._files[entry.name] = (stat.st_size, stat.st_mtime)
+                        self._bytes += stat.st_size
+
+    def new_path(self, prefix, suffix='.xlsx'):
+        """A path for a new artifact; the random part keeps names unique within the same second."""
+        os.makedirs(self.folder, exist_ok=True)
+        name = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}{suffix}"
+        return os.path.join(self.folder, name)
+
+    def add(self, path, created=None):
+        """Register a finished artifact, evicting old ones if the store is over quota."""
+        name = os.path.basename(path)
+        size = os.path.getsize(path)
+        with self._lock:
+            old = self._files.get(name)
+            if old:
+                self._bytes -= old[0]
+            self._files[name] = (size, created or time.time())
+            self._bytes += size
+            over_quota = self._bytes > self.max_bytes
+        if over_quota:
+            self.evict()
+
+    def path_for(self, name):
+        """Full path of a stored artifact, or None if it is unknown or gone."""
+        name = os.path.basename(name)
+        path = os.path.join(self.folder, name)
+        with self._lock:
+            known = name in self._files
+        if known:
+            if os.path.exists(path):
+                return path
+            self._forget(name)
+            return None
+        # Written by another process sharing the folder (e.g. cli.py): adopt it
+        if name.endswith(self.suffixes) and os.path.isfile(path):
+            self.add(path, os.path.getmtime(path))
+            return path
+        return None
+
+    def _forget(self, name):
+        with self._lock:
+            meta = self._files.pop(name, None)
+            if meta:
+                self._bytes -= meta[0]
+
+    def _remove(self, name):
+        self._forget(name)
+        try:
+            os.remove(os.path.join(self.folder, name))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop expired artifacts, then the oldest ones until the store fits max_bytes. Returns the count."""
+        cutoff = time.time() - self.max_age
+        with self._lock:
+            by_age = sorted(self._files.items(), key=lambda item: item[1][1])
+            total = self._bytes
+
+        removed = 0
+        for name, (size, created) in by_age:
+            if created >= cutoff and total <= self.max_bytes:
+                break
+            self._remove(name)
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {'files': len(self._files), 'bytes': self._bytes}
+
+    def start_sweeper(self, interval, orphan_folders=(), orphan_max_age=3600, keep=None):
+        """Run evict() and remove_orphans() every `interval` seconds on a daemon thread.
+
+        keep(path) protects further files from the orphan sweep, e.g. uploads still queued.
+
+        Safe to call again, e.g. in a forked server worker: threads don't survive fork,
+        so a process that didn't start the sweeper itself starts its own.
+        """
+        if self._sweeper is not None and self._sweeper_pid == os.getpid():
+            return
+
+        def keep_file(path):
+            return self._keep(path) or (keep is not None and keep(path))
+
+        def sweep():
+            while not self._stop.wait(interval):
+                try:
+                    removed = 0
+                    for folder in orphan_folders:
+                        removed += remove_orphans(folder, orphan_max_age, keep=keep_file)
+                    removed += self.evict()
+                    if removed:
+                        logger.info("Sweeper removed %d files", removed)
+                except Exception:
+                    logger.exception("Artifact sweep failed")
+
+        self._sweeper = threading.Thread(target=sweep, name='artifact-sweeper', daemon=True)
+        self._sweeper_pid = os.getpid()
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+    def _keep(self, path):
+        """Orphan filter: artifacts are never orphans; unindexed ones (other processes) get adopted."""
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.folder):
+            return False
+        if not path.endswith(self.suffixes):
+            return False
+        with self._lock:
+            known = os.path.basename(path) in self._files
+        if not known:
+            self.add(path, os.path.getmtime(path))
+        return True
+
+
+def remove_orphans(folder, max_age, keep=None):
+    """Delete files in `folder` not modified for max_age seconds (unless keep(path)). Returns the count."""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if not entry.is_file() or entry.stat().st_mtime >= cutoff:
+                continue
+            if keep is not None and keep(entry.path):
+                continue
+            os.remove(entry.path)
+            removed += 1
+        except OSError:
+            # Already gone or still in use; try again next sweep
+            continue
+    return removed
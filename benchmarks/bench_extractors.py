@@ -0,0 +1,135 @@
+"""
+Compare the PDF text-extraction backends on the same PDFs: speed and parse agreement.
+
+Every installed backend (extractors.py) extracts each PDF in the configured
+page mode, with fallback disabled, and the text is parsed with
+parse_well_markdown. Each backend is reported with its extraction time and
+how many of its parses equal the reference backend's (pypdf2 by default; files
+neither can read count as agreeing). The first differing field is listed for
+each file where they disagree.
+
+Run it on a sample of real certificates before switching a deployment's
+PROCESSING_CONFIG['extraction_backend']; without inputs a synthetic corpus is
+generated.
+
+    python benchmarks/bench_extractors.py [PDF_DIRS_OR_GLOBS ...] [--count 200]
+                                          [--reference pypdf2] [--output extractors.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from cli import find_pdfs  # noqa: E402
+from corpus import write_corpus  # noqa: E402
+from extractors import BACKENDS, available_backends  # noqa: E402
+
+
+def run_backend(backend, pdfs):
+    """Extract and parse every PDF with one backend. Returns (seconds, {path: parsed or error string})."""
+    max_pages, adaptive = 2, False
+    if app.PROCESSING_CONFIG.get("page_mode") == "adaptive":
+        max_pages, adaptive = app.PROCESSING_CONFIG.get("max_pages", 20), True
+
+    backend.load()  # engines are imported lazily; keep the import out of the timing
+    outputs = {}
+    seconds = 0.0
+    for path in pdfs:
+        start = time.perf_counter()
+        extraction, error = app.extract_markdown(path, os.path.basename(path), max_pages, adaptive, [backend])
+        seconds += time.perf_counter() - start
+        outputs[path] = error if error else app.parse_well_markdown(extraction.markdown)
+    return seconds, outputs
+
+
+def agrees(reference, other):
+    """Same parse, or both backends failed to read the file."""
+    return reference == other or (isinstance(reference, str) and isinstance(other, str))
+
+
+def first_difference(reference, other):
+    """Short description of where two parse results differ."""
+    if isinstance(reference, str) or isinstance(other, str) or reference is None or other is None:
+        return f"{reference!r:.60} vs {other!r:.60}"
+    for field in ("project_id", "project_name", "date_cert"):
+        if reference.get(field) != other.get(field):
+            return f"{field}: {reference.get(field)!r} vs {other.get(field)!r}"
+    ref_parts = {p["code"]: p["value"] for p in reference.get("parts", [])}
+    parts = {p["code"]: p["value"] for p in other.get("parts", [])}
+    for code in sorted(set(ref_parts) | set(parts)):
+        if ref_parts.get(code) != parts.get(code):
+            return f"{code}: {ref_parts.get(code)!r} vs {parts.get(code)!r}"
+    return "part order"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="*", help="directories (searched recursively) or glob patterns of PDFs")
+    parser.add_argument("--count", type=int, default=200, help="synthetic PDFs to generate when no inputs are given")
+    parser.add_argument("--reference", default="pypdf2", help="backend the others are checked against")
+    parser.add_argument("--output", default=None, help="also write the results as JSON")
+    parser.add_argument("--show", type=int, default=10, help="disagreeing files listed per backend")
+    args = parser.parse_args()
+
+    names = available_backends()
+    if args.reference not in names:
+        sys.exit(f"Reference backend '{args.reference}' is not installed (installed: {', '.join(names)})")
+
+    workdir = None
+    try:
+        if args.inputs:
+            pdfs = find_pdfs(args.inputs)
+        else:
+            workdir = tempfile.mkdtemp(prefix="pdfconvert-extractors-")
+            pdfs = write_corpus(workdir, args.count)
+        if not pdfs:
+            sys.exit("No PDF files found")
+
+        outputs = {}
+        report = {"files": len(pdfs), "page_mode": app.PROCESSING_CONFIG.get("page_mode"),
+                  "reference": args.reference, "backends": {}}
+        print(f"{len(pdfs)} PDFs, reference {args.reference}")
+        print(f"{'backend':>10} {'seconds':>9} {'ms/file':>9} {'files/s':>9} {'errors':>7} {'agree':>12} {'speedup':>8}")
+
+        # The reference runs first so every other backend can be compared (and timed) against it
+        for name in [args.reference] + [n for n in names if n != args.reference]:
+            seconds, outputs[name] = run_backend(BACKENDS[name], pdfs)
+            reference = outputs[args.reference]
+            errors = sum(1 for out in outputs[name].values() if isinstance(out, str))
+            disagree = [path for path in pdfs if not agrees(reference[path], outputs[name][path])]
+            ref_seconds = report["backends"].get(args.reference, {}).get("seconds", seconds)
+
+            report["backends"][name] = {
+                "seconds": round(seconds, 6),
+                "ms_per_file": round(seconds * 1e3 / len(pdfs), 3),
+                "errors": errors,
+                "agree": len(pdfs) - len(disagree),
+                "disagree": {os.path.basename(path): first_difference(reference[path], outputs[name][path])
+                             for path in disagree},
+            }
+            agree = f"{len(pdfs) - len(disagree)}/{len(pdfs)}"
+            print(f"{name:>10} {seconds:>9.3f} {seconds * 1e3 / len(pdfs):>9.2f} {len(pdfs) / seconds:>9.1f} "
+                  f"{errors:>7} {agree:>12} {ref_seconds / seconds:>7.1f}x")
+
+        for name, result in report["backends"].items():
+            for filename, difference in list(result["disagree"].items())[:args.show]:
+                print(f"  {name} differs on {filename}: {difference}")
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Wrote {args.output}")
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Micro-benchmark: parse_well_markdown against the previous double-scan parser.
+
+The previous implementation is frozen below as legacy_parse_well_markdown. Both
+parsers run on the same synthetic markdown at several input sizes; outputs are
+checked for equality before any timing is reported.
+
+    python benchmarks/bench_parser.py [--rows 100,1000,10000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import parse_well_markdown  # noqa: E402
+from corpus import scorecard_markdown  # noqa: E402
+
+
+def legacy_parse_well_markdown(markdown_content):
+    """parse_well_markdown as it was before the single-pass engine (reference only)."""
+    try:
+        def norm(s: str) -> str:
+            s2 = s.replace("β", "")
+            s2 = re.sub(r"(\b[AWNLVTSXMCI]\d{2})\.\s+(\d)\b", r"\1.\2", s2)      # A01. 1 -> A01.1
+            s2 = re.sub(r"(\d)\s*\.\s*(\d)", r"\1.\2", s2)                        # 0. 5 -> 0.5
+            s2 = re.sub(r'[ \t]+', ' ', s2)
+            return s2
+
+        text = norm(markdown_content)
+        text = text.replace("Pending Documentation & On-Site", "Pending Documentation")
+        text = text.replace("Pending Documentation & On Site", "Pending Documentation")
+        text = re.sub(r'[ \t]+', ' ', text)
+
+        m = re.search(r"\b(\d{9,12})\b\s*-\s*([^-()]+?)(?=\s*\(WELL|\s*Date:|\s*WELL|\s*$)", text)
+        if m:
+            project_id = m.group(1)
+            project_name = m.group(2).strip()
+        else:
+            mid = re.search(r"\b(\d{9,12})\b\s*-\s*", text)
+            project_id = mid.group(1) if mid else "Unknown"
+            pname = re.search(r"\b\d{9,12}\b\s*-\s*(.*?)(?:\s*Date:|\s*WELL|\s*\(|$)", text)
+            project_name = pname.group(1).strip() if pname else "Unknown Project"
+
+        m_date = re.search(r"Date:\s*(\d{1,2}\s+[A-Za-z]{3},\s*\d{4})", text)
+        date_cert = "Unknown"
+        if m_date:
+            try:
+                date_cert = datetime.strptime(m_date.group(1).replace(",", ""), "%d %b %Y").strftime("%d/%m/%Y")
+            except Exception:
+                pass
+
+        ROW_RE = re.compile(
+            r"""^(?P<code>[A-Z][0-9]{2}\.\d)\s+
+                (?P<title>.+?)\s+
+                (?P<pts>(?:\d+(?:\.\d+)?(?:\+\d+(?:\.\d+)?)*)|No)\s+
+                (?P<status>Achieved|Not\s+Attempted|Pending\s+Documentation|Not\s+Applicable)
+                (?:\s+(?P<ach>(?:\d+(?:\.\d+)?(?:\+\d+(?:\.\d+)?)*)))?$""",
+            re.VERBOSE | re.MULTILINE
+        )
+
+        def _sum_token(token):
+            if token is None:
+                return None
+            token = token.strip()
+            if token.lower() == 'no':
+                return None
+            try:
+                return sum(float(p) for p in token.split('+'))
+            except ValueError:
+                return None
+
+        def score_cell_from_line(line):
+            m = ROW_RE.match(line.strip())
+            if not m:
+                return None
+            status = m.group('status').replace('\xa0', ' ').strip()
+            attempted_val = _sum_token(m.group('pts'))
+            achieved_val = _sum_token(m.group('ach'))
+            if status == 'Pending Documentation':
+                return 'Pending Documentation'
+            if status == 'Not Applicable':
+                return 'Not Applicable'
+            if status == 'Not Attempted':
+                return None
+            if status == 'Achieved':
+                if achieved_val is not None:
+                    return achieved_val
+                if attempted_val is not None:
+                    return attempted_val
+                return 'p'
+            return None
+
+        parts = []
+        for m in ROW_RE.finditer(text):
+            value = score_cell_from_line(m.group(0))
+            if value is not None:
+                parts.append({"code": m.group('code'), "value": value})
+
+        found_codes = {p["code"] for p in parts}
+
+        PART_RE = re.compile(
+            r"(?P<code>[AWNLVTSXMCI]\d{2}\.\d)\s+"
+            r"(?P<title>.+?)\s+"
+            r"(?:(?P<pre>\d+(?:\.\d+)?)\s+)?"
+            r"(?P<status>Achieved|Not Attempted|Not Applicable|Withdrawn|"
+            r"Pending(?: Documentation)?|Pending Documentation)"
+            r"(?:\s+(?P<post>\d+(?:\.\d+)?))?",
+            flags=re.IGNORECASE | re.DOTALL | re.MULTILINE
+        )
+
+        for m_old in PART_RE.finditer(text):
+            code = m_old.group("code")
+            if code in found_codes:
+                continue
+            status = (m_old.group("status") or "").strip().title()
+            post = m_old.group("post")
+            if status in ("Pending", "Pending Documentation"):
+                value = "Pending Documentation"
+            elif status == "Not Applicable":
+                value = "Not Applicable"
+            elif status == "Withdrawn":
+                value = "Withdrawn"
+            elif status == "Achieved":
+                value = float(post) if post is not None else "p"
+            else:
+                value = None
+            if value is not None:
+                parts.append({"code": code, "value": value})
+
+        return {"project_id": project_id, "project_name": project_name, "date_cert": date_cert, "parts": parts}
+
+    except Exception as e:
+        print(f"Error parsing WELL markdown: {e}")
+        return None
+
+
+def make_input(rows, seed=0):
+    """One markdown document with roughly `rows` score rows (several scorecards back to back)."""
+    rng = random.Random(seed)
+    chunks = []
+    index = 0
+    while sum(c.count("\n") for c in chunks) < rows:
+        chunks.append(scorecard_markdown(rng, index))
+        index += 1
+    return "".join(chunks)
+
+
+def best_time(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="100,1000,10000", help="comma-separated input sizes in score rows")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per size; the best time is reported")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'KiB':>8} {'legacy ms':>10} {'engine ms':>10} {'legacy MB/s':>12} {'engine MB/s':>12} {'speedup':>8}")
+    for rows in (int(r) for r in args.rows.split(",")):
+        text = make_input(rows)
+        if legacy_parse_well_markdown(text) != parse_well_markdown(text):
+            sys.exit(f"Output mismatch at {rows} rows")
+
+        size_mb = len(text.encode("utf-8")) / 1e6
+        legacy = best_time(legacy_parse_well_markdown, text, args.repeat)
+        engine = best_time(parse_well_markdown, text, args.repeat)
+        print(f"{rows:>8} {size_mb * 1e3 / 1.024:>8.0f} {legacy * 1e3:>10.2f} {engine * 1e3:>10.2f} "
+              f"{size_mb / legacy:>12.1f} {size_mb / engine:>12.1f} {legacy / engine:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Pipeline benchmark on a synthetic WELL scorecard PDF corpus.
+
+For each batch size, times every stage separately
+(extract_first_two_pages, convert_to_markdown, extract_markdown_from_file,
+parse_well_markdown, create_combined_excel) and the end-to-end /upload
+route through the Flask test client, then writes machine-readable JSON so
+runs on different commits can be compared.
+
+    python benchmarks/bench_pipeline.py [--sizes 1,10,100,1000] [--output bench_results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+from artifacts import ArtifactStore  # noqa: E402
+from store import ScorecardStore  # noqa: E402
+from corpus import write_corpus, write_template  # noqa: E402
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def stage_stats(seconds, files, nbytes):
+    return {
+        "seconds": round(seconds, 6),
+        "ms_per_file": round(seconds * 1e3 / files, 3) if files else None,
+        "files_per_second": round(files / seconds, 2) if seconds else None,
+        "mb_per_second": round(nbytes / 1e6 / seconds, 3) if seconds else None,
+    }
+
+
+def timed(fn, items):
+    start = time.perf_counter()
+    out = [fn(item) for item in items]
+    return time.perf_counter() - start, out
+
+
+def bench_batch(pdfs, client):
+    """Time each stage and the /upload route (through a Flask test client) for one batch of PDF paths."""
+    nbytes = sum(os.path.getsize(p) for p in pdfs)
+    stages = {}
+
+    seconds, extracted = timed(app.extract_first_two_pages, pdfs)
+    stages["extract_first_two_pages"] = stage_stats(seconds, len(pdfs), nbytes)
+    errors = [err for _, err in extracted if err]
+    if errors:
+        raise RuntimeError(f"extract_first_two_pages failed: {errors[0]}")
+
+    seconds, converted = timed(app.convert_to_markdown, [path for path, _ in extracted])
+    stages["convert_to_markdown"] = stage_stats(seconds, len(pdfs), nbytes)
+    for path, _ in extracted:
+        os.remove(path)
+
+    seconds, _ = timed(lambda p: app.extract_markdown_from_file(p, os.path.basename(p)), pdfs)
+    stages["extract_markdown_from_file"] = stage_stats(seconds, len(pdfs), nbytes)
+
+    markdowns = [md for md, _ in converted]
+    seconds, parsed = timed(app.parse_well_markdown, markdowns)
+    stages["parse_well_markdown"] = stage_stats(seconds, len(pdfs), sum(len(md) for md in markdowns))
+
+    results = [{"status": "success", "markdown": md, "parsed": p} for md, p in zip(markdowns, parsed)]
+    start = time.perf_counter()
+    excel_path, error = app.create_combined_excel(results)
+    stages["create_combined_excel"] = stage_stats(time.perf_counter() - start, len(pdfs), nbytes)
+    if error:
+        raise RuntimeError(error)
+    os.remove(excel_path)
+
+    handles = [open(p, "rb") for p in pdfs]
+    try:
+        data = {"files": [(h, os.path.basename(p)) for h, p in zip(handles, pdfs)]}
+        start = time.perf_counter()
+        response = client.post("/upload", data=data, content_type="multipart/form-data")
+        seconds = time.perf_counter() - start
+    finally:
+        for h in handles:
+            h.close()
+    if response.status_code != 200:
+        raise RuntimeError(f"/upload returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    stages["upload_end_to_end"] = stage_stats(seconds, len(pdfs), nbytes)
+    os.remove(os.path.join(app.PROCESSED_FOLDER, response.get_json()["excel_filename"]))
+
+    return {"batch_size": len(pdfs), "input_bytes": nbytes, "stages": stages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,100,1000", help="comma-separated batch sizes")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="override PROCESSING_CONFIG['max_workers'] for the /upload run")
+    parser.add_argument("--keep-cache", action="store_true",
+                        help="leave the scorecard cache on (by default every file is really parsed)")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    workdir = tempfile.mkdtemp(prefix="pdfconvert-bench-")
+    try:
+        # Keep benchmark artifacts out of the real folders
+        app.UPLOAD_FOLDER = os.path.join(workdir, "uploads")
+        app.PROCESSED_FOLDER = os.path.join(workdir, "processed")
+        os.makedirs(app.UPLOAD_FOLDER)
+        os.makedirs(app.PROCESSED_FOLDER)
+        app.artifact_store = ArtifactStore(app.PROCESSED_FOLDER)
+        if app.scorecard_store is not None:
+            app.scorecard_store = ScorecardStore(os.path.join(workdir, "scorecards.db"))
+        if args.workers is not None:
+            app.PROCESSING_CONFIG["max_workers"] = args.workers
+        if not os.path.exists(app.TEMPLATE_PATH):
+            app.TEMPLATE_PATH = os.path.join(workdir, "template1.xlsx")
+            write_template(app.TEMPLATE_PATH)
+        client = app.create_app({"TESTING": True}).test_client()
+        if not args.keep_cache:
+            app.scorecard_cache = None
+
+        corpus_dir = os.path.join(workdir, "corpus")
+        os.makedirs(corpus_dir)
+        pdfs = write_corpus(corpus_dir, max(sizes))
+
+        runs = []
+        for size in sizes:
+            run = bench_batch(pdfs[:size], client)
+            runs.append(run)
+            summary = ", ".join(f"{name} {s['ms_per_file']}ms" for name, s in run["stages"].items())
+            print(f"batch {size}: {summary}")
+
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "git_commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "max_workers": app.PROCESSING_CONFIG.get("max_workers"),
+                # Every extraction stage (convert_to_markdown included) times this engine first
+                "extraction_backend": app.EXTRACTION_BACKENDS[0].name,
+                "extraction_chain": [backend.name for backend in app.EXTRACTION_BACKENDS],
+                "page_mode": app.PROCESSING_CONFIG.get("page_mode", "fixed"),
+                "template": "template1.xlsx" if app.TEMPLATE_PATH.startswith(ROOT) else "synthetic",
+            },
+            "runs": runs,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Synthetic WELL scorecard content for the benchmarks.
+
+Generates scorecards shaped like the real certificates, as markdown text or
+as small PDFs: a '<project id> - <name> (WELL v2)' line, a 'Date:' header and
+score rows across all concepts with mixed statuses and '0.5+1' style point
+tokens. write_template() provides a stand-in for template1.xlsx.
+"""
+
+import random
+
+CONCEPTS = ["A", "W", "N", "L", "V", "T", "S", "X", "M", "C", "I"]
+
+TITLES = [
+    "Air Quality", "Smoke-Free Environment", "Ventilation Design", "Construction Pollution Management",
+    "Fundamental Water Quality", "Hydration Promotion", "Fruits and Vegetables", "Nutritional Transparency",
+    "Light Exposure", "Visual Lighting Design", "Active Buildings", "Ergonomic Workstation Design",
+    "Thermal Performance", "Sound Mapping", "Material Restrictions", "Mental Health Promotion",
+    "Health and Wellness Awareness", "Emergency Preparedness", "Innovate WELL", "WELL Accredited Professional",
+]
+
+POINT_TOKENS = ["1", "2", "3", "0.5", "0.5+1", "1+1", "1+2", "No"]
+
+STATUSES = ["Achieved", "Achieved", "Achieved", "Not Attempted", "Pending Documentation", "Not Applicable"]
+
+
+def part_codes(features_per_concept=8, parts_per_feature=2):
+    return [f"{letter}{feature:02d}.{part}"
+            for letter in CONCEPTS
+            for feature in range(1, features_per_concept + 1)
+            for part in range(1, parts_per_feature + 1)]
+
+
+def scorecard_lines(rng, project_id, features_per_concept=8):
+    """Text lines of one scorecard, in the order they appear on the certificate."""
+    lines = [
+        f"{project_id} - Synthetic Project {project_id[-4:]} (WELL v2)",
+        f"Date: {rng.randint(1, 28):02d} {rng.choice(['Jan', 'Mar', 'Jun', 'Sep', 'Dec'])}, {rng.randint(2019, 2025)}",
+    ]
+    for code in part_codes(features_per_concept):
+        status = rng.choice(STATUSES)
+        points = rng.choice(POINT_TOKENS)
+        achieved = ""
+        if status == "Achieved" and rng.random() < 0.4:
+            achieved = " " + rng.choice(["0", "0.5", "1", "1+1"])
+        lines.append(f"{code} {rng.choice(TITLES)} {points} {status}{achieved}")
+    return lines
+
+
+def project_id(index):
+    return f"0220{index:08d}"
+
+
+def scorecard_markdown(rng, index, features_per_concept=8):
+    """Markdown as convert_to_markdown would produce it for one scorecard."""
+    lines = scorecard_lines(rng, project_id(index), features_per_concept)
+    return f"# PDF Document: scorecard_{index}.pdf\n\n## Page 1\n\n" + "\n".join(lines) + "\n"
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def scorecard_pdf_bytes(lines, lines_per_page=50):
+    """A minimal text PDF (Helvetica, one text line per scorecard line) that PyPDF2 can read."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(None)  # filled in once the page ids are known
+
+    page_ids = []
+    for page_lines in pages:
+        ops = " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page_lines)
+        stream = f"BT /F1 8 Tf 11 TL 36 806 Td {ops} ET".encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_at)
+    return bytes(out)
+
+
+def write_corpus(folder, count, seed=0, features_per_concept=4):
+    """Write `count` synthetic scorecard PDFs into folder and return their paths."""
+    rng = random.Random(seed)
+    paths = []
+    for index in range(count):
+        path = f"{folder}/scorecard_{index:05d}.pdf"
+        with open(path, "wb") as f:
+            f.write(scorecard_pdf_bytes(scorecard_lines(rng, project_id(index), features_per_concept)))
+        paths.append(path)
+    return paths
+
+
+CONCEPT_NAMES = {
+    "A": "Air", "W": "Water", "N": "Nourishment", "L": "Light", "V": "Movement", "T": "Thermal Comfort",
+    "S": "Sound", "X": "Materials", "M": "Mind", "C": "Community", "I": "Innovation",
+}
+
+
+def write_template(path, features_per_concept=8):
+    """A stand-in for template1.xlsx with the same 3-row merged header layout."""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    col = 1
+    for field in ["Project Name", "Project ID", "Date Certified", "Total Points"]:
+        ws.cell(1, col, field)
+        ws.merge_cells(start_row=1, start_column=col, end_row=3, end_column=col)
+        col += 1
+    for letter in CONCEPTS:
+        start = col
+        for code in part_codes(features_per_concept):
+            if code[0] == letter:
+                ws.cell(3, col, f"{code} Feature")
+                col += 1
+        ws.cell(3, col, "Sub-Points")
+        ws.cell(3, col + 1, "%")
+        ws.cell(1, start, letter)
+        ws.cell(2, start, CONCEPT_NAMES[letter])
+        ws.merge_cells(start_row=1, start_column=start, end_row=1, end_column=col + 1)
+        ws.merge_cells(start_row=2, start_column=start, end_row=2, end_column=col + 1)
+        col += 2
+    wb.save(path)
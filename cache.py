@@ -0,0 +1,206 @@
+"""
+Content-addressed cache of parsed scorecards.
+
+Entries are keyed by the SHA-256 of the uploaded PDF plus the parser version,
+so re-uploading the same certificate skips extraction and parsing entirely.
+Two tiers:
+
+- memory: a small LRU of the most recently used entries
+- disk:   one JSON file per entry, evicted oldest-first once the folder grows
+          past max_disk_bytes, and ignored/removed once older than max_age
+
+The disk tier is shared by every process using the folder (gunicorn workers,
+cli.py): an entry one of them wrote is found by the others, and eviction
+works from a scan of the folder, so max_disk_bytes bounds the folder as a whole.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds between eviction scans of the disk folder
+EVICT_INTERVAL = 30.0
+
+# Eviction frees space down to this fraction of max_disk_bytes, so a full folder isn't rescanned on every write
+EVICT_TARGET = 0.9
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU mapping."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ScorecardCache:
+    """Memory + disk cache of {'markdown': ..., 'parsed': ...} entries."""
+
+    def __init__(self, folder, version, memory_entries=256, max_disk_bytes=200 * 1024 * 1024,
+                 max_age=30 * 86400):
+        self.folder = folder
+        self.version = str(version)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        self.memory = LRUCache(memory_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(folder, exist_ok=True)
+        # name -> (size, mtime) of the entries on disk as of the last scan, plus those found or
+        # written since; other processes add and evict entries too, so it is only a hint
+        self._disk = {}
+        self._disk_bytes = 0
+        self._scanned_at = 0.0
+        self._evict(force=True)
+
+    def _filename(self, digest):
+        return f"{digest}-v{self.version}.json"
+
+    def get(self, digest):
+        """Return the cached entry for a content digest, or None."""
+        entry = self.memory.get(digest)
+        if entry is None:
+            entry = self._read_disk(digest)
+            if entry is not None:
+                self.memory.put(digest, entry)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, digest, entry):
+        self.memory.put(digest, entry)
+        self._write_disk(digest, entry)
+
+    def _read_disk(self, digest):
+        name = self._filename(digest)
+        with self._lock:
+            meta = self._disk.get(name)
+        if meta is None:
+            # Possibly written by another process since the last scan
+            try:
+                stat = os.stat(os.path.join(self.folder, name))
+            except OSError:
+                return None
+            meta = (stat.st_size, stat.st_mtime)
+            self._index(name, meta)
+        if time.time() - meta[1] > self.max_age:
+            self._remove(name)
+            return None
+        try:
+            with open(os.path.join(self.folder, name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Missing or half-written entry: drop it and treat as a miss
+            self._remove(name)
+            return None
+
+    def _write_disk(self, digest, entry):
+        name = self._filename(digest)
+        path = os.path.join(self.folder, name)
+        # Per process and thread: several processes may write the same entry at once
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self._index(name, (size, time.time()))
+        self._evict()
+
+    def _index(self, name, meta):
+        with self._lock:
+            old = self._disk.get(name)
+            if old:
+                self._disk_bytes -= old[0]
+            self._disk[name] = meta
+            self._disk_bytes += meta[0]
+
+    def _remove(self, name):
+        with self._lock:
+            meta = self._disk.pop(name, None)
+            if meta:
+                self._disk_bytes -= meta[0]
+        try:
+            os.remove(os.path.join(self.folder, name))
+        except OSError:
+            pass
+
+    def _scan(self):
+        """Re-index the folder as it is on disk (entries from every process)."""
+        disk = {}
+        for entry in os.scandir(self.folder):
+            if entry.is_file() and entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # evicted meanwhile
+                disk[entry.name] = (stat.st_size, stat.st_mtime)
+        with self._lock:
+            self._disk = disk
+            self._disk_bytes = sum(size for size, _ in disk.values())
+        return disk
+
+    def _evict(self, force=False):
+        """Drop expired entries, then the oldest ones until the folder fits max_disk_bytes.
+
+        Works from a scan of the folder, at most every EVICT_INTERVAL seconds unless forced.
+        """
+        now = time.time()
+        with self._lock:
+            # Between scans, only this process's own writes can tip the folder over quota
+            if not force and now - self._scanned_at < EVICT_INTERVAL and self._disk_bytes <= self.max_disk_bytes:
+                return
+            self._scanned_at = now
+        disk = self._scan()
+
+        cutoff = now - self.max_age
+        total = sum(size for size, _ in disk.values())
+        if total <= self.max_disk_bytes and not any(mtime < cutoff for _, mtime in disk.values()):
+            return
+        target = self.max_disk_bytes * EVICT_TARGET
+        for name, (size, mtime) in sorted(disk.items(), key=lambda item: item[1][1]):
+            if mtime >= cutoff and total <= target:
+                break
+            self._remove(name)
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_entries': len(self.memory),
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+            }
@@ -0,0 +1,214 @@
+"""
+Headless batch converter: WELL scorecard PDFs -> one combined Excel workbook.
+
+Runs the same extraction, parsing and workbook code as the web app, without
+the Flask server. Files are processed in parallel and their rows streamed into
+the workbook in input order, so archives of any size use constant memory.
+
+    python cli.py ARCHIVE_DIR [MORE_DIRS_OR_GLOBS ...] [--jobs N] [--output combined.xlsx]
+                  [--errors errors.csv] [--state convert_state.jsonl] [--resume]
+
+Every processed file is appended to the --state file as it finishes. With
+--resume, files whose path, size and modification time match a successful
+entry are not processed again; their saved rows are still written to the new
+workbook. Files that failed last time are retried. A file that runs past
+PROCESSING_CONFIG['file_timeout'] or its worker's memory ceiling is recorded as
+an error and the run continues.
+
+Parsed scorecards are also saved to the scorecard store (STORE_CONFIG), so
+the web app's /export can rebuild workbooks for any subset of them; pass
+--no-store to skip that.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+
+import app
+from store import StoreWriter
+
+logger = logging.getLogger('cli')
+
+
+def find_pdfs(inputs):
+    """Expand directories (recursively) and glob patterns into a sorted, de-duplicated list of PDF paths."""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for dirpath, _, filenames in os.walk(item):
+                paths.update(os.path.join(dirpath, name) for name in filenames
+                             if name.lower().endswith('.pdf'))
+        else:
+            paths.update(p for p in glob.glob(item, recursive=True)
+                         if os.path.isfile(p) and p.lower().endswith('.pdf'))
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+def file_key(path):
+    stat = os.stat(path)
+    return {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def unchanged(entry, key):
+    """Whether a previous run's entry is for the file as it is now (same size and mtime)."""
+    return bool(entry) and entry['size'] == key['size'] and entry['mtime'] == key['mtime']
+
+
+def count_reusable(pdfs, previous):
+    """How many of `pdfs` iter_results will take from `previous` instead of converting."""
+    count = 0
+    for path in pdfs:
+        if path not in previous:
+            continue
+        try:
+            count += unchanged(previous[path], file_key(path))
+        except OSError:
+            continue
+    return count
+
+
+def load_state(state_path):
+    """Return {path: entry} for the successful entries of a previous run."""
+    done = {}
+    if not os.path.exists(state_path):
+        return done
+    with open(state_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A run killed mid-write leaves a partial last line
+                continue
+            if entry.get('status') == 'success':
+                done[entry['path']] = entry
+            else:
+                done.pop(entry.get('path'), None)
+    return done
+
+
+def convert_file(path, size):
+    """Pool worker: extract and parse one PDF without touching the file itself."""
+    result = app.extract_and_parse(path, os.path.basename(path), size)
+    result.pop('markdown', None)
+    result.pop('timings', None)
+    result.pop('extraction', None)
+    return result
+
+
+def iter_results(pdfs, previous, jobs, state_file):
+    """Yield one result per PDF, in input order, processing at most a few files per worker ahead.
+
+    Previously converted files come straight from `previous`; everything else is
+    converted on the pool and appended to state_file as soon as it is collected.
+    """
+    window = max(1, jobs) * 4
+    pending = deque()
+
+    def collect(item):
+        key, future = item
+        if future is None:
+            return previous[key['path']]['result']
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {'filename': os.path.basename(key['path']), 'status': 'error',
+                      'message': f'Unexpected error: {str(e)}'}
+        state_file.write(json.dumps(dict(key, status=result['status'], result=result)) + '\n')
+        state_file.flush()
+        return result
+
+    # Supervised workers: a PDF that hangs or exhausts memory fails alone (PROCESSING_CONFIG budgets)
+    with app.new_worker_pool(jobs) as executor:
+        for path in pdfs:
+            try:
+                key = file_key(path)
+            except OSError as e:
+                yield {'filename': os.path.basename(path), 'status': 'error',
+                       'message': f'Cannot read file: {str(e)}'}
+                continue
+
+            if unchanged(previous.get(path), key):
+                pending.append((key, None))
+            else:
+                pending.append((key, executor.submit(convert_file, path, key['size'])))
+
+            while len(pending) > window or (pending and pending[0][1] is None):
+                yield collect(pending.popleft())
+
+        while pending:
+            yield collect(pending.popleft())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='directories (searched recursively) or glob patterns of PDFs')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='parallel worker processes (default: CPU count)')
+    parser.add_argument('--output', '-o', default=None,
+                        help='workbook to write (default: a new file in PROCESSED_FOLDER)')
+    parser.add_argument('--errors', default='convert_errors.csv', help='per-file error report (CSV)')
+    parser.add_argument('--state', default='convert_state.jsonl', help='progress file used by --resume')
+    parser.add_argument('--resume', action='store_true',
+                        help='skip files converted successfully by a previous run with the same --state')
+    parser.add_argument('--no-store', action='store_true',
+                        help="don't save the parsed scorecards to the scorecard store")
+    args = parser.parse_args(argv)
+
+    pdfs = find_pdfs(args.inputs)
+    if not pdfs:
+        logger.error("No PDF files found in %s", ', '.join(args.inputs))
+        return 2
+
+    previous = load_state(args.state) if args.resume else {}
+    skipped = count_reusable(pdfs, previous)
+    logger.info("Converting %d PDFs with %d jobs (%d from previous run)", len(pdfs), args.jobs, skipped)
+
+    counts = {'success': 0, 'error': 0}
+    start = time.perf_counter()
+    stored = None
+    if app.scorecard_store is not None and not args.no_store:
+        stored = StoreWriter(app.scorecard_store, app.EXCEL_CONFIG.get('score_chunk_rows', 256))
+
+    with open(args.state, 'a' if args.resume else 'w', encoding='utf-8') as state_file, \
+            open(args.errors, 'w', newline='', encoding='utf-8') as errors_file:
+        errors = csv.writer(errors_file)
+        errors.writerow(['filename', 'message'])
+
+        def tracked(results):
+            for i, result in enumerate(results, 1):
+                status = 'success' if result.get('status') == 'success' else 'error'
+                counts[status] += 1
+                if status == 'error':
+                    errors.writerow([result.get('filename', ''), result.get('message', '')])
+                elif stored is not None and result.get('parsed'):
+                    stored.add(result['parsed'], result.get('filename'))
+                if i % 100 == 0 or i == len(pdfs):
+                    logger.info("%d/%d files (%d errors)", i, len(pdfs), counts['error'])
+                yield result
+
+        excel_path, error = app.create_streaming_excel(
+            tracked(iter_results(pdfs, previous, args.jobs, state_file)), args.output)
+        if stored is not None:
+            stored.flush()
+
+    elapsed = time.perf_counter() - start
+    logger.info("Done in %.1fs: %d succeeded, %d failed", elapsed, counts['success'], counts['error'])
+    if counts['error']:
+        logger.info("Error report: %s", args.errors)
+    if stored is not None:
+        logger.info("Stored %d scorecards in %s", stored.stored, app.scorecard_store.path)
+    if error:
+        logger.error(error)
+        return 1
+    logger.info("Workbook: %s", excel_path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,112 @@
 # Configuration file for PDF to Markdown Converter
+#
+# Deployment settings can be overridden with PDFCONVERT_* environment variables, or in a
+# .env file next to this file (read when python-dotenv is installed). Real environment
+# variables win over .env entries.
 
 import os
 
+try:
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
+except ImportError:
+    pass
+
+
+def _env(name, default):
+    return os.environ.get(f'PDFCONVERT_{name}', default)
+
+
+def _env_int(name, default):
+    value = _env(name, '').strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"PDFCONVERT_{name} must be a whole number, got {value!r}") from None
+
+
+def _env_bool(name, default):
+    value = _env(name, '').strip().lower()
+    if not value:
+        return default
+    if value in ('1', 'true', 'yes', 'on'):
+        return True
+    if value in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f"PDFCONVERT_{name} must be one of 1/true/yes/on or 0/false/no/off, got {value!r}")
+
+
 # Flask Configuration
-SECRET_KEY = 'your-secret-key-here'  # Change this in production!
-DEBUG = True
-HOST = '0.0.0.0'
-PORT = 5000
+SECRET_KEY = _env('SECRET_KEY', 'your-secret-key-here')  # Change this in production!
+DEBUG = _env_bool('DEBUG', False)  # Debug server with reloader; only for development
+HOST = _env('HOST', '0.0.0.0')
+PORT = _env_int('PORT', 5000)
+LOG_LEVEL = _env('LOG_LEVEL', 'INFO')  # DEBUG, INFO, WARNING or ERROR
 
 # File Upload Configuration
-UPLOAD_FOLDER = 'uploads'
-PROCESSED_FOLDER = 'processed'
+UPLOAD_FOLDER = _env('UPLOAD_FOLDER', 'uploads')
+PROCESSED_FOLDER = _env('PROCESSED_FOLDER', 'processed')
 ALLOWED_EXTENSIONS = {'pdf'}
-MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB max file size
+MAX_CONTENT_LENGTH = _env_int('MAX_CONTENT_MB', 100) * 1024 * 1024  # 100MB max file size
+
+# Processing Configuration
+PROCESSING_CONFIG = {
+    'max_workers': _env_int('MAX_WORKERS', None),  # Worker processes for PDF parsing (None = one per CPU core, 1 = in-process)
+    'single_pass_extraction': True,  # Read page text straight from the upload, no intermediate PDF
+    'page_mode': 'adaptive',  # Single-pass only: 'adaptive' reads pages until the score table ends, 'fixed' reads pages 1-2
+    'max_pages': 20,          # Upper bound on pages read per scorecard in adaptive mode
+    'in_flight_per_worker': 2,  # Files queued ahead per worker; bounds memory for large batches
+    'extraction_backend': _env('EXTRACTION_BACKEND', 'pypdf2'),  # 'pypdf2', or opt in to 'pymupdf' (pip install pymupdf) / 'auto' (fastest installed)
+    'extraction_fallback': True,   # Retry a PDF with the other installed backends if one fails or finds no text
+    'isolate_files': True,         # Parse PDFs in supervised worker processes even with max_workers=1
+    'file_timeout': _env_int('FILE_TIMEOUT', 120),         # Seconds one PDF may take before its worker is killed (None = no limit)
+    'worker_memory_mb': _env_int('WORKER_MEMORY_MB', 1024), # Address-space ceiling of each worker process (POSIX only, None = no limit)
+    'worker_max_files': 500,       # Workers are replaced after this many files, bounding leaks (None = never)
+}
+
+# Background Job Configuration (/upload?mode=async)
+JOB_CONFIG = {
+    'max_concurrent_jobs': 2,  # Batches processed at the same time; the rest wait in line
+    'job_ttl': 3600,           # Forget finished jobs after 1 hour
+    'folder': _env('JOB_FOLDER', 'jobs'),  # Job state shared by all server processes (any of them can answer /jobs)
+}
+
+# Resumable Upload Configuration (POST /uploads, then PUT each file in chunks; any server process takes any chunk)
+UPLOAD_SESSION_CONFIG = {
+    'folder': _env('UPLOAD_SESSION_FOLDER', os.path.join(UPLOAD_FOLDER, 'sessions')),
+    'chunk_size': _env_int('CHUNK_MB', 8) * 1024 * 1024,  # Chunk size suggested to clients; keep it under MAX_CONTENT_LENGTH
+    'max_files': 5000,                        # Files per session
+    'max_file_bytes': MAX_CONTENT_LENGTH,     # Same per-file ceiling as /upload
+    'max_session_bytes': _env_int('MAX_SESSION_MB', 2048) * 1024 * 1024,  # Declared bytes per session
+    'idle_timeout': 600,  # A session whose batch gets no data for 10 minutes is closed and its job fails
+}
+
+# Admission Control Configuration (per server process; None = no limit)
+ADMISSION_CONFIG = {
+    'max_in_flight_files': _env_int('MAX_IN_FLIGHT_FILES', 500),  # Files processed at once across all batches
+    'max_in_flight_bytes': _env_int('MAX_IN_FLIGHT_MB', 300) * 1024 * 1024,  # Upload bytes processed at once
+    'max_queue': 8,         # Batches waiting for capacity; beyond this /upload answers 503 with Retry-After
+    'max_wait': 60,         # Seconds a synchronous or streamed upload may wait before a 503 (async jobs wait in line)
+    'max_retry_after': 300, # Upper bound of the Retry-After estimate
+}
+
+# Parsed Scorecard Cache Configuration (keyed by SHA-256 of the uploaded PDF)
+CACHE_CONFIG = {
+    'enabled': True,
+    'folder': _env('CACHE_FOLDER', 'cache'),
+    'memory_entries': 256,                 # Most recently used scorecards kept in memory
+    'max_disk_bytes': 200 * 1024 * 1024,   # Oldest entries are evicted beyond 200MB on disk
+    'max_age': 30 * 86400,                 # Entries expire after 30 days
+}
+
+# Response Compression Configuration (gzip/deflate for JSON, NDJSON and markdown responses)
+COMPRESSION_CONFIG = {
+    'enabled': True,
+    'min_size': 1024,  # Bodies smaller than this are sent as-is
+    'level': 6,        # zlib level, 1 (fastest) to 9 (smallest)
+}
 
 # MinerU Configuration
 MINERU_CONFIG = {
@@ -26,6 +120,20 @@ EXCEL_CONFIG = {
     'sheet_name': 'PDF_Results',
     'max_column_width': 100,  # Maximum column width in characters
     'auto_adjust_columns': True,
+    'streaming_min_rows': 500,  # Batches with this many projects use the write-only (streaming) writer; None disables it
+    'score_chunk_rows': 256,    # Projects scored together (Sub-Points, totals, %) in one vectorized pass
+}
+
+# Master Workbook Configuration (/upload?master=1 upserts rows by Project ID)
+MASTER_CONFIG = {
+    'path': _env('MASTER_PATH', os.path.join('master', 'well_certification_master.xlsx')),  # Row index is kept alongside as .index.json
+}
+
+# Scorecard Store Configuration (every parsed scorecard is kept for /export and /projects)
+STORE_CONFIG = {
+    'enabled': True,
+    'path': _env('STORE_PATH', os.path.join('store', 'scorecards.db')),  # SQLite database, shared by all server processes
+    'max_listed_projects': 1000,  # Upper bound of the rows /projects returns per request
 }
 
 # Session Configuration
@@ -39,4 +147,6 @@ CLEANUP_CONFIG = {
     'auto_cleanup': True,
     'cleanup_interval': 3600,  # Clean up old files every hour
     'max_file_age': 86400,     # Keep files for 24 hours max
+    'max_total_bytes': 1024 * 1024 * 1024,  # Oldest generated workbooks are evicted beyond 1GB
+    'orphan_max_age': 3600,    # Leftover uploads/temp files older than 1 hour are removed
 }
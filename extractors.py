@@ -0,0 +1,133 @@
+"""
+PDF text-extraction backends.
+
+Each backend opens a PDF (a file path or a binary stream) as a document with
+page_count and page_text(index); app.py turns the page texts into markdown.
+
+- pypdf2:  PyPDF2 (always installed), pure Python
+- pymupdf: PyMuPDF / MuPDF (optional, `pip install pymupdf`), several times
+           faster and free of the split tokens ('A01. 1', '0. 5') PyPDF2 emits
+
+backend_chain() resolves the configured backend into the order to try them
+in: 'auto' prefers the fastest installed backend, and with fallback enabled
+the other installed backends follow, so a file one engine can't read is
+retried with the next.
+
+The parser's line-anchored row patterns were written against PyPDF2's line
+layout, so the app defaults to 'pypdf2'; PyMuPDF (and 'auto', which prefers it)
+is opt-in once bench_extractors.py shows it agrees on a deployment's own
+certificates.
+"""
+
+import importlib
+import importlib.util
+import mmap
+
+# Both engines are imported on first use (Backend.load), so importing this module stays cheap
+
+
+def _find_module(*names):
+    """The first of `names` that is installed (without importing it), or None."""
+    for name in names:
+        if importlib.util.find_spec(name) is not None:
+            return name
+    return None
+
+
+class PyPDF2Document:
+    def __init__(self, source):
+        self._file = self._mapped = None
+        if isinstance(source, str):
+            # Read saved files through an mmap instead of a copy
+            self._file = open(source, 'rb')
+            try:
+                self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                self.close()
+                raise ValueError("file is empty")
+            source = self._mapped
+        self._reader = BACKENDS['pypdf2'].load().PdfReader(source)
+
+    @property
+    def page_count(self):
+        return len(self._reader.pages)
+
+    def page_text(self, index):
+        return self._reader.pages[index].extract_text()
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+        if self._file is not None:
+            self._file.close()
+
+
+class PyMuPDFDocument:
+    def __init__(self, source):
+        pymupdf = BACKENDS['pymupdf'].load()
+        if isinstance(source, str):
+            self._doc = pymupdf.open(source, filetype='pdf')
+        else:
+            # PyMuPDF wants bytes; streams (mmaps included) are copied once
+            source.seek(0)
+            self._doc = pymupdf.open(stream=source.read(), filetype='pdf')
+
+    @property
+    def page_count(self):
+        return self._doc.page_count
+
+    def page_text(self, index):
+        return self._doc.load_page(index).get_text()
+
+    def close(self):
+        self._doc.close()
+
+
+class Backend:
+    """A named extraction engine; open() returns a document to read pages from."""
+
+    def __init__(self, name, document_class, module):
+        self.name = name
+        self.document_class = document_class
+        self.module_name = module
+        self.available = module is not None
+        self._module = None
+
+    def load(self):
+        """Import the engine's package (once)."""
+        if self._module is None:
+            self._module = importlib.import_module(self.module_name)
+        return self._module
+
+    def open(self, source):
+        return self.document_class(source)
+
+
+# In order of preference for 'auto' (fastest first)
+BACKENDS = {
+    'pymupdf': Backend('pymupdf', PyMuPDFDocument, _find_module('pymupdf', 'fitz')),  # fitz: PyMuPDF < 1.24
+    'pypdf2': Backend('pypdf2', PyPDF2Document, 'PyPDF2'),
+}
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if backend.available]
+
+
+def backend_chain(setting='auto', fallback=True):
+    """Backends to try, in order, for a configured backend name (or 'auto').
+
+    Raises ValueError for an unknown name or a backend whose package isn't installed.
+    """
+    if setting == 'auto':
+        names = available_backends()
+        return [BACKENDS[name] for name in (names if fallback else names[:1])]
+
+    backend = BACKENDS.get(setting)
+    if backend is None:
+        raise ValueError(f"Unknown extraction backend '{setting}' (choose from auto, {', '.join(BACKENDS)})")
+    if not backend.available:
+        raise ValueError(f"Extraction backend '{setting}' is not installed")
+    if not fallback:
+        return [backend]
+    return [backend] + [BACKENDS[name] for name in available_backends() if name != setting]
@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for serving the converter on all cores: gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is built once in the master (preload_app) so the template, compiled
+schema and extraction engines are loaded before forking, and every worker
+shares them copy-on-write. Each web worker processes PDFs on its own pool, so
+the CPUs are split between the web workers unless PDFCONVERT_MAX_WORKERS is set.
+Override anything here with GUNICORN_CMD_ARGS or the environment variables below.
+"""
+
+import multiprocessing
+import os
+
+cpus = multiprocessing.cpu_count()
+
+bind = f"{os.environ.get('PDFCONVERT_HOST', '0.0.0.0')}:{os.environ.get('PDFCONVERT_PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(4, cpus)))
+# Threads keep status polls and downloads answering while a worker converts a batch
+worker_class = 'gthread'
+threads = int(os.environ.get('PDFCONVERT_THREADS', 4))
+# Large synchronous batches can take minutes
+timeout = int(os.environ.get('PDFCONVERT_TIMEOUT', 600))
+graceful_timeout = 30
+preload_app = True
+# Recycle workers now and then to return memory from big batches
+max_requests = 1000
+max_requests_jitter = 100
+accesslog = '-'
+
+# PDF worker processes per web worker (read by config.py when the app is preloaded below)
+os.environ.setdefault('PDFCONVERT_MAX_WORKERS', str(max(1, cpus // workers)))
+
+
+def post_fork(server, worker):
+    # Threads started in the master (the artifact sweeper) don't survive fork
+    from app import start_background_tasks
+
+    start_background_tasks()
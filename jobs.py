@@ -0,0 +1,232 @@
+"""
+Background batch jobs for /upload.
+
+A job tracks one uploaded batch: per-file progress while the PDFs are being
+processed, then the final results and the combined Excel filename. Jobs run on
+a small thread pool (the heavy PDF work itself happens in app.py's process
+pool), or on a thread of their own when they mostly wait (start()), and are
+kept in memory until job_ttl seconds after they finish.
+
+With a folder, each job's state is also written there as JSON (progress at most
+once per second, the final result right away), so that any server process, not
+just the one running the job, can answer /jobs/<id>.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds between progress snapshots of a running job
+SAVE_INTERVAL = 1.0
+
+
+class Job:
+    """State of one background batch, safe to read while the batch is running."""
+
+    def __init__(self, filenames):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'  # queued -> running -> completed | failed
+        self.files = [{'filename': name, 'status': 'pending'} for name in filenames]
+        self.response = None
+        self.excel_filename = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        # on_change(job, final) is called after every update (set by JobManager to persist it)
+        self.on_change = None
+        self._lock = threading.Lock()
+
+    def set_status(self, status):
+        """Move the job to 'queued' or 'running' (complete() and fail() finish it)."""
+        with self._lock:
+            self.status = status
+        self._changed(True)
+
+    def set_file_result(self, index, result):
+        """Record the outcome of one file (called as each file finishes, in any order)."""
+        with self._lock:
+            self.files[index] = {
+                'filename': result.get('filename', self.files[index]['filename']),
+                'status': result.get('status', 'error'),
+                'message': result.get('message', '')
+            }
+        self._changed(False)
+
+    def complete(self, response):
+        """Store the finished batch's /upload response body."""
+        with self._lock:
+            self.response = response
+            self.excel_filename = response.get('excel_filename')
+            self.status = 'completed'
+            self.finished_at = time.time()
+        self._changed(True)
+
+    def fail(self, error):
+        with self._lock:
+            self.error = error
+            self.status = 'failed'
+            self.finished_at = time.time()
+        self._changed(True)
+
+    def _changed(self, final):
+        if self.on_change is not None:
+            self.on_change(self, final)
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'failed')
+
+    def expired(self, cutoff):
+        """Whether the job finished before `cutoff` (a time.time() value)."""
+        return self.finished and self.finished_at < cutoff
+
+    def to_dict(self):
+        """Progress snapshot for /jobs/<id> (never includes markdown)."""
+        with self._lock:
+            done = sum(1 for f in self.files if f['status'] != 'pending')
+            data = {
+                'job_id': self.id,
+                'status': self.status,
+                'total': len(self.files),
+                'completed': done,
+                'files': [dict(f) for f in self.files],
+            }
+            if self.excel_filename:
+                data['excel_filename'] = self.excel_filename
+            if self.error:
+                data['error'] = self.error
+            return data
+
+    def snapshot(self):
+        """Everything needed to rebuild the job in another process (see from_snapshot)."""
+        with self._lock:
+            return {'id': self.id, 'status': self.status, 'files': [dict(f) for f in self.files],
+                    'response': self.response, 'error': self.error,
+                    'created_at': self.created_at, 'finished_at': self.finished_at}
+
+    @classmethod
+    def from_snapshot(cls, data):
+        job = cls([])
+        job.id = data['id']
+        job.status = data['status']
+        job.files = data['files']
+        job.response = data.get('response')
+        job.excel_filename = (job.response or {}).get('excel_filename')
+        job.error = data.get('error')
+        job.created_at = data['created_at']
+        job.finished_at = data.get('finished_at')
+        return job
+
+
+class JobManager:
+    """Runs jobs on a background executor and keeps them addressable by ID."""
+
+    def __init__(self, max_workers=2, job_ttl=3600, folder=None):
+        self.job_ttl = job_ttl
+        self.folder = folder
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upload-job')
+        self._jobs = {}
+        self._saved_at = {}
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+
+    def submit(self, filenames, fn, *args):
+        """Create a job for `filenames` and run fn(job, *args) in the background."""
+        job = self._create(filenames)
+        self._executor.submit(self._run, job, fn, *args)
+        return job
+
+    def start(self, filenames, fn, *args):
+        """Like submit(), but on a thread of its own rather than the executor: for jobs that
+        spend most of their time waiting (e.g. for an upload session's files)."""
+        job = self._create(filenames)
+        threading.Thread(target=self._run, args=(job, fn) + args, name='upload-job-waiting', daemon=True).start()
+        return job
+
+    def _create(self, filenames):
+        job = Job(filenames)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        if self.folder:
+            job.on_change = self._save
+            self._save(job, True)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.folder:
+            # Started by another server process
+            job = self._load(job_id)
+        return job
+
+    def _run(self, job, fn, *args):
+        job.set_status('running')
+        try:
+            fn(job, *args)
+        except Exception as e:
+            job.fail(f"Unexpected error during processing: {str(e)}")
+        if not job.finished:
+            job.fail("Job ended without a result")
+
+    def _path(self, job_id):
+        return os.path.join(self.folder, f"{os.path.basename(job_id)}.json")
+
+    def _save(self, job, final):
+        now = time.time()
+        with self._lock:
+            if not final and now - self._saved_at.get(job.id, 0.0) < SAVE_INTERVAL:
+                return
+            self._saved_at[job.id] = now
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            path = self._path(job.id)
+            tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(job.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Only other processes miss out; this one still has the job in memory
+            pass
+
+    def _load(self, job_id):
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                job = Job.from_snapshot(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+        if job.expired(time.time() - self.job_ttl):
+            return None
+        return job
+
+    def _prune(self):
+        # Caller holds self._lock
+        cutoff = time.time() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.expired(cutoff)]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._saved_at.pop(job_id, None)
+
+        # Snapshots of expired jobs, whichever process ran them; at most once a minute. A job
+        # still queued or running keeps its snapshot however long ago it was last saved.
+        if self.folder and time.time() - self._swept_at > 60:
+            self._swept_at = time.time()
+            try:
+                entries = list(os.scandir(self.folder))
+            except OSError:
+                return
+            for entry in entries:
+                try:
+                    # A finished snapshot is written when the job finishes, so newer files can't be expired
+                    if not entry.name.endswith('.json') or entry.stat().st_mtime >= cutoff:
+                        continue
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        job = Job.from_snapshot(json.load(f))
+                    if job.expired(cutoff):
+                        os.remove(entry.path)
+                except (OSError, ValueError, KeyError):
+                    continue
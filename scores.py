@@ -0,0 +1,192 @@
+"""
+Compact score matrix for a chunk of parsed scorecards.
+
+parse_well_markdown returns each scorecard as a list of {'code', 'value'} dicts.
+ScoreMatrix packs a chunk of them over a fixed CodeVocabulary (the template's
+part codes, plus any other codes the chunk contains) into two arrays:
+
+- points: float64, projects x codes, the numeric score in each part cell (NaN if none)
+- status: int16 categories, projects x codes: NO_VALUE, NUMERIC, or the index of
+          the cell's text value ('p', 'Pending Documentation', ...) in .categories
+
+Concept Sub-Points, Total Points and percentages are computed for the whole chunk
+with a few array operations, and BatchStatistics accumulates cross-project figures
+over all chunks of a batch.
+"""
+
+import numpy as np
+
+NO_VALUE = 0
+NUMERIC = 1
+
+
+class CodeVocabulary:
+    """Part code -> matrix column, and the concept (by letter) each code adds its points to."""
+
+    def __init__(self, codes, concepts):
+        self.codes = list(codes)
+        self.index = {code: j for j, code in enumerate(self.codes)}
+        self.concepts = list(concepts)
+        self._concept_index = {letter: k for k, letter in enumerate(self.concepts)}
+        self.code_concepts = self.concepts_of(self.codes)
+
+    def concepts_of(self, codes):
+        """Concept index of each code; -1 for codes whose letter is not a concept."""
+        return np.array([self._concept_index.get(code[:1], -1) for code in codes], dtype=np.int64)
+
+
+class ScoreMatrix:
+    """Scores of a chunk of projects; see the module docstring for the layout."""
+
+    def __init__(self, vocabulary, codes, points, status, categories, concept_points, part_values):
+        self.vocabulary = vocabulary
+        self.codes = codes
+        self.points = points
+        self.status = status
+        self.categories = categories
+        # projects x concepts; every numeric part score counts, including repeated codes
+        self.concept_points = concept_points
+        # Per project {column: cell value} of its filled part cells, for writing rows out
+        self.part_values = part_values
+
+    @classmethod
+    def from_parsed(cls, parsed_list, vocabulary):
+        codes = vocabulary.codes
+        index = vocabulary.index
+        categories = ['', 'numeric']
+        category_index = {}
+        part_values = []
+        part_status = []
+        scored_rows, scored_cols, scored_values = [], [], []
+
+        for i, parsed in enumerate(parsed_list):
+            values = {}
+            status = {}
+            for part in parsed.get("parts", []):
+                value = part.get("value", "")
+                if value is None or value == "":
+                    # An empty value leaves the cell as it was
+                    continue
+                code = part.get("code", "")
+                j = index.get(code)
+                if j is None:
+                    # A code the template has no column for: give it a column for this chunk only
+                    if index is vocabulary.index:
+                        codes, index = list(codes), dict(index)
+                    j = index[code] = len(codes)
+                    codes.append(code)
+                # A repeated code replaces the earlier cell value, like successive cell writes
+                if isinstance(value, (int, float)):
+                    value = float(value)
+                    status[j] = NUMERIC
+                    scored_rows.append(i)
+                    scored_cols.append(j)
+                    scored_values.append(value)
+                else:
+                    c = category_index.get(value)
+                    if c is None:
+                        c = category_index[value] = len(categories)
+                        categories.append(value)
+                    status[j] = c
+                values[j] = value
+            part_values.append(values)
+            part_status.append(status)
+
+        n, k = len(parsed_list), len(codes)
+        n_concepts = len(vocabulary.concepts)
+        points = np.full((n, k), np.nan)
+        status = np.zeros((n, k), dtype=np.int16)
+
+        # Cells hold each code's last value (one entry per cell, so plain fancy assignment is safe)
+        counts = [len(row) for row in part_status]
+        cell_rows = np.repeat(np.arange(n), counts)
+        cell_cols = np.fromiter((j for row in part_status for j in row), dtype=np.int64, count=sum(counts))
+        status[cell_rows, cell_cols] = np.fromiter((c for row in part_status for c in row.values()),
+                                                   dtype=np.int16, count=len(cell_cols))
+
+        # Sub-Points: every numeric score, summed per project and concept in part order
+        concepts = vocabulary.code_concepts
+        if k > len(concepts):
+            concepts = np.concatenate([concepts, vocabulary.concepts_of(codes[len(concepts):])])
+        scored_rows = np.array(scored_rows, dtype=np.int64)
+        scored_cols = np.array(scored_cols, dtype=np.int64)
+        scored_values = np.array(scored_values)
+        scored_concepts = concepts[scored_cols]
+        counted = scored_concepts >= 0
+        # (bincount returns ints when nothing was scored; Sub-Points are always floats)
+        concept_points = np.bincount(scored_rows[counted] * n_concepts + scored_concepts[counted],
+                                     weights=scored_values[counted],
+                                     minlength=n * n_concepts).astype(np.float64, copy=False).reshape(n, n_concepts)
+
+        # Points: the last numeric score of each cell, where no text value replaced it
+        if len(scored_rows):
+            _, last_reversed = np.unique((scored_rows * k + scored_cols)[::-1], return_index=True)
+            last = len(scored_rows) - 1 - last_reversed
+            points[scored_rows[last], scored_cols[last]] = scored_values[last]
+            points[status != NUMERIC] = np.nan
+        return cls(vocabulary, codes, points, status, categories, concept_points, part_values)
+
+    def __len__(self):
+        return self.points.shape[0]
+
+    @property
+    def total_points(self):
+        # Added concept by concept (not np.sum's pairwise order) so totals match a running sum exactly
+        totals = np.zeros(len(self))
+        for k in range(self.concept_points.shape[1]):
+            totals += self.concept_points[:, k]
+        return totals
+
+    def percentages(self, totals=None):
+        """Share of each concept in the project's Total Points (NaN where the total is not positive)."""
+        totals = self.total_points if totals is None else totals
+        shares = np.full(self.concept_points.shape, np.nan)
+        scored = totals > 0
+        shares[scored] = self.concept_points[scored] / totals[scored, None]
+        return shares
+
+
+class BatchStatistics:
+    """Cross-project figures accumulated over the ScoreMatrix chunks of a batch."""
+
+    def __init__(self, concepts):
+        self.concepts = list(concepts)
+        self.projects = 0
+        self.total_sum = 0.0
+        self.total_min = None
+        self.total_max = None
+        self.concept_sums = np.zeros(len(self.concepts))
+        self.values = {}
+
+    def add(self, matrix):
+        if not len(matrix):
+            return
+        totals = matrix.total_points
+        self.projects += len(matrix)
+        self.total_sum += float(totals.sum())
+        low, high = float(totals.min()), float(totals.max())
+        self.total_min = low if self.total_min is None else min(self.total_min, low)
+        self.total_max = high if self.total_max is None else max(self.total_max, high)
+        self.concept_sums += matrix.concept_points.sum(axis=0)
+
+        counts = np.bincount(matrix.status.ravel(), minlength=len(matrix.categories))
+        for c, label in enumerate(matrix.categories):
+            if c != NO_VALUE and counts[c]:
+                self.values[label] = self.values.get(label, 0) + int(counts[c])
+
+    def summary(self):
+        """JSON-ready summary, or None if no project was scored."""
+        if not self.projects:
+            return None
+        return {
+            'projects': self.projects,
+            'total_points': {
+                'mean': round(self.total_sum / self.projects, 3),
+                'min': round(self.total_min, 3),
+                'max': round(self.total_max, 3),
+            },
+            'concept_points_mean': {letter: round(float(s) / self.projects, 3)
+                                    for letter, s in zip(self.concepts, self.concept_sums)},
+            # Part cells by value: 'numeric' scores, 'p', 'Pending Documentation', ...
+            'part_values': dict(sorted(self.values.items())),
+        }
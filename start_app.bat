@@ -6,5 +6,11 @@ echo pip install -r requirements.txt
 echo pip install -U "mineru[core]"
 echo.
 echo Starting the application...
-python app.py
+REM Production server if waitress is installed, else the development server
+where waitress-serve >nul 2>nul
+if %ERRORLEVEL% EQU 0 (
+    waitress-serve --port=5000 --threads=8 wsgi:app
+) else (
+    python app.py
+)
 pause
@@ -8,8 +8,10 @@ echo "pip install -U \"mineru[core]\""
 echo ""
 echo "Starting the application..."
 
-# Check if Python is available
-if command -v python3 &> /dev/null; then
+# Production server on all cores if gunicorn is installed, else the development server
+if command -v gunicorn &> /dev/null; then
+    gunicorn -c gunicorn.conf.py wsgi:app
+elif command -v python3 &> /dev/null; then
     python3 app.py
 elif command -v python &> /dev/null; then
     python app.py
@@ -0,0 +1,214 @@
+"""
+Persistent store of parsed scorecards (SQLite).
+
+Every scorecard parse_well_markdown produces during an upload (or a cli.py
+run) is kept here, one row per project and certification date, so workbooks
+for any subset of projects can be rebuilt later without the PDFs:
+
+- project_id, project_name, date_cert: as parsed
+- cert_date: date_cert as an ISO date (YYYY-MM-DD) for range queries
+- parsed:    the full parse as JSON (including its parts)
+- filename, sha256: the upload it came from
+
+Re-uploading a scorecard replaces its row. The table is indexed by
+project_id and by cert_date; the database runs in WAL mode, so several server
+processes can write to it and read it at once.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scorecards (
+    id INTEGER PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    project_name TEXT,
+    date_cert TEXT NOT NULL,
+    cert_date TEXT,
+    parsed TEXT NOT NULL,
+    filename TEXT,
+    sha256 TEXT,
+    stored_at REAL NOT NULL,
+    UNIQUE (project_id, date_cert)
+);
+CREATE INDEX IF NOT EXISTS scorecards_cert_date ON scorecards (cert_date);
+"""
+
+UPSERT = """
+INSERT INTO scorecards (project_id, project_name, date_cert, cert_date, parsed, filename, sha256, stored_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (project_id, date_cert) DO UPDATE SET
+    project_name = excluded.project_name, cert_date = excluded.cert_date, parsed = excluded.parsed,
+    filename = excluded.filename, sha256 = excluded.sha256, stored_at = excluded.stored_at
+"""
+
+# parse_well_markdown's placeholder for a field it couldn't find
+UNKNOWN = 'Unknown'
+
+# SQLite caps the number of host parameters in one statement
+MAX_IDS_PER_QUERY = 500
+
+
+def iso_date(date_cert):
+    """'31/12/2024' (parse_well_markdown's date_cert) -> '2024-12-31', or None."""
+    try:
+        return datetime.strptime(date_cert, "%d/%m/%Y").date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+class Query:
+    """Which stored scorecards to select. Every criterion is optional; all given ones must match.
+
+    date_from, date_to: ISO dates, inclusive, on the certification date
+    project_ids:        project IDs to include
+    latest:             only each project's most recent certification
+    """
+
+    def __init__(self, date_from=None, date_to=None, project_ids=None, latest=False):
+        self.date_from = date_from
+        self.date_to = date_to
+        self.project_ids = list(project_ids) if project_ids else None
+        self.latest = latest
+
+    def where(self):
+        """(SQL condition, parameters) for the scorecards table."""
+        clauses, params = [], []
+        if self.date_from:
+            clauses.append("cert_date >= ?")
+            params.append(self.date_from)
+        if self.date_to:
+            clauses.append("cert_date <= ?")
+            params.append(self.date_to)
+        if self.project_ids is not None:
+            clauses.append(f"project_id IN ({','.join('?' * len(self.project_ids))})")
+            params.extend(self.project_ids)
+        if self.latest:
+            clauses.append("NOT EXISTS (SELECT 1 FROM scorecards newer WHERE newer.project_id = scorecards.project_id"
+                           " AND COALESCE(newer.cert_date, '') > COALESCE(scorecards.cert_date, ''))")
+        return (" AND ".join(clauses) or "1"), params
+
+
+class ScorecardStore:
+    """SQLite-backed scorecards; one connection per process, shared by its threads under a lock."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # A connection must not cross fork(); each server worker opens its own
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def put_many(self, records):
+        """Store (parsed, filename, sha256) tuples in one transaction. Returns how many were stored.
+
+        Scorecards without a project ID (missing, or parse_well_markdown's 'Unknown') can't be
+        looked up again and are skipped; stored, they would all overwrite one another.
+        """
+        rows = []
+        now = time.time()
+        for parsed, filename, sha256 in records:
+            project_id = str(parsed.get('project_id') or '').strip()
+            if not project_id or project_id == UNKNOWN:
+                continue
+            date_cert = parsed.get('date_cert') or 'Unknown'
+            rows.append((project_id, parsed.get('project_name'), date_cert, iso_date(date_cert),
+                         json.dumps(parsed), filename, sha256, now))
+        if rows:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def count(self, query):
+        where, params = self._where(query)
+        with self._lock:
+            return self._connection().execute(f"SELECT COUNT(*) FROM scorecards WHERE {where}", params).fetchone()[0]
+
+    def projects(self, query, limit=None):
+        """Summary rows (no parts) of the matching scorecards, oldest certification first."""
+        where, params = self._where(query)
+        sql = (f"SELECT project_id, project_name, date_cert, filename, stored_at FROM scorecards WHERE {where} "
+               f"ORDER BY cert_date, project_id" + (" LIMIT ?" if limit else ""))
+        with self._lock:
+            rows = self._connection().execute(sql, params + ([limit] if limit else [])).fetchall()
+        return [{'project_id': r[0], 'project_name': r[1], 'date_cert': r[2], 'filename': r[3],
+                 'stored_at': datetime.fromtimestamp(r[4]).isoformat(timespec='seconds')} for r in rows]
+
+    def iter_parsed(self, query, chunk_rows=256):
+        """Yield the parsed scorecards that match, oldest certification first, reading chunk_rows at a time."""
+        where, params = self._where(query)
+        last = None
+        while True:
+            # Keyset pagination, so the lock isn't held while the caller works on a chunk
+            page, page_params = where, list(params)
+            if last is not None:
+                page += " AND (COALESCE(cert_date, ''), project_id, id) > (?, ?, ?)"
+                page_params += list(last)
+            sql = (f"SELECT COALESCE(cert_date, ''), project_id, id, parsed FROM scorecards WHERE {page} "
+                   f"ORDER BY COALESCE(cert_date, ''), project_id, id LIMIT ?")
+            with self._lock:
+                rows = self._connection().execute(sql, page_params + [chunk_rows]).fetchall()
+            for row in rows:
+                yield json.loads(row[3])
+            if len(rows) < chunk_rows:
+                return
+            last = rows[-1][:3]
+
+    def stats(self):
+        with self._lock:
+            projects, scorecards = self._connection().execute(
+                "SELECT COUNT(DISTINCT project_id), COUNT(*) FROM scorecards").fetchone()
+        return {'projects': projects, 'scorecards': scorecards}
+
+    def _where(self, query):
+        if query.project_ids is not None and len(query.project_ids) > MAX_IDS_PER_QUERY:
+            raise ValueError(f"At most {MAX_IDS_PER_QUERY} project IDs per query")
+        return query.where()
+
+
+class StoreWriter:
+    """Buffers scorecards for a ScorecardStore and writes them chunk_rows at a time.
+
+    A failed write is logged and kept in .error; it never fails the batch being stored.
+    """
+
+    def __init__(self, store, chunk_rows=256):
+        self.store = store
+        self.chunk_rows = chunk_rows
+        self.pending = []
+        self.stored = 0
+        self.error = None
+
+    def add(self, parsed, filename=None, sha256=None):
+        self.pending.append((parsed, filename, sha256))
+        if len(self.pending) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        chunk, self.pending = self.pending, []
+        if not chunk:
+            return
+        try:
+            self.stored += self.store.put_many(chunk)
+        except sqlite3.Error as e:
+            logger.warning("Could not store %d scorecards: %s", len(chunk), e)
+            self.error = self.error or str(e)
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+# The modules under test are top-level files in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# and the synthetic corpus and reference parser the benchmarks use
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from artifacts import ArtifactStore  # noqa: E402
+from corpus import scorecard_pdf_bytes, write_template  # noqa: E402
+from store import ScorecardStore  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def scorecard_store(tmp_path, monkeypatch):
+    """Every test gets its own scorecard store, so nothing is written to the real database."""
+    import app
+    store = ScorecardStore(str(tmp_path / 'store' / 'scorecards.db'))
+    monkeypatch.setattr(app, 'scorecard_store', store)
+    return store
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Write a small text PDF into tmp_path, `lines_per_page` lines per page; returns its path."""
+    def make(name, lines, lines_per_page=50):
+        path = str(tmp_path / name)
+        with open(path, 'wb') as f:
+            f.write(scorecard_pdf_bytes(lines, lines_per_page))
+        return path
+    return make
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client for the Flask app, with its scorecard cache in tmp_path."""
+    import app
+    monkeypatch.setattr(app, 'scorecard_cache', None)
+    monkeypatch.setitem(app.CACHE_CONFIG, 'folder', str(tmp_path / 'cache'))
+    return app.create_app({'TESTING': True}, warm=False).test_client()
+
+
+@pytest.fixture
+def template(tmp_path, monkeypatch):
+    """A generated template, used by the app in place of template1.xlsx; returns its path."""
+    import app
+    path = str(tmp_path / 'template1.xlsx')
+    write_template(path, features_per_concept=2)
+    monkeypatch.setattr(app, 'TEMPLATE_PATH', path)
+    return path
+
+
+@pytest.fixture
+def folders(tmp_path, monkeypatch):
+    """Point the app's upload and processed folders (and artifact store) at tmp_path; returns (uploads, processed)."""
+    import app
+    uploads, processed = str(tmp_path / 'uploads'), str(tmp_path / 'processed')
+    os.makedirs(uploads)
+    os.makedirs(processed)
+    monkeypatch.setattr(app, 'UPLOAD_FOLDER', uploads)
+    monkeypatch.setattr(app, 'PROCESSED_FOLDER', processed)
+    monkeypatch.setattr(app, 'artifact_store', ArtifactStore(processed, suffixes=app.artifact_store.suffixes))
+    return uploads, processed
+
+
+@pytest.fixture
+def upload(client):
+    """POST PDF files to /upload (query string included in `url`); returns the response."""
+    def post(paths, url='/upload'):
+        data = {'files': [(open(path, 'rb'), os.path.basename(path)) for path in paths]}
+        try:
+            return client.post(url, data=data, content_type='multipart/form-data')
+        finally:
+            for handle, _ in data['files']:
+                handle.close()
+    return post
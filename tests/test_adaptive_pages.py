@@ -0,0 +1,117 @@
+import app
+from app import TABLE_AT_LAST_CONCEPT, TABLE_NOT_STARTED, TABLE_ROWS, read_markdown, scorecard_table_ended
+
+COVER = ["123456789 - Tower", "Date: 01 Jan, 2024", "WELL Certification"]
+ROWS_A = ["A01.1 Air quality 1 Achieved 1", "A02.1 Smoke-free 1 Achieved 1"]
+ROWS_I = ["I01.1 Innovation 1 Achieved 1", "I02.1 Accredited professional 1 Achieved 1"]
+NOTES = ["Notes on this scorecard", "Reviewed by the assessor"]
+
+
+def pages(*contents):
+    """Lines for make_pdf with one entry of `contents` per page (padded to 3 lines)."""
+    lines = []
+    for page in contents:
+        lines.extend((page + ["", "", ""])[:3])
+    return lines
+
+
+def read(path, max_pages=20):
+    with open(path, 'rb') as f:
+        return app.extract_markdown(f, 'card.pdf', max_pages=max_pages, adaptive=True)[0].markdown
+
+
+def test_reading_stops_after_the_score_table(make_pdf):
+    path = make_pdf('card.pdf', pages(COVER, ROWS_A, ROWS_I, NOTES, ["Appendix A01.1"]), lines_per_page=3)
+
+    markdown = read(path)
+
+    assert '## Page 4' in markdown and 'Notes on this scorecard' in markdown
+    assert '## Page 5' not in markdown
+
+
+def test_page_without_rows_ends_the_table(make_pdf):
+    path = make_pdf('card.pdf', pages(COVER, ROWS_A, NOTES, ROWS_I), lines_per_page=3)
+
+    markdown = read(path)
+
+    assert '## Page 3' in markdown and 'I01.1' not in markdown
+    assert app.parse_well_markdown(markdown)['parts'] == [{'code': 'A01.1', 'value': 1.0},
+                                                          {'code': 'A02.1', 'value': 1.0}]
+
+
+def test_max_pages_bounds_the_read(make_pdf):
+    path = make_pdf('card.pdf', pages(COVER, ROWS_A, ROWS_A, ROWS_A, ROWS_I), lines_per_page=3)
+
+    markdown = read(path, max_pages=3)
+
+    assert '## Page 3' in markdown and '## Page 4' not in markdown
+
+
+def test_fixed_mode_reads_two_pages(make_pdf, monkeypatch):
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'page_mode', 'fixed')
+    path = make_pdf('card.pdf', pages(COVER, ROWS_A, ROWS_I), lines_per_page=3)
+
+    markdown, error = app.extract_markdown_from_file(path, 'card.pdf')
+
+    assert '## Page 2' in markdown and 'I01.1' not in markdown
+
+
+class FakeDocument:
+    def __init__(self, pages):
+        self.pages = pages
+        self.loaded = []
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    def page_text(self, index):
+        self.loaded.append(index)
+        return self.pages[index]
+
+    def close(self):
+        pass
+
+
+class FakeBackend:
+    def __init__(self, pages):
+        self.document = FakeDocument(pages)
+
+    def open(self, source):
+        return self.document
+
+
+PAGE_COVER = "123456789 - Tower\nDate: 01 Jan, 2024\nWELL Certification"
+PAGE_A = "A01.1 Air quality 1 Achieved 1\nA02.1 Smoke-free 1 Achieved 1\nPage 1 of 4"
+PAGE_I = "I01.1 Innovation 1 Achieved 1\nI02.1 Accredited professional 1 Achieved 1\nPage 2 of 4"
+PAGE_MORE_I = "I03.1 Education 1 Achieved 1\nPage 3 of 4"
+PAGE_APPENDIX = "Appendix\nA01.1 Air quality: documentation reviewed\nPage 4 of 4"
+PAGE_NOTES = "Notes on this scorecard\nPage 4 of 4"
+
+
+def pages_read(pages):
+    backend = FakeBackend(pages)
+    markdown, _ = read_markdown(backend, None, 'x.pdf', max_pages=20, adaptive=True)
+    return backend.document.loaded, markdown
+
+
+def test_page_states():
+    assert scorecard_table_ended(PAGE_COVER) == (TABLE_NOT_STARTED, False, True)
+    assert scorecard_table_ended(PAGE_A, TABLE_NOT_STARTED) == (TABLE_ROWS, False, True)
+    assert scorecard_table_ended(PAGE_I, TABLE_ROWS) == (TABLE_AT_LAST_CONCEPT, False, True)
+    assert scorecard_table_ended(PAGE_NOTES, TABLE_AT_LAST_CONCEPT) == (TABLE_AT_LAST_CONCEPT, True, True)
+    assert scorecard_table_ended(PAGE_APPENDIX, TABLE_AT_LAST_CONCEPT)[1:] == (True, False)
+
+
+def test_footer_after_last_concept_rows_does_not_truncate():
+    loaded, markdown = pages_read([PAGE_COVER, PAGE_A, PAGE_I, PAGE_MORE_I, PAGE_NOTES, "never read"])
+
+    assert 'I03.1' in markdown
+    assert loaded == [0, 1, 2, 3, 4]
+
+
+def test_rows_that_do_not_continue_the_last_concept_are_left_out():
+    loaded, markdown = pages_read([PAGE_COVER, PAGE_A, PAGE_I, PAGE_APPENDIX, "never read"])
+
+    assert 'Appendix' not in markdown
+    assert loaded == [0, 1, 2, 3]
@@ -0,0 +1,197 @@
+import io
+import threading
+import time
+
+import pytest
+
+import app
+from admission import AdmissionController, Rejected
+from upload_sessions import UploadSessions
+
+
+def test_batches_within_the_limits_run_together():
+    controller = AdmissionController(max_files=10, max_bytes=1000)
+    first = controller.reserve(4, 400)
+    second = controller.reserve(6, 600)
+
+    assert first.admitted_at is not None and second.admitted_at is not None
+    assert controller.stats()['in_flight_files'] == 10
+    first.release()
+    second.release()
+    assert controller.stats()['in_flight_batches'] == 0
+
+
+def test_oversized_batch_runs_alone():
+    controller = AdmissionController(max_files=2)
+    big = controller.reserve(50)
+
+    assert big.admitted_at is not None
+    assert controller.reserve(1).admitted_at is None
+
+
+def test_queue_is_fifo():
+    controller = AdmissionController(max_files=4)
+    running = controller.reserve(3)
+    big = controller.reserve(4)
+    small = controller.reserve(1)
+
+    # The small batch would fit now, but the big one ahead of it goes first
+    assert big.admitted_at is None and small.admitted_at is None
+    running.release()
+    assert big.admitted_at is not None and small.admitted_at is None
+    big.release()
+    assert small.admitted_at is not None
+
+
+def test_wait_blocks_until_admitted():
+    controller = AdmissionController(max_files=1)
+    running = controller.reserve(1)
+    queued = controller.reserve(1)
+    threading.Timer(0.1, running.release).start()
+
+    queued.wait(timeout=5)
+
+    assert queued.admitted_at is not None
+    assert queued.wait_seconds >= 0.05
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    controller = AdmissionController(max_files=2, max_queue=1, default_seconds_per_file=2.0, max_retry_after=60)
+    controller.reserve(2)
+    controller.reserve(3)
+
+    with pytest.raises(Rejected) as rejected:
+        controller.reserve(1)
+    assert rejected.value.reason == 'queue_full'
+    # 2 files in flight + 3 queued + 1 = 6 files at 2s each
+    assert rejected.value.retry_after == 12
+
+
+def test_retry_after_is_capped():
+    controller = AdmissionController(max_files=1, max_queue=0, default_seconds_per_file=10.0, max_retry_after=30)
+    controller.reserve(100)
+
+    with pytest.raises(Rejected) as rejected:
+        controller.reserve(1)
+    assert rejected.value.retry_after == 30
+
+
+def test_wait_timeout_leaves_the_queue():
+    controller = AdmissionController(max_files=1)
+    running = controller.reserve(1)
+    timed_out = controller.reserve(1)
+    behind = controller.reserve(1)
+
+    with pytest.raises(Rejected) as rejected:
+        timed_out.wait(timeout=0.05)
+    assert rejected.value.reason == 'timeout'
+    assert controller.stats()['queued_batches'] == 1
+    running.release()
+    assert behind.admitted_at is not None
+
+
+def test_release_is_idempotent_and_updates_the_estimate():
+    controller = AdmissionController(default_seconds_per_file=100.0)
+    ticket = controller.reserve(2)
+    time.sleep(0.01)
+    ticket.release()
+    ticket.release()
+
+    stats = controller.stats()
+    assert stats['in_flight_files'] == 0
+    assert stats['seconds_per_file'] < 100.0
+
+
+@pytest.fixture
+def saturated(monkeypatch):
+    """Replace the app's admission controller with one that has a batch running and no queue."""
+    controller = AdmissionController(max_files=1, max_queue=0, default_seconds_per_file=5.0)
+    ticket = controller.reserve(1)
+    monkeypatch.setattr(app, 'admission', controller)
+    yield controller
+    ticket.release()
+
+
+def test_upload_gets_503_with_retry_after(client, saturated):
+    response = client.post('/upload', data={'files': (io.BytesIO(b'%PDF-1.4'), 'a.pdf')},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '10'
+    assert response.get_json()['retry_after'] == 10
+
+
+def test_upload_session_gets_503_and_is_removed(client, saturated, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'upload_sessions', UploadSessions(str(tmp_path / 'sessions')))
+
+    response = client.post('/uploads', json={'files': [{'name': 'a.pdf', 'size': 10}]})
+
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    assert list((tmp_path / 'sessions').glob('*')) == []
+
+
+def test_only_accepted_files_are_reserved(client, folders, monkeypatch):
+    controller = AdmissionController(max_files=10)
+    tickets = []
+    reserve = controller.reserve
+
+    def spy(files, nbytes=0):
+        tickets.append(reserve(files, nbytes))
+        return tickets[-1]
+    monkeypatch.setattr(controller, 'reserve', spy)
+    monkeypatch.setattr(app, 'admission', controller)
+
+    client.post('/upload', data={'files': [(io.BytesIO(b'%PDF-1.4'), 'a.pdf'), (io.BytesIO(b'notes'), 'a.txt'),
+                                           (io.BytesIO(b'%PDF-1.4'), 'b.pdf'), (io.BytesIO(b'x'), 'b.docx')]},
+                content_type='multipart/form-data')
+
+    assert [ticket.files for ticket in tickets] == [2]
+    assert controller.stats()['in_flight_files'] == 0
+
+
+def test_resize_corrects_a_reservation():
+    controller = AdmissionController(max_files=4)
+    running = controller.reserve(1)
+    running.resize(4)
+    queued = controller.reserve(1)
+    queued.resize(3)
+
+    assert controller.stats()['in_flight_files'] == 4
+    assert queued.admitted_at is None and controller.stats()['queued_files'] == 3
+    # The running batch turned out smaller: the queued one fits now
+    running.resize(1)
+    assert queued.admitted_at is not None
+    assert controller.stats()['in_flight_files'] == 4
+    running.release()
+    queued.release()
+    assert controller.stats()['in_flight_files'] == 0
+
+
+class UnreadBody(io.BytesIO):
+    """A request body that records whether anything read it."""
+
+    read_from = False
+
+    def read(self, *args):
+        self.read_from = True
+        return super().read(*args)
+
+    def readinto(self, buffer):
+        self.read_from = True
+        return super().readinto(buffer)
+
+    def readline(self, *args):
+        self.read_from = True
+        return super().readline(*args)
+
+
+def test_upload_is_rejected_before_its_body_is_read(client, saturated):
+    body = UnreadBody(b'--x\r\nContent-Disposition: form-data; name="files"; filename="a.pdf"\r\n\r\n'
+                      b'%PDF-1.4\r\n--x--\r\n')
+
+    response = client.post('/upload', input_stream=body, content_length=len(body.getvalue()),
+                           content_type='multipart/form-data; boundary=x')
+
+    assert response.status_code == 503
+    assert not body.read_from
@@ -0,0 +1,142 @@
+import io
+import os
+import subprocess
+import sys
+import time
+
+import app
+from admission import AdmissionController
+from artifacts import ArtifactStore, remove_orphans
+from jobs import JobManager
+
+
+def write(folder, name, size=10, age=0):
+    """Create a file of `size` bytes with its mtime `age` seconds in the past."""
+    os.makedirs(str(folder), exist_ok=True)
+    path = os.path.join(str(folder), name)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_store_is_seeded_from_the_folder_on_load(tmp_path):
+    write(tmp_path, 'a.xlsx', 5)
+    write(tmp_path, 'b.xlsx', 7)
+    write(tmp_path, 'upload.pdf', 100)
+
+    store = ArtifactStore(str(tmp_path))
+    assert store.stats() == {'files': 0, 'bytes': 0}
+
+    store.load()
+    assert store.stats() == {'files': 2, 'bytes': 12}
+    assert store.path_for('a.xlsx') == str(tmp_path / 'a.xlsx')
+    assert store.path_for('upload.pdf') is None
+
+
+def test_evict_drops_expired_artifacts(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_age=60)
+    for name, age in (('old.xlsx', 120), ('new.xlsx', 10)):
+        path = write(tmp_path, name, age=age)
+        store.add(path, os.path.getmtime(path))
+
+    assert store.evict() == 1
+    assert sorted(os.listdir(tmp_path)) == ['new.xlsx']
+    assert store.path_for('old.xlsx') is None
+    assert store.stats() == {'files': 1, 'bytes': 10}
+
+
+def test_evict_removes_oldest_until_under_quota(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=25)
+    for name, age in (('first.xlsx', 30), ('second.xlsx', 20), ('third.xlsx', 10)):
+        path = write(tmp_path, name, age=age)
+        store.add(path, os.path.getmtime(path))
+
+    # add() evicts as soon as the third file puts the store over quota
+    assert sorted(os.listdir(tmp_path)) == ['second.xlsx', 'third.xlsx']
+    assert store.stats() == {'files': 2, 'bytes': 20}
+
+
+def test_path_for_forgets_deleted_files_and_rejects_traversal(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'processed'))
+    path = write(tmp_path / 'processed', 'book.xlsx')
+    store.add(path)
+    write(tmp_path, 'secret.xlsx')
+
+    assert store.path_for('../secret.xlsx') is None
+    os.remove(path)
+    assert store.path_for('book.xlsx') is None
+    assert store.stats()['files'] == 0
+
+
+def test_new_paths_are_unique(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    assert store.new_path('batch') != store.new_path('batch')
+
+
+def test_remove_orphans_only_removes_old_files(tmp_path):
+    write(tmp_path, 'stale.pdf', age=7200)
+    write(tmp_path, 'fresh.pdf', age=10)
+    os.makedirs(tmp_path / 'sub')
+
+    assert remove_orphans(str(tmp_path), 3600) == 1
+    assert sorted(os.listdir(tmp_path)) == ['fresh.pdf', 'sub']
+    assert remove_orphans(str(tmp_path / 'missing'), 3600) == 0
+
+
+def test_sweep_keeps_artifacts_and_adopts_unindexed_ones(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'processed'))
+    # Written by another process (e.g. cli.py) after the store was seeded
+    adopted = write(tmp_path / 'processed', 'from_cli.xlsx', 4, age=7200)
+    write(tmp_path / 'processed', 'first_two_pages_x.pdf', age=7200)
+    outside = write(tmp_path, 'other.xlsx', age=7200)
+
+    removed = remove_orphans(store.folder, 3600, keep=store._keep)
+
+    assert removed == 1
+    assert os.listdir(store.folder) == ['from_cli.xlsx']
+    assert store.stats() == {'files': 1, 'bytes': 4}
+    assert store.path_for('from_cli.xlsx') == adopted
+    assert not store._keep(outside)
+
+
+def test_sweep_spares_the_uploads_of_a_queued_job(client, folders, monkeypatch):
+    uploads = folders[0]
+    controller = AdmissionController(max_files=1)
+    running = controller.reserve(1)
+    monkeypatch.setattr(app, 'admission', controller)
+    monkeypatch.setattr(app, 'job_manager', JobManager(max_workers=1))
+
+    response = client.post('/upload?mode=async', data={'files': (io.BytesIO(b'%PDF-1.4'), 'a.pdf')},
+                           content_type='multipart/form-data')
+    job = app.job_manager.get(response.get_json()['job_id'])
+    (queued,) = os.listdir(uploads)
+    stamp = time.time() - 7200
+    os.utime(os.path.join(uploads, queued), (stamp, stamp))
+    # Left behind by a server process that has exited, and by one that is still running
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    write(uploads, f'{exited.pid}-0000abcd_old.pdf', age=7200)
+    write(uploads, f'{os.getppid()}-0000abcd_busy.pdf', age=7200)
+
+    removed = remove_orphans(uploads, 3600, keep=app.upload_in_use)
+
+    assert job.status == 'queued'
+    assert removed == 1
+    assert sorted(os.listdir(uploads)) == sorted([queued, f'{os.getppid()}-0000abcd_busy.pdf'])
+
+    running.release()
+    deadline = time.time() + 10
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.05)
+    assert job.finished
+    assert not app.upload_in_use(os.path.join(uploads, queued))
+
+
+def test_download_resolves_through_the_store(client, folders):
+    path = write(folders[1], 'result.xlsx')
+    app.artifact_store.add(path)
+
+    assert client.get('/download-excel?file=result.xlsx').status_code == 200
+    assert client.get('/download-excel?file=missing.xlsx').status_code == 404
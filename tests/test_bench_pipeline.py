@@ -0,0 +1,34 @@
+import os
+import random
+
+import app
+import bench_pipeline
+from corpus import project_id, scorecard_lines, write_corpus
+
+
+def test_corpus_pdfs_parse_like_their_text(tmp_path):
+    pdfs = write_corpus(str(tmp_path), 3, seed=5)
+    rng = random.Random(5)
+
+    for index, path in enumerate(pdfs):
+        lines = scorecard_lines(rng, project_id(index), features_per_concept=4)
+        markdown, error = app.extract_markdown_from_file(path, os.path.basename(path))
+
+        assert error is None
+        assert app.parse_well_markdown(markdown) == app.parse_well_markdown("\n".join(lines))
+        assert app.parse_well_markdown(markdown)['project_id'] == project_id(index)
+
+
+def test_bench_batch_times_every_stage(tmp_path, template, folders, client, monkeypatch):
+    monkeypatch.setattr(app, 'scorecard_cache', None)
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'max_workers', 1)
+    pdfs = write_corpus(str(tmp_path), 2)
+
+    run = bench_pipeline.bench_batch(pdfs, client)
+
+    assert run['batch_size'] == 2
+    assert set(run['stages']) == {'extract_first_two_pages', 'convert_to_markdown', 'extract_markdown_from_file',
+                                  'parse_well_markdown', 'create_combined_excel', 'upload_end_to_end'}
+    assert all(stage['seconds'] > 0 for stage in run['stages'].values())
+    # Generated workbooks are removed again
+    assert os.listdir(folders[1]) == []
@@ -0,0 +1,113 @@
+import os
+import time
+
+import app
+from cache import ScorecardCache
+
+ENTRY = {'markdown': '# scorecard', 'parsed': {'project_id': '123456789'}}
+
+
+def test_memory_then_disk(tmp_path):
+    cache = ScorecardCache(str(tmp_path), version=1)
+    assert cache.get('a' * 64) is None
+
+    cache.put('a' * 64, ENTRY)
+
+    assert cache.get('a' * 64) == ENTRY
+    # A new process (or a restart) finds the entry on disk
+    assert ScorecardCache(str(tmp_path), version=1).get('a' * 64) == ENTRY
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'memory_entries': 1, 'disk_entries': 1,
+                             'disk_bytes': os.path.getsize(tmp_path / f"{'a' * 64}-v1.json")}
+
+
+def test_other_version_is_a_miss(tmp_path):
+    ScorecardCache(str(tmp_path), version=1).put('a' * 64, ENTRY)
+
+    assert ScorecardCache(str(tmp_path), version=2).get('a' * 64) is None
+
+
+def test_expired_entries_are_removed(tmp_path):
+    ScorecardCache(str(tmp_path), version=1).put('a' * 64, ENTRY)
+    path = tmp_path / f"{'a' * 64}-v1.json"
+    old = time.time() - 7200
+    os.utime(path, (old, old))
+
+    cache = ScorecardCache(str(tmp_path), version=1, max_age=3600)
+
+    assert cache.get('a' * 64) is None
+    assert not path.exists()
+
+
+def test_oldest_entries_are_evicted_past_the_size_limit(tmp_path):
+    cache = ScorecardCache(str(tmp_path), version=1, memory_entries=0, max_disk_bytes=2000)
+    entry = {'markdown': 'x' * 200, 'parsed': {}}
+
+    for i in range(20):
+        cache.put(f'{i:064d}', entry)
+
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 2000
+    assert cache.get(f'{19:064d}') is not None
+    assert cache.get(f'{0:064d}') is None
+
+
+def test_cached_uploads_skip_processing(tmp_path, monkeypatch):
+    calls = []
+
+    def process(file_path, filename, file_size):
+        calls.append(filename)
+        os.remove(file_path)
+        return {'filename': filename, 'status': 'success', 'markdown': '# md', 'parsed': {'project_id': '1'},
+                'file_size': file_size}
+
+    monkeypatch.setattr(app, 'process_pdf_file', process)
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'max_workers', 1)
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'isolate_files', False)
+    monkeypatch.setattr(app, 'scorecard_cache', ScorecardCache(str(tmp_path / 'cache'), version=1))
+
+    def upload():
+        path = tmp_path / 'a.pdf'
+        path.write_bytes(b'%PDF')
+        return [app.SavedUpload('a.pdf', str(path), 4, 'b' * 64)]
+
+    first = list(app.iter_saved_files(upload()))
+    second = list(app.iter_saved_files(upload()))
+
+    assert calls == ['a.pdf']
+    assert second[0]['cached'] and second[0]['parsed'] == first[0]['parsed']
+    assert not (tmp_path / 'a.pdf').exists()
+
+
+def test_entry_written_by_another_process_is_a_hit(tmp_path):
+    writer = ScorecardCache(str(tmp_path), version=1)
+    reader = ScorecardCache(str(tmp_path), version=1)  # e.g. another gunicorn worker
+
+    writer.put('a' * 64, ENTRY)
+
+    assert reader.get('a' * 64) == ENTRY
+    assert reader.stats()['hits'] == 1
+
+
+def test_entry_evicted_by_another_process_is_a_miss(tmp_path):
+    writer = ScorecardCache(str(tmp_path), version=1, memory_entries=0)
+    reader = ScorecardCache(str(tmp_path), version=1, memory_entries=0)
+    writer.put('a' * 64, ENTRY)
+    assert reader.get('a' * 64) == ENTRY
+
+    os.remove(os.path.join(str(tmp_path), f"{'a' * 64}-v1.json"))
+
+    assert reader.get('a' * 64) is None
+
+
+def test_eviction_bounds_the_shared_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr('cache.EVICT_INTERVAL', 0)
+    first = ScorecardCache(str(tmp_path), version=1, max_disk_bytes=4000)
+    second = ScorecardCache(str(tmp_path), version=1, max_disk_bytes=4000)
+    entry = {'markdown': 'x' * 200, 'parsed': {}}
+
+    for i in range(20):
+        (first if i % 2 else second).put(f'{i:064d}', entry)
+
+    on_disk = sum(f.stat().st_size for f in tmp_path.iterdir())
+    assert on_disk <= 4000
+    # The newest entries survive
+    assert first.get(f'{19:064d}') is not None
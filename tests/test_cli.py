@@ -0,0 +1,81 @@
+import csv
+import json
+import os
+
+from openpyxl import load_workbook
+
+import app
+import cli
+from corpus import project_id, write_corpus
+
+
+def run(tmp_path, *args):
+    return cli.main([str(tmp_path / 'pdfs'), '-j', '2', '--state', str(tmp_path / 'state.jsonl'),
+                     '--errors', str(tmp_path / 'errors.csv'), *args])
+
+
+def project_ids(path):
+    ws = load_workbook(path).active
+    id_col = app.TemplateSchema.from_worksheet(ws).field_col('Project ID')
+    return [ws.cell(row, id_col).value for row in range(4, ws.max_row + 1)]
+
+
+def state_lines(tmp_path):
+    with open(tmp_path / 'state.jsonl', encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def write_state(state_path, entries):
+    with open(state_path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
+
+
+def test_convert_and_resume(tmp_path, template, monkeypatch):
+    monkeypatch.setattr(app, 'scorecard_cache', None)
+    os.makedirs(tmp_path / 'pdfs' / 'nested')
+    write_corpus(str(tmp_path / 'pdfs'), 2)
+    write_corpus(str(tmp_path / 'pdfs' / 'nested'), 1, seed=1)
+    (tmp_path / 'pdfs' / 'broken.pdf').write_bytes(b'not a pdf')
+
+    assert run(tmp_path, '-o', str(tmp_path / 'first.xlsx')) == 0
+
+    # Rows follow the sorted paths: nested/ comes before the top-level files
+    assert project_ids(tmp_path / 'first.xlsx') == [project_id(0), project_id(0), project_id(1)]
+    with open(tmp_path / 'errors.csv', newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert [row[0] for row in rows] == ['filename', 'broken.pdf']
+    assert len(state_lines(tmp_path)) == 4
+
+    # Only the failed file is converted again; the others come from the state file
+    assert run(tmp_path, '-o', str(tmp_path / 'second.xlsx'), '--resume') == 0
+    assert project_ids(tmp_path / 'second.xlsx') == project_ids(tmp_path / 'first.xlsx')
+    assert len(state_lines(tmp_path)) == 5
+
+
+def test_no_pdfs(tmp_path):
+    os.makedirs(tmp_path / 'pdfs')
+
+    assert run(tmp_path) == 2
+
+
+def test_count_reusable_checks_size_and_mtime(tmp_path):
+    same, changed, failed, new = (str(tmp_path / f'{name}.pdf') for name in ('same', 'changed', 'failed', 'new'))
+    for path in (same, changed, failed, new):
+        with open(path, 'wb') as f:
+            f.write(b'%PDF-1.4')
+    state_path = str(tmp_path / 'state.jsonl')
+    write_state(state_path, [
+        dict(cli.file_key(same), status='success', result={}),
+        dict(cli.file_key(changed), status='success', result={}),
+        dict(cli.file_key(failed), status='error', result={}),
+    ])
+    with open(changed, 'ab') as f:
+        f.write(b' edited')
+
+    previous = cli.load_state(state_path)
+
+    assert sorted(previous) == sorted([same, changed])
+    assert cli.count_reusable([same, changed, failed, new], previous) == 1
+    os.remove(same)
+    assert cli.count_reusable([same, changed, failed, new], previous) == 0
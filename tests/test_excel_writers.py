@@ -0,0 +1,53 @@
+import pytest
+from openpyxl import load_workbook
+
+import app
+
+VALUES = [1.0, 0.5, 'p', 'Pending Documentation', 'Not Applicable', 2.0, None]
+
+
+def results(count):
+    codes = sorted(app.load_template()[1].code_cols)
+    out = [{'status': 'error', 'filename': 'bad.pdf', 'message': 'unreadable'}]
+    for n in range(count):
+        parts = [{'code': code, 'value': VALUES[(n + i) % len(VALUES)]}
+                 for i, code in enumerate(codes) if VALUES[(n + i) % len(VALUES)] is not None]
+        out.append({'status': 'success', 'filename': f'{n}.pdf', 'parsed': {
+            'project_id': f'0220000000{n:02d}', 'project_name': f'Project {n}', 'date_cert': '01/02/2024',
+            'parts': parts}})
+    return out
+
+
+def uploads_for(batch):
+    """SavedUploads standing in for the files of a results() batch (for a stubbed iter_saved_files)."""
+    return [app.SavedUpload(r['filename'], '', 0, f'{i:064d}') for i, r in enumerate(batch)]
+
+
+def cells(path):
+    ws = load_workbook(path).active
+    return ws, {(cell.row, cell.column): (cell.value, cell.number_format, cell.alignment.horizontal)
+                for row in ws.iter_rows() for cell in row if cell.value is not None}
+
+
+@pytest.mark.parametrize("count", [0, 1, 12])
+def test_streaming_writer_matches_the_template_writer(template, folders, monkeypatch, count):
+    monkeypatch.setitem(app.EXCEL_CONFIG, 'streaming_min_rows', None)
+    in_memory, error = app.create_combined_excel(results(count))
+    assert error is None
+    streamed, error = app.create_streaming_excel(results(count))
+    assert error is None
+
+    ws_memory, expected = cells(in_memory)
+    ws_streamed, actual = cells(streamed)
+    assert actual == expected
+    assert sorted(map(str, ws_streamed.merged_cells.ranges)) == sorted(map(str, ws_memory.merged_cells.ranges))
+    assert len(expected) > 0
+
+
+def test_large_batches_switch_to_streaming(template, folders, monkeypatch):
+    monkeypatch.setitem(app.EXCEL_CONFIG, 'streaming_min_rows', 3)
+
+    for expected_rows, writer_type in ((2, app.TemplateExcelWriter), (3, app.StreamingExcelWriter)):
+        writer = app.excel_writer(expected_rows)
+        assert type(writer) is writer_type
+        assert writer.close()[1] is None
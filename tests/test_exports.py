@@ -0,0 +1,122 @@
+import csv
+import json
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+import app
+from test_excel_writers import results, uploads_for
+
+
+def normalize(value):
+    """Compare cell values across formats: numbers as floats, blanks as None, the rest as text."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def xlsx_rows(path):
+    """Data rows of a workbook over the template's columns (exports have one column per template column)."""
+    ws = load_workbook(path).active
+    max_col = app.load_template_schema().max_col
+    return [[normalize(v) for v in row]
+            for row in ws.iter_rows(min_row=app.DATA_START_ROW, max_col=max_col, values_only=True)]
+
+
+@pytest.fixture
+def batch(template, folders, monkeypatch):
+    """Run a 5-project batch through process_batch with the given formats; returns the response data."""
+    batch_results = results(5)
+    monkeypatch.setattr(app, 'iter_saved_files', lambda saved_files, on_result=None: iter(batch_results))
+
+    def run(formats):
+        response, error = app.process_batch(uploads_for(batch_results), formats=formats)
+        assert error is None
+        return response
+    return run
+
+
+def test_csv_and_jsonl_rows_match_the_workbook(batch, folders):
+    response = batch(('xlsx', 'csv', 'jsonl'))
+    stem = os.path.splitext(response['excel_filename'])[0]
+    assert response['exports'] == {'csv': stem + '.csv', 'jsonl': stem + '.jsonl'}
+    expected = xlsx_rows(os.path.join(folders[1], response['excel_filename']))
+    columns = app.load_template_schema().column_names
+
+    with open(os.path.join(folders[1], stem + '.csv'), newline='', encoding='utf-8') as f:
+        header, *rows = list(csv.reader(f))
+    assert header == columns
+    assert [[normalize(v) for v in row] for row in rows] == expected
+
+    with open(os.path.join(folders[1], stem + '.jsonl'), encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert all(list(record) == columns for record in records)
+    assert [[normalize(v) for v in record.values()] for record in records] == expected
+    assert len(expected) == 5
+
+
+def test_column_names_are_unique(template):
+    columns = app.load_template_schema().column_names
+    assert len(columns) == len(set(columns)) == app.load_template_schema().max_col
+
+
+def test_exports_without_a_workbook(batch, folders):
+    response = batch(('csv',))
+    assert 'excel_filename' not in response
+    assert sorted(os.listdir(folders[1])) == [response['exports']['csv']]
+
+
+def test_parquet_matches_the_workbook(batch, folders):
+    pd = pytest.importorskip('pandas')
+    pytest.importorskip('pyarrow')
+    response = batch(('xlsx', 'parquet'))
+
+    df = pd.read_parquet(os.path.join(folders[1], response['exports']['parquet']))
+
+    assert list(df.columns) == app.load_template_schema().column_names
+    rows = [[None if pd.isna(v) else normalize(v) for v in row] for row in df.itertuples(index=False)]
+    assert rows == xlsx_rows(os.path.join(folders[1], response['excel_filename']))
+
+
+def test_parquet_without_pyarrow_is_a_clean_error(template, folders, monkeypatch):
+    def missing_engine(self, *args, **kwargs):
+        raise ImportError("Unable to find a usable engine")
+    monkeypatch.setattr(pytest.importorskip('pandas').DataFrame, 'to_parquet', missing_engine)
+
+    writer = app.TableExportWriter('parquet', os.path.join(folders[1], 'x.parquet'))
+    path, error = app.write_all(writer, results(2))
+
+    assert path is None
+    assert error == "Parquet export requires pyarrow (pip install pyarrow)"
+
+
+def test_a_failed_export_removes_the_saved_workbook(template, folders, monkeypatch):
+    def missing_engine(self, *args, **kwargs):
+        raise ImportError("Unable to find a usable engine")
+    monkeypatch.setattr(pytest.importorskip('pandas').DataFrame, 'to_parquet', missing_engine)
+    batch_results = results(2)
+    monkeypatch.setattr(app, 'iter_saved_files', lambda saved_files, on_result=None: iter(batch_results))
+
+    response, error = app.process_batch(uploads_for(batch_results), formats=('xlsx', 'csv', 'parquet'))
+
+    assert (response, error) == (None, "Parquet export requires pyarrow (pip install pyarrow)")
+    assert os.listdir(folders[1]) == []
+
+
+def test_upload_and_download_exports(template, folders, upload, make_pdf, client):
+    pdf = make_pdf('a.pdf', ["123456789 - Tower", "A01.1 Air quality 1 Achieved 1"])
+
+    response = upload([pdf], '/upload?formats=xlsx,csv')
+    assert response.status_code == 200
+    excel_filename = response.get_json()['excel_filename']
+
+    download = client.get(f'/download-excel?file={excel_filename}&format=csv')
+    assert download.status_code == 200
+    assert download.mimetype == 'text/csv'
+    assert client.get(f'/download-excel?file={excel_filename}&format=jsonl').status_code == 404
+    assert client.get(f'/download-excel?file={excel_filename}&format=pdf').status_code == 400
+    assert upload([pdf], '/upload?formats=xlsx,docx').status_code == 400
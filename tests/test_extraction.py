@@ -0,0 +1,40 @@
+import os
+
+import app
+
+PAGES = [f"Page {n} line {i}" for n in (1, 2, 3) for i in range(3)]
+
+
+def test_single_pass_matches_the_two_step_path(make_pdf, folders, monkeypatch):
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'page_mode', 'fixed')
+    path = make_pdf('card.pdf', PAGES, lines_per_page=3)
+
+    markdown, error = app.extract_markdown_from_file(path, 'card.pdf')
+
+    first_two, error2 = app.extract_first_two_pages(path)
+    expected, error3 = app.convert_to_markdown(first_two)
+    assert error is None and error2 is None and error3 is None
+    assert markdown == expected.replace(os.path.basename(first_two), 'card.pdf')
+    assert 'Page 2 line 2' in markdown and 'Page 3' not in markdown
+
+
+def test_single_pass_writes_no_intermediate_file(make_pdf, folders):
+    path = make_pdf('card.pdf', PAGES, lines_per_page=3)
+
+    result = app.process_pdf_file(path, 'card.pdf', os.path.getsize(path))
+
+    assert result['status'] == 'success'
+    assert os.listdir(folders[1]) == []
+    assert not os.path.exists(path)
+
+
+def test_unreadable_files_are_errors(tmp_path):
+    empty = tmp_path / 'empty.pdf'
+    empty.write_bytes(b'')
+    garbage = tmp_path / 'garbage.pdf'
+    garbage.write_bytes(b'not a pdf')
+
+    markdown, error = app.extract_markdown_from_file(str(empty), 'empty.pdf')
+    assert markdown is None and error.startswith("Error extracting pages") and 'empty' in error.lower()
+    markdown, error = app.extract_markdown_from_file(str(garbage), 'garbage.pdf')
+    assert markdown is None and error.startswith("Error extracting pages")
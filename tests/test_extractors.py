@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+import app
+import extractors
+from extractors import Backend, backend_chain
+
+pymupdf_only = pytest.mark.skipif(not extractors.BACKENDS['pymupdf'].available, reason="pymupdf not installed")
+
+LINES = ["123456789 - Tower", "Date: 01 Jan, 2024", "A01.1 Air quality 1 Achieved 1"]
+
+
+class BrokenDocument:
+    def __init__(self, source):
+        raise ValueError("cannot open")
+
+
+class BlankDocument(extractors.PyPDF2Document):
+    def page_text(self, index):
+        return ""
+
+
+def test_chain_prefers_installed_backends_in_order(monkeypatch):
+    assert [b.name for b in backend_chain('pypdf2', fallback=False)] == ['pypdf2']
+    assert [b.name for b in backend_chain('auto')] == extractors.available_backends()
+
+    monkeypatch.setattr(extractors.BACKENDS['pymupdf'], 'available', False)
+    assert [b.name for b in backend_chain('auto')] == ['pypdf2']
+
+
+def test_pypdf2_is_the_default_backend():
+    assert app.PROCESSING_CONFIG['extraction_backend'] == 'pypdf2'
+    assert app.EXTRACTION_BACKENDS[0].name == 'pypdf2'
+
+
+def test_chain_rejects_unknown_or_missing_backends(monkeypatch):
+    with pytest.raises(ValueError, match="Unknown extraction backend 'pdfminer'"):
+        backend_chain('pdfminer')
+
+    monkeypatch.setattr(extractors.BACKENDS['pymupdf'], 'available', False)
+    with pytest.raises(ValueError, match="'pymupdf' is not installed"):
+        backend_chain('pymupdf')
+
+
+@pymupdf_only
+def test_backends_agree_on_the_parse(make_pdf):
+    path = make_pdf('card.pdf', LINES)
+    parses = []
+    for name in ('pymupdf', 'pypdf2'):
+        extraction, error = app.extract_markdown(path, 'card.pdf', 2, backends=[extractors.BACKENDS[name]])
+        assert error is None and extraction.backend == name
+        parses.append(app.parse_well_markdown(extraction.markdown))
+    assert parses[0] == parses[1]
+
+
+@pymupdf_only
+def test_pymupdf_failure_falls_back_to_pypdf2(make_pdf, monkeypatch):
+    monkeypatch.setattr(extractors.PyMuPDFDocument, 'page_text', lambda self, index: "")
+    path = make_pdf('card.pdf', LINES)
+
+    extraction, error = app.extract_markdown(path, 'card.pdf', 2, backends=backend_chain('pymupdf'))
+
+    assert error is None
+    assert (extraction.backend, extraction.fallbacks) == ('pypdf2', ['pymupdf'])
+    assert 'A01.1' in extraction.markdown
+
+
+def test_no_backend_can_read_the_pdf(make_pdf):
+    path = make_pdf('card.pdf', LINES)
+    broken = [Backend('first', BrokenDocument, 'PyPDF2'), Backend('second', BrokenDocument, 'PyPDF2')]
+
+    assert app.extract_markdown(path, 'card.pdf', 2, backends=broken) == (None, "Error extracting pages: cannot open")
+
+
+def test_text_free_pdfs_keep_the_first_backends_markdown(make_pdf):
+    path = make_pdf('card.pdf', LINES)
+    blank = [Backend('blank', BlankDocument, 'PyPDF2'), Backend('broken', BrokenDocument, 'PyPDF2')]
+
+    extraction, error = app.extract_markdown(path, 'card.pdf', 2, backends=blank)
+
+    assert error is None
+    assert (extraction.backend, extraction.fallbacks) == ('blank', [])
+    assert extraction.markdown == '# PDF Document: card.pdf\n'
+
+
+def test_fallbacks_are_counted_in_metrics(make_pdf, monkeypatch):
+    chain = [Backend('broken', BrokenDocument, 'PyPDF2'), extractors.BACKENDS['pypdf2']]
+    monkeypatch.setattr(app, 'EXTRACTION_BACKENDS', chain)
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'max_workers', 1)
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'isolate_files', False)
+    monkeypatch.setattr(app, 'scorecard_cache', None)
+    path = make_pdf('card.pdf', LINES)
+    before = (app.EXTRACTIONS.value(backend='pypdf2'), app.EXTRACTION_FALLBACKS.value(backend='broken'))
+
+    results = list(app.iter_saved_files([app.SavedUpload('card.pdf', path, 1, '0' * 64)]))
+
+    assert results[0]['status'] == 'success' and 'extraction' not in results[0]
+    assert app.EXTRACTIONS.value(backend='pypdf2') == before[0] + 1
+    assert app.EXTRACTION_FALLBACKS.value(backend='broken') == before[1] + 1
+    assert f'pdfconvert_extraction_fallbacks_total{{backend="broken",pid="{os.getpid()}"}}' in app.metrics.render()
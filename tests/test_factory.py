@@ -0,0 +1,130 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import app
+import config
+from artifacts import ArtifactStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_env_ints(monkeypatch):
+    assert config._env_int('TEST_VALUE', 7) == 7
+    monkeypatch.setenv('PDFCONVERT_TEST_VALUE', ' ')
+    assert config._env_int('TEST_VALUE', 7) == 7
+    monkeypatch.setenv('PDFCONVERT_TEST_VALUE', ' 12 ')
+    assert config._env_int('TEST_VALUE', 7) == 12
+
+    monkeypatch.setenv('PDFCONVERT_TEST_VALUE', '2.5')
+    with pytest.raises(ValueError, match="PDFCONVERT_TEST_VALUE must be a whole number, got '2.5'"):
+        config._env_int('TEST_VALUE', 7)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ('1', True), ('true', True), ('Yes', True), (' ON ', True),
+    ('0', False), ('false', False), ('No', False), ('off', False), ('', None),
+])
+def test_env_bool_spellings(monkeypatch, value, expected):
+    monkeypatch.setenv('PDFCONVERT_TEST_FLAG', value)
+    assert config._env_bool('TEST_FLAG', None) is expected
+
+
+def test_env_bool_rejects_other_values(monkeypatch):
+    monkeypatch.setenv('PDFCONVERT_TEST_FLAG', 'enabled')
+    with pytest.raises(ValueError, match="PDFCONVERT_TEST_FLAG must be one of"):
+        config._env_bool('TEST_FLAG', False)
+
+
+def test_create_app(tmp_path, monkeypatch):
+    uploads, processed = str(tmp_path / 'uploads'), str(tmp_path / 'processed')
+    os.makedirs(processed)
+    with open(os.path.join(processed, 'earlier.xlsx'), 'wb') as f:
+        f.write(b'x' * 5)
+    monkeypatch.setattr(app, 'UPLOAD_FOLDER', uploads)
+    monkeypatch.setattr(app, 'PROCESSED_FOLDER', processed)
+    monkeypatch.setattr(app, 'artifact_store', ArtifactStore(processed))
+    monkeypatch.setattr(app, 'scorecard_cache', None)
+    monkeypatch.setitem(app.CACHE_CONFIG, 'folder', str(tmp_path / 'cache'))
+
+    flask_app = app.create_app({'TESTING': True, 'MAX_CONTENT_LENGTH': 1024}, warm=False)
+
+    assert flask_app.config['TESTING'] and flask_app.config['MAX_CONTENT_LENGTH'] == 1024
+    assert os.path.isdir(uploads)
+    # Existing workbooks are indexed and the cache is opened in the configured folder
+    assert app.artifact_store.stats() == {'files': 1, 'bytes': 5}
+    assert app.scorecard_cache is not None and os.path.isdir(tmp_path / 'cache')
+    assert {'/upload', '/metrics', '/download-excel'} <= {rule.rule for rule in flask_app.url_map.iter_rules()}
+    assert f'pdfconvert_startup_seconds{{phase="init",pid="{os.getpid()}"}}' in app.metrics.render()
+
+
+def test_wsgi_reads_the_environment(tmp_path):
+    env = dict(os.environ, PDFCONVERT_UPLOAD_FOLDER=str(tmp_path / 'up'),
+               PDFCONVERT_PROCESSED_FOLDER=str(tmp_path / 'out'), PDFCONVERT_CACHE_FOLDER=str(tmp_path / 'cache'),
+               PDFCONVERT_JOB_FOLDER=str(tmp_path / 'jobs'), PDFCONVERT_MAX_CONTENT_MB='3',
+               PDFCONVERT_MAX_WORKERS='1', PDFCONVERT_DEBUG='no')
+    script = ("import json, app, wsgi; print(json.dumps([wsgi.app.config['MAX_CONTENT_LENGTH'], "
+              "app.process_pool_size(), app.DEBUG, app.scorecard_cache is not None]))")
+
+    out = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+    assert json.loads(out.stdout.splitlines()[-1]) == [3 * 1024 * 1024, 1, False, True]
+    assert os.path.isdir(tmp_path / 'up') and os.path.isdir(tmp_path / 'out') and os.path.isdir(tmp_path / 'cache')
+
+
+def test_numpy_and_pandas_load_on_warm_up_not_import():
+    script = ("import json, sys, app; loaded = lambda: [m in sys.modules for m in ('numpy', 'pandas')]; "
+              "before = loaded(); app.warm_up(); print(json.dumps([before, loaded()]))")
+
+    out = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert json.loads(out.stdout.splitlines()[-1]) == [[False, False], [True, False]]
+
+
+def test_invalid_environment_fails_at_startup(tmp_path):
+    env = dict(os.environ, PDFCONVERT_PORT='http')
+
+    out = subprocess.run([sys.executable, '-c', 'import config'], cwd=ROOT, env=env, capture_output=True, text=True)
+
+    assert out.returncode != 0
+    assert "PDFCONVERT_PORT must be a whole number, got 'http'" in out.stderr
+
+
+@pytest.fixture
+def sweeper_store(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path))
+    monkeypatch.setattr(app, 'artifact_store', store)
+    monkeypatch.setitem(app.CLEANUP_CONFIG, 'auto_cleanup', True)
+    monkeypatch.setattr(app, '_background_started', set())
+    yield store
+    store.stop_sweeper()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="post_fork only applies to forking servers")
+def test_post_fork_restarts_the_sweeper(sweeper_store, monkeypatch):
+    monkeypatch.setenv('PDFCONVERT_MAX_WORKERS', '1')
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(ROOT, 'gunicorn.conf.py'))
+    gunicorn_conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gunicorn_conf)
+
+    # The preloading master starts its sweeper once
+    app.start_background_tasks()
+    master_sweeper = sweeper_store._sweeper
+    app.start_background_tasks()
+    assert sweeper_store._sweeper is master_sweeper and master_sweeper.is_alive()
+
+    pid = os.fork()
+    if pid == 0:
+        # Forked worker: the master's thread is gone until post_fork starts a new one
+        ok = False
+        try:
+            gunicorn_conf.post_fork(None, None)
+            ok = sweeper_store._sweeper is not master_sweeper and sweeper_store._sweeper.is_alive()
+        finally:
+            os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
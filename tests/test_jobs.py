@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import app
+from admission import AdmissionController
+from jobs import Job, JobManager
+
+
+def wait_until_finished(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = JobManager(max_workers=1, job_ttl=60)
+    monkeypatch.setattr(app, 'job_manager', manager)
+    return manager
+
+
+def test_progress_then_result(client, manager):
+    release = threading.Event()
+
+    def batch(job):
+        job.set_file_result(0, {'filename': 'a.pdf', 'status': 'success', 'message': 'ok'})
+        release.wait(5)
+        job.set_file_result(1, {'filename': 'b.pdf', 'status': 'error', 'message': 'bad'})
+        job.complete({'results': [{'filename': 'a.pdf'}, {'filename': 'b.pdf'}], 'excel_filename': 'out.xlsx',
+                      'message': 'done'})
+
+    job = manager.submit(['a.pdf', 'b.pdf'], batch)
+    deadline = time.monotonic() + 5
+    while job.to_dict()['completed'] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    status = client.get(f'/jobs/{job.id}').get_json()
+    assert (status['status'], status['total'], status['completed']) == ('running', 2, 1)
+    assert client.get(f'/jobs/{job.id}/result').status_code == 202
+
+    release.set()
+    assert wait_until_finished(job) == 'completed'
+    status = client.get(f'/jobs/{job.id}').get_json()
+    assert [f['status'] for f in status['files']] == ['success', 'error']
+    assert status['excel_filename'] == 'out.xlsx'
+    result = client.get(f'/jobs/{job.id}/result').get_json()
+    assert (result['excel_filename'], result['message']) == ('out.xlsx', 'done')
+
+
+def test_failures_are_reported(client, manager):
+    def broken(job):
+        raise RuntimeError('disk full')
+
+    job = manager.submit(['a.pdf'], broken)
+
+    assert wait_until_finished(job) == 'failed'
+    response = client.get(f'/jobs/{job.id}/result')
+    assert response.status_code == 500
+    assert 'disk full' in response.get_json()['error']
+
+
+def test_job_without_a_result_fails(manager):
+    job = manager.submit(['a.pdf'], lambda job: None)
+
+    assert wait_until_finished(job) == 'failed'
+
+
+def test_finished_jobs_are_forgotten_after_the_ttl(client, manager):
+    job = manager.submit(['a.pdf'], lambda job: job.complete({'message': 'done'}))
+    wait_until_finished(job)
+    job.finished_at -= 120
+
+    manager.submit(['b.pdf'], lambda job: job.complete({'message': 'done'}))
+
+    assert manager.get(job.id) is None
+    assert client.get(f'/jobs/{job.id}').status_code == 404
+
+
+def test_status_changes_reach_other_processes(tmp_path, monkeypatch):
+    folder = str(tmp_path / 'jobs')
+    manager, other = JobManager(max_workers=1, folder=folder), JobManager(folder=folder)
+    controller = AdmissionController(max_files=1)
+    running = controller.reserve(1)
+    release = threading.Event()
+
+    def batch(*args, **kwargs):
+        release.wait(5)
+        return None, 'stopped'
+    monkeypatch.setattr(app, 'process_batch', batch)
+
+    job = manager.submit(['a.pdf'], app.run_upload_job, [], False, ('xlsx',), False, controller.reserve(1))
+    deadline = time.monotonic() + 5
+    while job.status != 'queued' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert other.get(job.id).status == 'queued'
+
+    running.release()
+    while job.status != 'running' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert other.get(job.id).status == 'running'
+
+    release.set()
+    assert wait_until_finished(job) == 'failed'
+    assert other.get(job.id).status == 'failed'
+
+
+def test_only_expired_snapshots_are_pruned(tmp_path):
+    folder = tmp_path / 'jobs'
+    os.makedirs(folder)
+    stamp = time.time() - 7200
+    jobs = (('queued', None), ('running', None), ('completed', stamp), ('failed', time.time()))
+    for status, finished_at in jobs:
+        job = Job(['a.pdf'])
+        job.status, job.created_at, job.finished_at = status, stamp, finished_at
+        path = folder / f'{job.id}.json'
+        path.write_text(json.dumps(job.snapshot()))
+        os.utime(path, (stamp, stamp))
+    (folder / 'broken.json').write_text('{')
+
+    manager = JobManager(job_ttl=3600, folder=str(folder))
+    wait_until_finished(manager.submit(['b.pdf'], lambda job: job.complete({'message': 'done'})))
+
+    # The old finished job is gone; unfinished ones stay however old, as does the unreadable file
+    snapshots = [json.loads(path.read_text()) for path in folder.glob('*.json') if path.name != 'broken.json']
+    assert sorted((job['status'], job['finished_at'] == stamp) for job in snapshots) == [
+        ('completed', False), ('failed', False), ('queued', False), ('running', False)]
+    assert (folder / 'broken.json').exists()
@@ -0,0 +1,94 @@
+import json
+import os
+import random
+
+import pytest
+from openpyxl import load_workbook
+
+import app
+from corpus import scorecard_markdown, write_corpus
+
+
+@pytest.fixture
+def master_path(tmp_path, template):
+    return str(tmp_path / 'master' / 'master.xlsx')
+
+
+def result(index, seed=0):
+    markdown = scorecard_markdown(random.Random(seed), index, features_per_concept=2)
+    return {'status': 'success', 'filename': f'scorecard_{index}.pdf', 'parsed': app.parse_well_markdown(markdown)}
+
+
+def project_rows(master_path):
+    ws = load_workbook(master_path).active
+    schema = app.TemplateSchema.from_worksheet(ws)
+    id_col = schema.field_col('Project ID')
+    return [ws.cell(row, id_col).value for row in range(app.DATA_START_ROW, ws.max_row + 1)]
+
+
+def read_index(master_path):
+    with open(app.master_index_path(master_path), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_insert_update_and_unchanged(master_path):
+    summary, error = app.upsert_master_excel([result(0), result(1)], master_path)
+    assert error is None
+    assert (summary['inserted'], summary['updated'], summary['unchanged']) == (2, 0, 0)
+
+    mtime = os.stat(master_path).st_mtime_ns
+    summary, error = app.upsert_master_excel([result(0), result(1)], master_path)
+    assert (summary['inserted'], summary['updated'], summary['unchanged']) == (0, 0, 2)
+    # Nothing changed, so the workbook isn't re-saved
+    assert os.stat(master_path).st_mtime_ns == mtime
+
+    summary, error = app.upsert_master_excel([result(1, seed=7), result(2)], master_path)
+    assert (summary['inserted'], summary['updated'], summary['unchanged']) == (1, 1, 0)
+    assert project_rows(master_path) == ['022000000000', '022000000001', '022000000002']
+
+    index = read_index(master_path)
+    assert index['next_row'] == app.DATA_START_ROW + 3
+    assert index['rows']['022000000001'][0] == app.DATA_START_ROW + 1
+
+
+def test_unknown_projects_are_always_appended(master_path):
+    unknown = {'status': 'success', 'filename': 'x.pdf',
+               'parsed': app.parse_well_markdown('No project here\nA01.1 Air Quality 1 Achieved')}
+    assert unknown['parsed']['project_id'] == 'Unknown'
+
+    app.upsert_master_excel([unknown], master_path)
+    summary, _ = app.upsert_master_excel([unknown], master_path)
+
+    assert summary['inserted'] == 1
+    assert len(project_rows(master_path)) == 2
+    assert read_index(master_path)['rows'] == {}
+
+
+def test_stale_index_is_rebuilt_from_the_sheet(master_path):
+    app.upsert_master_excel([result(0), result(1)], master_path)
+    # Edited outside the app: the index no longer matches the workbook
+    wb = load_workbook(master_path)
+    wb.save(master_path)
+
+    summary, error = app.upsert_master_excel([result(1), result(3)], master_path)
+
+    assert error is None
+    # Row digests are unknown after a rebuild, so the existing project is rewritten in place
+    assert (summary['inserted'], summary['updated'], summary['unchanged']) == (1, 1, 0)
+    assert project_rows(master_path) == ['022000000000', '022000000001', '022000000003']
+
+
+def test_upload_with_master(tmp_path, master_path, folders, upload, client, monkeypatch):
+    monkeypatch.setitem(app.MASTER_CONFIG, 'path', master_path)
+    monkeypatch.setattr(app, 'scorecard_cache', None)
+    pdfs = write_corpus(str(tmp_path), 2)
+
+    response = upload(pdfs, '/upload?master=1')
+
+    assert response.status_code == 200
+    master = response.get_json()['master']
+    assert (master['inserted'], master['updated'], master['unchanged']) == (2, 0, 0)
+    assert upload(pdfs, '/upload?master=1').get_json()['master']['unchanged'] == 2
+    download = client.get('/download-master')
+    assert download.status_code == 200
+    assert download.data[:2] == b'PK'
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+import app
+from metrics import MetricsRegistry
+
+
+def test_exposition_format():
+    registry = MetricsRegistry()
+    files = registry.counter('files_total', 'Files by outcome', ['status'])
+    speed = registry.gauge('speed', 'Files per second')
+    latency = registry.histogram('latency_seconds', 'Stage latency', ['stage'], buckets=(0.1, 1.0))
+    files.inc(status='success')
+    files.inc(2, status='error')
+    speed.set(2.5)
+    latency.observe(0.05, stage='parse')
+    latency.observe(0.5, stage='parse')
+    latency.observe(7, stage='parse')
+
+    assert registry.render().splitlines() == [
+        '# HELP files_total Files by outcome',
+        '# TYPE files_total counter',
+        'files_total{status="error"} 2',
+        'files_total{status="success"} 1',
+        '# HELP speed Files per second',
+        '# TYPE speed gauge',
+        'speed 2.5',
+        '# HELP latency_seconds Stage latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{stage="parse",le="0.1"} 1',
+        'latency_seconds_bucket{stage="parse",le="1"} 2',
+        'latency_seconds_bucket{stage="parse",le="+Inf"} 3',
+        'latency_seconds_sum{stage="parse"} 7.55',
+        'latency_seconds_count{stage="parse"} 3',
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter('errors_total', 'Errors', ['message']).inc(message='bad "file"\\n\n')
+
+    assert 'errors_total{message="bad \\"file\\"\\\\n\\n"} 1' in registry.render()
+
+
+def test_collectors_run_before_each_render():
+    registry = MetricsRegistry()
+    gauge = registry.gauge('entries', 'Cache entries')
+    sizes = iter([3, 5])
+    registry.add_collector(lambda: gauge.set(next(sizes)))
+
+    assert 'entries 3' in registry.render()
+    assert 'entries 5' in registry.render()
+
+
+def test_samples_are_labelled_with_the_process(monkeypatch):
+    registry = MetricsRegistry(process_label='pid')
+    registry.counter('files_total', 'Files by outcome', ['status']).inc(status='success')
+    registry.gauge('speed', 'Files per second').set(2)
+    registry.histogram('latency_seconds', 'Stage latency', buckets=(1.0,)).observe(0.5)
+    monkeypatch.setattr(os, 'getpid', lambda: 4242)
+
+    assert [line for line in registry.render().splitlines() if not line.startswith('#')] == [
+        'files_total{status="success",pid="4242"} 1',
+        'speed{pid="4242"} 2',
+        'latency_seconds_bucket{pid="4242",le="1"} 1',
+        'latency_seconds_bucket{pid="4242",le="+Inf"} 1',
+        'latency_seconds_sum{pid="4242"} 0.5',
+        'latency_seconds_count{pid="4242"} 1',
+    ]
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs fork")
+def test_forked_workers_report_their_own_pid():
+    registry = MetricsRegistry(process_label='pid')
+    registry.gauge('speed', 'Files per second').set(1)
+    read, write = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        os.write(write, registry.render().encode())
+        os._exit(0)
+    os.close(write)
+    os.waitpid(pid, 0)
+    with os.fdopen(read) as f:
+        child = f.read()
+
+    assert f'speed{{pid="{pid}"}} 1' in child
+    assert f'speed{{pid="{os.getpid()}"}} 1' in registry.render()
+
+
+def test_metrics_endpoint(client):
+    app.record_stage('parse', 0.002, 1000)
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type == MetricsRegistry.content_type
+    body = response.get_data(as_text=True)
+    assert '# TYPE pdfconvert_stage_duration_seconds histogram' in body
+    assert f'pdfconvert_stage_bytes_total{{stage="parse",pid="{os.getpid()}"}}' in body
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+import app
+from test_excel_writers import results, uploads_for
+from test_parallel import pool, saved  # noqa: F401 (pool is a fixture)
+
+
+def test_only_a_window_of_files_is_in_flight(tmp_path, pool, monkeypatch):
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'in_flight_per_worker', 1)
+    files = saved(tmp_path, *['sleep 0'] * 6)
+
+    batch = app.iter_saved_files(files)
+    first = next(batch)
+
+    assert first['filename'] == '0.pdf'
+    # 2 workers x 1 in flight: nothing past the window has been submitted yet
+    assert [os.path.exists(upload.path) for upload in files[2:]] == [True] * 4
+
+    batch.close()
+    # Abandoning the batch discards the uploads that were never processed
+    assert not os.listdir(tmp_path)
+
+
+def test_results_stream_in_upload_order(tmp_path, pool):
+    finished = []
+    files = saved(tmp_path, 'sleep 0.3', 'sleep 0', 'fail', 'sleep 0')
+
+    names = [r['filename'] for r in app.iter_saved_files(files, lambda index, result: finished.append(index))]
+
+    assert names == ['0.pdf', '1.pdf', '2.pdf', '3.pdf']
+    assert sorted(finished) == [0, 1, 2, 3]
+
+
+def test_a_failing_batch_leaves_no_partial_outputs(template, folders, monkeypatch):
+    def broken_batch(saved_files, on_result=None):
+        yield results(1)[1]
+        raise RuntimeError('worker pool gone')
+    monkeypatch.setattr(app, 'iter_saved_files', broken_batch)
+
+    with pytest.raises(RuntimeError):
+        app.process_batch(uploads_for(results(2)), formats=('xlsx', 'csv', 'jsonl'), lean=True)
+
+    assert os.listdir(folders[1]) == []
+
+
+def test_an_output_failing_to_close_removes_the_lean_markdown(template, folders, monkeypatch):
+    batch_results = results(2)
+    monkeypatch.setattr(app, 'iter_saved_files', lambda saved_files, on_result=None: iter(batch_results))
+
+    close = app.TableExportWriter.close
+
+    def full_disk(self):
+        if self.fmt != 'jsonl':
+            return close(self)
+        self.abort()
+        return None, "Error creating jsonl export: disk full"
+    monkeypatch.setattr(app.TableExportWriter, 'close', full_disk)
+
+    response, error = app.process_batch(uploads_for(batch_results), formats=('csv', 'jsonl'), lean=True)
+
+    assert (response, error) == (None, "Error creating jsonl export: disk full")
+    assert os.listdir(folders[1]) == []
+
+
+def test_lean_batches_drop_the_text_once_written(template, folders, monkeypatch):
+    batch_results = results(3)
+    monkeypatch.setattr(app, 'iter_saved_files', lambda saved_files, on_result=None: iter(batch_results))
+
+    response, error = app.process_batch(uploads_for(batch_results), formats=('xlsx', 'csv'), lean=True)
+
+    assert error is None
+    assert all('parsed' not in r and 'markdown' not in r for r in response['results'])
+    assert response['counts'] == {'total': 4, 'success': 3, 'error': 1}
+    assert sorted(os.listdir(folders[1])) == sorted([response['excel_filename'], response['exports']['csv'],
+                                                     response['batch_id'] + app.MARKDOWN_SUFFIX])
@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+import app
+
+
+def fake_process(file_path, filename, file_size):
+    """Stands in for process_pdf_file: the file's content says what to do."""
+    with open(file_path, 'rb') as f:
+        action = f.read().decode()
+    os.remove(file_path)
+    if action == 'crash':
+        os._exit(1)
+    if action == 'fail':
+        raise ValueError(f'cannot read {filename}')
+    if action.startswith('sleep'):
+        time.sleep(float(action.split()[1]))
+    return {'filename': filename, 'status': 'success', 'pid': os.getpid(), 'file_size': file_size}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(app, 'process_pdf_file', fake_process)
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'max_workers', 2)
+    monkeypatch.setattr(app, '_process_pool', None)
+    monkeypatch.setattr(app, 'scorecard_cache', None)
+    yield
+    if app._process_pool is not None:
+        app._process_pool.shutdown()
+
+
+def saved(tmp_path, *actions):
+    files = []
+    for i, action in enumerate(actions):
+        path = str(tmp_path / f'{i}.pdf')
+        with open(path, 'wb') as f:
+            f.write(action.encode())
+        files.append(app.SavedUpload(f'{i}.pdf', path, len(action), f'{i:064d}'))
+    return files
+
+
+def test_results_keep_upload_order(tmp_path, pool):
+    results = list(app.iter_saved_files(saved(tmp_path, 'sleep 0.3', 'sleep 0', 'sleep 0.1', 'sleep 0')))
+
+    assert [r['filename'] for r in results] == ['0.pdf', '1.pdf', '2.pdf', '3.pdf']
+    assert all(r['status'] == 'success' for r in results)
+    assert len({r['pid'] for r in results}) == 2
+    assert not os.listdir(tmp_path)
+
+
+def test_a_failing_file_only_fails_itself(tmp_path, pool):
+    results = list(app.iter_saved_files(saved(tmp_path, 'ok', 'fail', 'ok')))
+
+    assert [r['status'] for r in results] == ['success', 'error', 'success']
+    assert 'cannot read 1.pdf' in results[1]['message']
+
+
+def test_next_batch_runs_after_a_worker_crash(tmp_path, pool):
+    results = list(app.iter_saved_files(saved(tmp_path, 'crash')))
+    assert results[0]['status'] == 'error'
+    # The crashed worker's file is still removed
+    assert not os.listdir(tmp_path)
+
+    results = list(app.iter_saved_files(saved(tmp_path, 'ok', 'ok')))
+    assert [r['status'] for r in results] == ['success', 'success']
+
+
+def test_single_worker_is_still_isolated(tmp_path, pool, monkeypatch):
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'max_workers', 1)
+
+    results = list(app.iter_saved_files(saved(tmp_path, 'ok')))
+
+    assert results[0]['status'] == 'success' and results[0]['pid'] != os.getpid()
+
+
+def test_single_worker_runs_in_process_without_isolation(tmp_path, pool, monkeypatch):
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'max_workers', 1)
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'isolate_files', False)
+
+    results = list(app.iter_saved_files(saved(tmp_path, 'ok')))
+
+    assert results[0]['pid'] == os.getpid()
+
+
+def test_a_hung_file_times_out_and_the_batch_carries_on(tmp_path, pool, monkeypatch):
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'max_workers', 1)
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'file_timeout', 0.5)
+
+    results = list(app.iter_saved_files(saved(tmp_path, 'sleep 30', 'ok')))
+
+    assert [r['status'] for r in results] == ['error', 'success']
+    assert 'Error processing file' in results[0]['message']
+    assert app._process_pool.stats()['timeouts'] == 1
+    # The killed worker never got to remove its upload
+    assert not os.listdir(tmp_path)
+
+
+def test_workers_are_recycled_after_worker_max_files(tmp_path, pool, monkeypatch):
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'max_workers', 1)
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'worker_max_files', 2)
+
+    results = list(app.iter_saved_files(saved(tmp_path, 'ok', 'ok', 'ok', 'ok')))
+
+    pids = [r['pid'] for r in results]
+    assert pids[0] == pids[1] != pids[2] == pids[3]
+
+
+def test_a_crashed_worker_is_respawned(tmp_path, pool, monkeypatch):
+    monkeypatch.setitem(app.PROCESSING_CONFIG, 'max_workers', 1)
+
+    results = list(app.iter_saved_files(saved(tmp_path, 'ok', 'crash', 'ok')))
+
+    assert [r['status'] for r in results] == ['success', 'error', 'success']
+    assert results[0]['pid'] != results[2]['pid']
+    assert app._process_pool.stats()['crashes'] == 1
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from app import parse_well_markdown
+from bench_parser import legacy_parse_well_markdown
+from corpus import scorecard_markdown
+
+HEADER = "## Page 1\n\n022012345678 - Tower β One (WELL v2 pilot)\nDate: 07 Mar, 2024\n"
+
+# Text as the extraction engines leave it: OCR-split decimals, wrapped rows, odd statuses
+MESSY = [
+    "A01. 1 Air Quality 0. 5 Achieved\nW02.1 Water 1+1 Achieved 0. 5\n",
+    "N01.1 Fruits 2 Pending Documentation & On-Site\nN02.1 Labels 1 Pending Documentation & On Site\n",
+    "L01.1 Light No Achieved\nL02.1 Design 2 Not Attempted\nV01.1 Active 1 Not Applicable\n",
+    # Rows the strict scan can't read, left to the fallback pattern
+    "T01.1 Thermal\nPerformance 2 Achieved 1.5\nS01.1 Sound Mapping Withdrawn\nX01.1 Materials 1 pending\n",
+    "M01.1 Mind\t\tPromotion  1   Achieved\nC01.1 Community 1 Achieved 2 extra\nI01.1 Innovate 1+2 Achieved\n",
+    "A01.1 Air Quality 1 Achieved\nA01.1 Air Quality again 2 Achieved 1\n",
+]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_the_legacy_parser_on_synthetic_scorecards(seed):
+    rng = random.Random(seed)
+    text = "".join(scorecard_markdown(rng, index) for index in range(20))
+
+    assert parse_well_markdown(text) == legacy_parse_well_markdown(text)
+
+
+@pytest.mark.parametrize("body", MESSY)
+def test_matches_the_legacy_parser_on_messy_text(body):
+    text = HEADER + body
+
+    assert parse_well_markdown(text) == legacy_parse_well_markdown(text)
+
+
+def test_fields_and_scores():
+    parsed = parse_well_markdown(HEADER + MESSY[0] + MESSY[1] + MESSY[2])
+
+    assert parsed['project_id'] == '022012345678'
+    assert parsed['project_name'] == 'Tower One'
+    assert parsed['date_cert'] == '07/03/2024'
+    assert {p['code']: p['value'] for p in parsed['parts']} == {
+        'A01.1': 0.5, 'W02.1': 0.5, 'N01.1': 'Pending Documentation', 'N02.1': 'Pending Documentation',
+        'L01.1': 'p', 'V01.1': 'Not Applicable',
+    }
+
+
+def test_missing_header_fields():
+    parsed = parse_well_markdown("A01.1 Air Quality 1 Achieved\n")
+
+    assert (parsed['project_id'], parsed['project_name'], parsed['date_cert']) == \
+        ('Unknown', 'Unknown Project', 'Unknown')
+    assert parsed['parts'] == [{'code': 'A01.1', 'value': 1.0}]
@@ -0,0 +1,74 @@
+import gzip
+import json
+import zlib
+
+import app
+from corpus import write_corpus
+
+
+def test_json_responses_are_compressed(tmp_path, template, folders, upload, client):
+    pdfs = write_corpus(str(tmp_path), 3)
+    plain = upload(pdfs)
+
+    response = client.post('/upload', data={'files': [open(p, 'rb') for p in pdfs]},
+                           content_type='multipart/form-data', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    body = json.loads(gzip.decompress(response.get_data()))
+    assert [r['parsed'] for r in body['results']] == [r['parsed'] for r in plain.get_json()['results']]
+    assert 'Content-Encoding' not in plain.headers
+
+
+def test_small_and_error_responses_are_not_compressed(client):
+    assert 'Content-Encoding' not in client.get('/jobs/missing', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_stream_is_compressed_per_record(tmp_path, template, folders, client):
+    pdfs = write_corpus(str(tmp_path), 2)
+
+    response = client.post('/upload?mode=stream', data={'files': [open(p, 'rb') for p in pdfs]},
+                           content_type='multipart/form-data', headers={'Accept-Encoding': 'deflate'})
+
+    assert response.headers['Content-Encoding'] == 'deflate'
+    lines = zlib.decompress(response.get_data()).decode().splitlines()
+    assert [json.loads(line)['type'] for line in lines] == ['start', 'file', 'file', 'complete']
+
+
+def test_downloads_are_conditional(tmp_path, template, folders, upload, client):
+    excel_filename = upload(write_corpus(str(tmp_path), 1)).get_json()['excel_filename']
+    url = f'/download-excel?file={excel_filename}'
+
+    full = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert full.status_code == 200
+    assert full.headers['Accept-Ranges'] == 'bytes'
+    assert 'Content-Encoding' not in full.headers
+
+    assert client.get(url, headers={'If-None-Match': full.headers['ETag']}).status_code == 304
+
+    partial = client.get(url, headers={'Range': 'bytes=0-9'})
+    assert partial.status_code == 206
+    assert partial.get_data() == full.get_data()[:10]
+
+
+def test_lean_results_link_to_the_markdown(tmp_path, template, folders, upload, client):
+    pdfs = write_corpus(str(tmp_path), 2)
+    full = upload(pdfs).get_json()
+
+    lean = upload(pdfs, '/upload?view=lean').get_json()
+
+    assert lean['counts'] == {'total': 2, 'success': 2, 'error': 0}
+    for index, (result, reference) in enumerate(zip(lean['results'], full['results'])):
+        assert 'markdown' not in result and 'parsed' not in result
+        assert result['summary']['project_id'] == reference['parsed']['project_id']
+        assert result['summary']['parts'] == len(reference['parsed']['parts'])
+        assert result['markdown_url'] == f"/markdown/{lean['batch_id']}/{index}"
+        assert client.get(result['markdown_url']).get_data(as_text=True) == reference['markdown']
+    assert client.get(f"/markdown/{lean['batch_id']}/2").status_code == 404
+
+
+def test_markdown_stays_inside_the_artifact_store(tmp_path, folders, client):
+    (tmp_path / ('secret' + app.MARKDOWN_SUFFIX)).write_text(json.dumps('secret') + '\n')
+
+    for batch_id in ('..%2Fsecret', '..', '%2E%2E%2Fsecret', 'unknown'):
+        assert client.get(f'/markdown/{batch_id}/0').status_code == 404
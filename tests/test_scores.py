@@ -0,0 +1,150 @@
+import random
+
+import pytest
+
+import app
+from corpus import write_corpus
+from scores import BatchStatistics, ScoreMatrix
+
+TEXT_VALUES = ['p', 'Pending Documentation', 'Not Applicable', 'Achieved']
+
+
+def legacy_row_cells(parsed, schema):
+    """build_row_cells as it was before ScoreMatrix: a dict of running sums per project."""
+    cells = {}
+    for field_name, key in (("Project Name", "project_name"), ("Project ID", "project_id"),
+                            ("Date Certified", "date_cert")):
+        c = schema.field_col(field_name)
+        if c is not None and parsed.get(key) not in (None, ""):
+            cells[c] = (parsed[key], False, None)
+
+    subpoints = {k: 0.0 for k in app.CONCEPT_LETTER_TO_NAME}
+    for part in parsed.get("parts", []):
+        code, value = part.get("code", ""), part.get("value", "")
+        for c in schema.part_cols(code):
+            if isinstance(value, (int, float)):
+                cells[c] = (float(value), True, None)
+            elif value not in (None, ""):
+                cells[c] = (value, True, None)
+        if isinstance(value, (int, float)):
+            subpoints[code[0]] += float(value)
+
+    total_points = 0.0
+    for letter, sp in subpoints.items():
+        if schema.subpoint_cols[letter]:
+            cells[schema.subpoint_cols[letter]] = (round(sp, 3), True, None)
+        total_points += sp
+    if schema.field_col("Total Points"):
+        cells[schema.field_col("Total Points")] = (round(total_points, 3), True, None)
+    if total_points > 0:
+        for letter, sp in subpoints.items():
+            if schema.pct_cols[letter]:
+                cells[schema.pct_cols[letter]] = (sp / total_points, True, app.PERCENT_FORMAT)
+    return cells, subpoints, total_points
+
+
+def scorecards(schema, count, seed=7):
+    """Random scorecards with repeated codes, text and empty values, and codes outside the template."""
+    rng = random.Random(seed)
+    codes = sorted(schema.code_cols) + ['A99.1', 'I99.2']
+    cards = []
+    for n in range(count):
+        parts = []
+        for _ in range(rng.randint(0, 40)):
+            roll = rng.random()
+            value = (rng.choice([0, 1, 2, 0.5, 1.25, 3]) if roll < 0.6 else
+                     rng.choice(TEXT_VALUES) if roll < 0.9 else rng.choice([None, '']))
+            parts.append({'code': rng.choice(codes), 'value': value})
+        cards.append({'project_id': f'{n:012d}', 'project_name': f'Project {n}', 'date_cert': '', 'parts': parts})
+    return cards
+
+
+def typed(cells):
+    return {c: (type(value), value, centered, fmt) for c, (value, centered, fmt) in cells.items()}
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 60])
+def test_rows_match_the_dict_computation(template, chunk):
+    schema = app.load_template_schema()
+    cards = scorecards(schema, 60)
+
+    rows = []
+    for start in range(0, len(cards), chunk):
+        rows.extend(app.score_rows(cards[start:start + chunk], schema)[1])
+
+    assert [typed(row) for row in rows] == [typed(legacy_row_cells(card, schema)[0]) for card in cards]
+
+
+def test_totals_and_percentages_match_the_dict_computation(template):
+    schema = app.load_template_schema()
+    cards = scorecards(schema, 40, seed=11)
+
+    matrix = ScoreMatrix.from_parsed(cards, schema.vocabulary)
+
+    letters = list(app.CONCEPT_LETTER_TO_NAME)
+    for i, card in enumerate(cards):
+        _, subpoints, total = legacy_row_cells(card, schema)
+        assert matrix.total_points[i] == total
+        assert matrix.concept_points[i].tolist() == [subpoints[letter] for letter in letters]
+        if total > 0:
+            assert matrix.percentages()[i].tolist() == [subpoints[letter] / total for letter in letters]
+
+
+def test_batch_statistics_match_the_dict_computation(template):
+    schema = app.load_template_schema()
+    cards = scorecards(schema, 50, seed=3)
+    statistics = BatchStatistics(app.CONCEPT_LETTER_TO_NAME)
+
+    for start in range(0, len(cards), 16):
+        statistics.add(ScoreMatrix.from_parsed(cards[start:start + 16], schema.vocabulary))
+    summary = statistics.summary()
+
+    totals, concept_sums, values = [], {k: 0.0 for k in app.CONCEPT_LETTER_TO_NAME}, {}
+    for card in cards:
+        _, subpoints, total = legacy_row_cells(card, schema)
+        totals.append(total)
+        for letter, sp in subpoints.items():
+            concept_sums[letter] += sp
+        last = {}
+        for part in card['parts']:
+            if part['value'] not in (None, ''):
+                last[part['code']] = 'numeric' if isinstance(part['value'], (int, float)) else part['value']
+        for label in last.values():
+            values[label] = values.get(label, 0) + 1
+
+    assert summary['projects'] == len(cards)
+    assert summary['total_points'] == {'mean': round(sum(totals) / len(cards), 3),
+                                       'min': round(min(totals), 3), 'max': round(max(totals), 3)}
+    assert summary['concept_points_mean'] == {k: round(s / len(cards), 3) for k, s in concept_sums.items()}
+    assert summary['part_values'] == dict(sorted(values.items()))
+
+
+def test_scores_under_an_unknown_letter_are_left_out(template):
+    schema = app.load_template_schema()
+    card = {'parts': [{'code': 'A01.1', 'value': 2}, {'code': 'Z01.1', 'value': 5}]}
+
+    matrix, rows = app.score_rows([card], schema)
+
+    assert matrix.total_points.tolist() == [2.0]
+    assert rows[0][schema.field_col("Total Points")][0] == 2.0
+
+
+def test_empty_batches_have_no_statistics():
+    assert BatchStatistics('AB').summary() is None
+
+
+def test_upload_reports_batch_statistics(tmp_path, template, folders, upload):
+    response = upload(write_corpus(str(tmp_path), 3)).get_json()
+
+    totals, values = [], {}
+    for result in response['results']:
+        parts = result['parsed']['parts']
+        totals.append(sum(p['value'] for p in parts if isinstance(p['value'], float)))
+        for part in parts:
+            label = 'numeric' if isinstance(part['value'], float) else part['value']
+            values[label] = values.get(label, 0) + 1
+    statistics = response['statistics']
+    assert statistics['projects'] == 3
+    assert statistics['total_points'] == {'mean': round(sum(totals) / 3, 3),
+                                          'min': round(min(totals), 3), 'max': round(max(totals), 3)}
+    assert statistics['part_values'] == dict(sorted(values.items()))
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+
+import app
+from corpus import project_id, write_corpus
+from store import Query, ScorecardStore, StoreWriter, iso_date
+from test_excel_writers import cells
+
+
+def scorecard(project_id, date_cert='31/12/2024', name='Tower'):
+    return {'project_id': project_id, 'project_name': name, 'date_cert': date_cert,
+            'parts': [{'code': 'A01.1', 'value': 1}]}
+
+
+def test_iso_dates():
+    assert iso_date('31/12/2024') == '2024-12-31'
+    assert iso_date('Unknown') is None and iso_date(None) is None
+
+
+def test_scorecards_without_a_project_id_are_skipped(tmp_path):
+    store = ScorecardStore(str(tmp_path / 'scorecards.db'))
+
+    stored = store.put_many([(scorecard(None), 'a.pdf', 'a'), (scorecard(''), 'b.pdf', 'b'),
+                             (scorecard('123456789'), 'c.pdf', 'c')])
+
+    assert stored == 1
+    assert [p['project_id'] for p in store.projects(Query())] == ['123456789']
+
+
+def test_unknown_project_ids_are_skipped(tmp_path):
+    store = ScorecardStore(str(tmp_path / 'scorecards.db'))
+
+    # parse_well_markdown fills in 'Unknown' when it finds no ID; these must not overwrite each other
+    stored = store.put_many([(scorecard('Unknown'), 'a.pdf', 'a'),
+                             (scorecard(' Unknown ', name='Other'), 'b.pdf', 'b'),
+                             (scorecard(' 123456789 '), 'c.pdf', 'c')])
+
+    assert stored == 1
+    assert [p['project_id'] for p in store.projects(Query())] == ['123456789']
+
+
+def test_reupload_replaces_the_row(tmp_path):
+    store = ScorecardStore(str(tmp_path / 'scorecards.db'))
+    store.put_many([(scorecard('123456789', name='Old'), 'a.pdf', 'a')])
+    store.put_many([(scorecard('123456789', name='New'), 'b.pdf', 'b')])
+
+    assert [(p['project_name'], p['filename']) for p in store.projects(Query())] == [('New', 'b.pdf')]
+
+
+def test_query_by_date_ids_and_latest(tmp_path):
+    store = ScorecardStore(str(tmp_path / 'scorecards.db'))
+    store.put_many([
+        (scorecard('111111111', '01/01/2023'), None, None),
+        (scorecard('111111111', '01/06/2024'), None, None),
+        (scorecard('222222222', '15/03/2024'), None, None),
+    ])
+
+    assert store.count(Query(date_from='2024-01-01')) == 2
+    assert store.count(Query(date_to='2023-12-31')) == 1
+    assert store.count(Query(project_ids=['222222222'])) == 1
+    latest = [(p['project_id'], p['date_cert']) for p in store.iter_parsed(Query(latest=True), chunk_rows=1)]
+    assert latest == [('222222222', '15/03/2024'), ('111111111', '01/06/2024')]
+
+
+def test_writer_flushes_in_chunks(tmp_path):
+    store = ScorecardStore(str(tmp_path / 'scorecards.db'))
+    writer = StoreWriter(store, chunk_rows=2)
+    for i in range(5):
+        writer.add(scorecard(f'{i:09d}'), f'{i}.pdf')
+    assert writer.stored == 4
+    writer.flush()
+    assert writer.stored == 5 and store.count(Query()) == 5
+
+
+def test_writer_keeps_going_when_the_store_fails(tmp_path, monkeypatch):
+    store = ScorecardStore(str(tmp_path / 'scorecards.db'))
+
+    def locked(records):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(store, 'put_many', locked)
+    writer = StoreWriter(store, chunk_rows=1)
+
+    writer.add(scorecard('123456789'))
+
+    assert writer.error == 'database is locked' and writer.stored == 0
+
+
+def rows(path):
+    """A workbook's cells as sorted rows of (column, value, format, alignment)."""
+    by_row = {}
+    for (row, column), cell in cells(path)[1].items():
+        by_row.setdefault(row, []).append((column,) + cell)
+    return sorted(sorted(row) for row in by_row.values())
+
+
+def test_export_rebuilds_the_uploaded_workbook(tmp_path, template, folders, upload, client):
+    uploaded = upload(write_corpus(str(tmp_path), 3)).get_json()
+
+    response = client.get('/export')
+
+    assert response.status_code == 200
+    exported = response.get_json()
+    assert exported['projects'] == 3
+    # Same cells, though the store returns projects by certification date rather than upload order
+    assert rows(os.path.join(folders[1], exported['excel_filename'])) == \
+        rows(os.path.join(folders[1], uploaded['excel_filename']))
+
+
+def test_projects_and_export_filters(tmp_path, template, folders, upload, client):
+    upload(write_corpus(str(tmp_path), 3))
+
+    listed = client.get('/projects').get_json()
+    assert listed['count'] == 3
+    assert sorted(p['project_id'] for p in listed['projects']) == [project_id(i) for i in range(3)]
+    assert 'parts' not in listed['projects'][0]
+    assert client.post('/projects', json={'ids': [project_id(1)]}).get_json()['count'] == 1
+
+    exported = client.post('/export', json={'ids': [project_id(0)], 'concepts': ['A', 'light'],
+                                            'formats': ['jsonl']}).get_json()
+    assert exported['projects'] == 1 and set(exported['exports']) == {'jsonl'}
+
+    assert client.get('/export?from=31-12-2024').status_code == 400
+    assert client.get('/export?concepts=Z').status_code == 400
+    assert client.get('/export?formats=docx').status_code == 400
+    assert client.get('/export?ids=999999999').status_code == 404
+
+
+def test_concept_filter_keeps_only_those_parts(template):
+    parsed = {'project_id': '1', 'parts': [{'code': 'A01.1', 'value': 1.0}, {'code': 'L02.1', 'value': 2.0}]}
+
+    assert app.select_concepts(parsed, {'A'})['parts'] == [{'code': 'A01.1', 'value': 1.0}]
+    assert parsed['parts'][1] == {'code': 'L02.1', 'value': 2.0}
+
+
+def test_store_can_be_disabled(client, monkeypatch):
+    monkeypatch.setattr(app, 'scorecard_store', None)
+    assert client.get('/export').status_code == 404
+    assert client.get('/projects').status_code == 404
@@ -0,0 +1,47 @@
+import json
+import os
+
+import app
+from corpus import project_id, write_corpus
+
+
+def records(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_stream_records(tmp_path, template, folders, upload, monkeypatch):
+    monkeypatch.setattr(app, 'scorecard_cache', None)
+    pdfs = write_corpus(str(tmp_path), 3)
+    broken = tmp_path / 'broken.pdf'
+    broken.write_bytes(b'not a pdf')
+
+    response = upload(pdfs[:2] + [str(broken)] + pdfs[2:], '/upload?mode=stream')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = records(response)
+    assert lines[0] == {'type': 'start', 'total': 4}
+
+    files = lines[1:-1]
+    assert [r['type'] for r in files] == ['file'] * 4
+    # Completion order, each file exactly once, counting up
+    assert sorted(r['index'] for r in files) == [0, 1, 2, 3]
+    assert [r['completed'] for r in files] == [1, 2, 3, 4]
+    by_index = {r['index']: r['result'] for r in files}
+    assert by_index[2]['status'] == 'error' and by_index[2]['filename'] == 'broken.pdf'
+    assert by_index[2]['message']
+    assert [by_index[i]['parsed']['project_id'] for i in (0, 1, 3)] == [project_id(0), project_id(1), project_id(2)]
+
+    summary = lines[-1]
+    assert summary['type'] == 'complete'
+    assert 'results' not in summary
+    assert os.path.exists(os.path.join(folders[1], summary['excel_filename']))
+
+
+def test_batch_failure_ends_the_stream_with_an_error(tmp_path, template, folders, upload, monkeypatch):
+    monkeypatch.setattr(app, 'process_batch', lambda saved_files, **kwargs: (None, 'Template missing'))
+    pdfs = write_corpus(str(tmp_path), 1)
+
+    lines = records(upload(pdfs, '/upload?mode=stream'))
+
+    assert lines == [{'type': 'start', 'total': 1}, {'type': 'error', 'error': 'Template missing'}]
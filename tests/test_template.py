@@ -0,0 +1,67 @@
+import os
+
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+
+import app
+
+
+def scan(headers, predicate):
+    """The header scan TemplateSchema replaces: every matching column, in order."""
+    return [idx for idx, triple in enumerate(headers, start=1) if predicate(triple)]
+
+
+def test_lookups_match_a_header_scan(template):
+    schema = app.load_template()[1]
+    headers = schema.headers
+
+    for field in ["Project Name", "Project ID", "Date Certified", "Total Points"]:
+        assert schema.field_col(field) == scan(headers, lambda t: field in t)[0]
+    for code in ["A01.1", "W02.2", "I01.1"]:
+        assert schema.part_cols(code) == scan(headers, lambda t: str(t[2]).startswith(code))
+    assert schema.part_cols("Z09.9") == []
+    for letter, name in app.CONCEPT_LETTER_TO_NAME.items():
+        sub_points = scan(headers, lambda t: t[2] == "Sub-Points" and (t[0] == letter or t[1] == name))
+        pct = scan(headers, lambda t: t[2] == "%" and t[0] == letter)
+        assert schema.subpoint_cols[letter] == (sub_points[0] if sub_points else
+                                                column_index_from_string(app.FALLBACK_SP_COLS[letter]))
+        assert schema.pct_cols[letter] == (pct[0] if pct else None)
+
+
+def test_sub_points_found_by_concept_name(template):
+    wb = load_workbook(template)
+    ws = wb.active
+    schema = app.load_template()[1]
+    col = schema.part_cols("W02.2")[0] + 1
+    merged = next(r for r in ws.merged_cells.ranges if r.min_row == 2 and r.min_col <= col <= r.max_col)
+    ws.unmerge_cells(str(merged))
+    # Row 2 names the concept above its Sub-Points column
+    ws.cell(2, col, "Water")
+    wb.save(template)
+    os.utime(template, ns=(0, os.stat(template).st_mtime_ns + 10**9))
+
+    schema = app.load_template()[1]
+
+    assert schema.subpoint_cols["W"] == col
+    assert schema.subpoint_cols["A"] == column_index_from_string("AX")
+
+
+def test_each_call_gets_its_own_workbook(template):
+    first, schema = app.load_template()
+    first.active.cell(4, 1, "written")
+
+    second, cached_schema = app.load_template()
+
+    assert second.active.cell(4, 1).value is None
+    assert cached_schema is schema
+
+
+def test_template_changes_are_picked_up(template):
+    schema = app.load_template()[1]
+    wb = load_workbook(template)
+    wb.active.cell(1, 1, "Renamed")
+    wb.save(template)
+    os.utime(template, ns=(0, os.stat(template).st_mtime_ns + 10**9))
+
+    assert app.load_template()[1] is not schema
+    assert app.load_template()[1].field_col("Renamed") == 1
@@ -0,0 +1,158 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+import app
+from upload_sessions import UploadAborted, UploadError, UploadSessions
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    return UploadSessions(str(tmp_path), max_files=3, max_file_bytes=len(DATA), idle_timeout=60)
+
+
+@pytest.fixture
+def session(sessions):
+    return sessions.create([('a.pdf', len(DATA)), ('b.pdf', 4)])
+
+
+def test_chunks_complete_a_file(session):
+    assert session.write_chunk(0, 0, io.BytesIO(DATA[:4000]), 4000) == 4000
+    assert not session.complete(0)
+    assert session.write_chunk(0, 4000, io.BytesIO(DATA[4000:]), len(DATA) - 4000) == len(DATA)
+
+    assert session.complete(0)
+    assert session.sha256(0) == hashlib.sha256(DATA).hexdigest()
+    with open(session.path(0), 'rb') as f:
+        assert f.read() == DATA
+    status = session.status()
+    assert status['received_bytes'] == len(DATA) and not status['complete']
+
+
+def test_interrupted_chunk_resumes_from_what_arrived(session):
+    # The client promised the whole file but the connection dropped after 3000 bytes
+    assert session.write_chunk(0, 0, io.BytesIO(DATA[:3000]), len(DATA)) == 3000
+    assert session.status()['files'][0]['received'] == 3000
+
+    assert session.write_chunk(0, 3000, io.BytesIO(DATA[3000:]), len(DATA) - 3000) == len(DATA)
+    assert session.sha256(0) == hashlib.sha256(DATA).hexdigest()
+
+
+def test_offset_mismatch_is_409_with_received(session):
+    session.write_chunk(0, 0, io.BytesIO(DATA[:1000]), 1000)
+
+    with pytest.raises(UploadError) as error:
+        session.write_chunk(0, 500, io.BytesIO(DATA[500:1500]), 1000)
+    assert (error.value.status, error.value.received) == (409, 1000)
+    assert session.received(0) == 1000
+
+
+def test_complete_file_is_409(session):
+    session.write_chunk(1, 0, io.BytesIO(b'%PDF'), 4)
+
+    with pytest.raises(UploadError) as error:
+        session.write_chunk(1, 0, io.BytesIO(b'%PDF'), 4)
+    assert (error.value.status, error.value.received) == (409, 4)
+
+
+def test_chunk_past_the_declared_size_is_400(session):
+    with pytest.raises(UploadError) as error:
+        session.write_chunk(1, 0, io.BytesIO(b'%PDF-1.4'), 8)
+    assert error.value.status == 400
+
+    # Without a length, the overrun is found while copying and nothing is kept
+    with pytest.raises(UploadError) as error:
+        session.write_chunk(1, 0, io.BytesIO(b'%PDF-1.4'))
+    assert error.value.status == 400
+    assert session.received(1) == 0
+
+
+def test_unknown_file_is_404(session):
+    with pytest.raises(UploadError) as error:
+        session.write_chunk(5, 0, io.BytesIO(b''), 0)
+    assert error.value.status == 404
+
+
+def test_closed_session_is_410_and_drops_partial_files(session):
+    session.write_chunk(0, 0, io.BytesIO(DATA[:1000]), 1000)
+    session.close('cancelled')
+    session.close('finished')
+
+    assert session.closed == 'cancelled'
+    assert session.received(0) == 0
+    with pytest.raises(UploadError) as error:
+        session.write_chunk(0, 0, io.BytesIO(DATA[:1000]), 1000)
+    assert error.value.status == 410
+
+
+def test_wait_for_raises_when_closed_or_idle(session):
+    session.write_chunk(1, 0, io.BytesIO(b'%PDF'), 4)
+    assert session.wait_for(1)
+
+    os.utime(session.folder, (0, 0))
+    with pytest.raises(UploadAborted):
+        session.wait_for(0, idle_timeout=1)
+    assert session.closed == 'expired'
+
+
+def test_sessions_are_shared_through_the_folder(sessions, session, tmp_path):
+    other = UploadSessions(str(tmp_path))
+    found = other.get(session.id)
+    found.write_chunk(1, 0, io.BytesIO(b'%PDF'), 4)
+
+    assert session.complete(1)
+    assert other.get('not-a-session-id') is None
+
+
+def test_declared_batches_are_checked(sessions):
+    with pytest.raises(UploadError):
+        sessions.create([])
+    with pytest.raises(UploadError):
+        sessions.create([('a.pdf', 1)] * 4)
+    with pytest.raises(UploadError):
+        sessions.create([('a.pdf', -1)])
+    with pytest.raises(UploadError) as error:
+        sessions.create([('a.pdf', len(DATA) + 1)])
+    assert error.value.status == 413
+
+
+@pytest.fixture
+def routed(sessions, session, monkeypatch):
+    monkeypatch.setattr(app, 'upload_sessions', sessions)
+    return session
+
+
+def test_chunk_route_reports_where_to_resume(client, routed):
+    url = f'/uploads/{routed.id}/files/0'
+    response = client.put(f'{url}?offset=0', data=DATA[:2000])
+    assert response.status_code == 200
+    assert response.get_json() == {'index': 0, 'received': 2000, 'size': len(DATA), 'complete': False}
+
+    response = client.put(f'{url}?offset=0', data=DATA[:2000])
+    assert response.status_code == 409
+    assert response.get_json()['received'] == 2000
+
+    assert client.get(f'/uploads/{routed.id}').get_json()['files'][0]['received'] == 2000
+    response = client.put(f'{url}?offset=2000', data=DATA[2000:])
+    assert response.get_json()['complete'] is True
+
+
+def test_chunk_route_after_close_is_410(client, routed):
+    routed.close('cancelled')
+
+    response = client.put(f'/uploads/{routed.id}/files/1?offset=0', data=b'%PDF')
+
+    assert response.status_code == 410
+
+
+def test_finalize_lists_incomplete_files(client, routed):
+    client.put(f'/uploads/{routed.id}/files/1?offset=0', data=b'%PDF')
+
+    response = client.post(f'/uploads/{routed.id}/finalize')
+
+    assert response.status_code == 409
+    assert response.get_json()['incomplete'] == [0]
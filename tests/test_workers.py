@@ -0,0 +1,101 @@
+import os
+import time
+
+import pytest
+
+from workers import TaskTimeout, WorkerCrashed, WorkerPool, resource
+
+
+def square(x):
+    return x * x
+
+
+def pid():
+    return os.getpid()
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def crash():
+    os._exit(3)
+
+
+def allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+def fail():
+    raise ValueError("bad scorecard")
+
+
+def wait_for_count(pool, name, value, timeout=5):
+    deadline = time.monotonic() + timeout
+    while pool.stats()[name] < value and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return pool.stats()[name]
+
+
+def test_results_and_exceptions():
+    with WorkerPool(2) as pool:
+        futures = [pool.submit(square, i) for i in range(6)]
+        failed = pool.submit(fail)
+
+        assert [f.result(timeout=10) for f in futures] == [0, 1, 4, 9, 16, 25]
+        with pytest.raises(ValueError, match="bad scorecard"):
+            failed.result(timeout=10)
+
+
+def test_timeout_stops_the_worker_and_the_pool_carries_on():
+    with WorkerPool(1, timeout=0.5) as pool:
+        hung = pool.submit(sleep, 30)
+        after = pool.submit(square, 3)
+
+        with pytest.raises(TaskTimeout):
+            hung.result(timeout=10)
+        assert after.result(timeout=10) == 9
+        assert pool.stats()['timeouts'] == 1
+        assert pool.stats()['started'] == 2
+
+
+def test_crash_fails_only_that_task():
+    with WorkerPool(1) as pool:
+        crashed = pool.submit(crash)
+        after = pool.submit(square, 4)
+
+        with pytest.raises(WorkerCrashed, match="exit code 3"):
+            crashed.result(timeout=10)
+        assert after.result(timeout=10) == 16
+        assert pool.stats()['crashes'] == 1
+
+
+@pytest.mark.skipif(resource is None, reason="memory limits need the resource module")
+def test_memory_limit_raises_memory_error_and_replaces_the_worker():
+    with WorkerPool(1, memory_mb=1024) as pool:
+        first = pool.submit(pid).result(timeout=10)
+        too_big = pool.submit(allocate, 4096)
+
+        with pytest.raises(MemoryError, match="1024MB worker memory limit"):
+            too_big.result(timeout=30)
+        assert pool.submit(allocate, 16).result(timeout=10) == 16 * 1024 * 1024
+        assert pool.submit(pid).result(timeout=10) != first
+        assert pool.stats()['crashes'] == 0
+
+
+def test_workers_are_recycled_after_max_tasks():
+    with WorkerPool(1, max_tasks=2) as pool:
+        pids = [pool.submit(pid).result(timeout=10) for _ in range(4)]
+
+        assert pids[0] == pids[1] != pids[2] == pids[3]
+        assert wait_for_count(pool, 'recycled', 2) == 2
+        assert pool.stats()['started'] >= 2
+        assert pool.stats()['crashes'] == 0
+
+
+def test_submit_after_shutdown_is_refused():
+    pool = WorkerPool(1)
+    pool.shutdown()
+    with pytest.raises(RuntimeError):
+        pool.submit(square, 2)
@@ -0,0 +1,360 @@
+"""
+Resumable chunked upload sessions.
+
+A client declares a batch up front (file names and sizes), then sends each
+file in chunks, PUT at the byte offset the server has received so far. A chunk
+cut off by a dropped connection keeps the bytes that arrived; the client asks
+for the session's status and carries on from there. When a file's last chunk
+lands it is complete (renamed to <index>.pdf, its SHA-256 recorded), and the
+batch processing the session can take it while later files are still in
+transit.
+
+Sessions live on disk, one folder each:
+
+- session.json:     the declared files and batch options (written once)
+- <index>.part:     a file being received
+- <index>.pdf:      a complete file, until the batch has processed it
+- <index>.sha256:   written when the file completes; marks it complete
+- <index>.lock:     serialises writers of one file across server processes
+- closed:           why the session stopped taking chunks (cancelled, finished, ...)
+
+so any server process can take any chunk, whichever one runs the batch.
+Folders without activity for twice the idle timeout are removed (a day for
+fully received sessions that are still open, whose batch may be queued).
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl  # cross-process lock per file (not on Windows)
+except ImportError:
+    fcntl = None
+
+MANIFEST = 'session.json'
+CLOSED = 'closed'
+
+# Seconds between checks for chunks written by other server processes
+POLL_INTERVAL = 0.05
+
+COPY_BUFFER = 1024 * 1024
+
+# Seconds a fully received session that is still open is kept without activity
+COMPLETE_SESSION_MAX_IDLE = 86400
+
+_SESSION_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# Writers of any session file, where there is no fcntl (single-process servers)
+_write_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """A request the session can't take; status is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, received=None):
+        super().__init__(message)
+        self.status = status
+        self.received = received  # bytes of the file the server has (offset mismatches)
+
+
+class UploadAborted(Exception):
+    """The session was closed before a file the batch is waiting for arrived."""
+
+
+class UploadSession:
+    """One declared batch being received. files: [{'filename': ..., 'size': ...}, ...] in upload order."""
+
+    def __init__(self, folder, session_id, files, options=None, job_id=None, created_at=None):
+        self.id = session_id
+        self.folder = folder
+        self.files = files
+        self.options = options or {}
+        self.job_id = job_id
+        self.created_at = created_at or time.time()
+
+    def path(self, index):
+        """Where file `index` is once complete."""
+        return os.path.join(self.folder, f'{index}.pdf')
+
+    def _file(self, index, suffix):
+        return os.path.join(self.folder, f'{index}{suffix}')
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, MANIFEST)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'id': self.id, 'files': self.files, 'options': self.options, 'job_id': self.job_id,
+                       'created_at': self.created_at}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, folder):
+        try:
+            with open(os.path.join(folder, MANIFEST), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(folder, data['id'], data['files'], data.get('options'), data.get('job_id'), data.get('created_at'))
+
+    def sha256(self, index):
+        """SHA-256 of a complete file, or None while it is still arriving."""
+        try:
+            with open(self._file(index, '.sha256'), 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def complete(self, index):
+        return os.path.exists(self._file(index, '.sha256'))
+
+    def received(self, index):
+        """Bytes of file `index` the server has."""
+        if self.complete(index):
+            return self.files[index]['size']
+        try:
+            return os.path.getsize(self._file(index, '.part'))
+        except OSError:
+            return 0
+
+    @property
+    def closed(self):
+        """Why the session stopped taking chunks, or None while it is open."""
+        try:
+            with open(os.path.join(self.folder, CLOSED), 'r', encoding='utf-8') as f:
+                return f.read().strip() or 'closed'
+        except FileNotFoundError:
+            return None if os.path.isdir(self.folder) else 'expired'
+        except OSError:
+            return 'closed'
+
+    def last_activity(self):
+        try:
+            return os.path.getmtime(self.folder)
+        except OSError:
+            return 0.0
+
+    def status(self):
+        """Per-file received bytes, for clients resuming an interrupted upload."""
+        files = []
+        for index, entry in enumerate(self.files):
+            received = self.received(index)
+            files.append({'index': index, 'filename': entry['filename'], 'size': entry['size'],
+                          'received': received, 'complete': self.complete(index)})
+        return {
+            'session_id': self.id,
+            'job_id': self.job_id,
+            'files': files,
+            'received_bytes': sum(f['received'] for f in files),
+            'total_bytes': sum(f['size'] for f in files),
+            'complete': all(f['complete'] for f in files),
+            'closed': self.closed,
+        }
+
+    @contextmanager
+    def _locked(self, index):
+        if fcntl is None:
+            with _write_lock:
+                yield
+            return
+        # flock also excludes other threads of this process (each open() is its own lock holder)
+        with open(self._file(index, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write_chunk(self, index, offset, stream, length=None):
+        """Write a chunk read from `stream` at `offset`, which must be the bytes received so far.
+
+        Returns the file's received bytes afterwards. A chunk cut short keeps what arrived.
+        Raises UploadError: 404 unknown file, 409 offset mismatch or file already complete
+        (with .received), 410 session closed, 400 chunk past the declared size.
+        """
+        if not 0 <= index < len(self.files):
+            raise UploadError(f"No file {index} in upload session {self.id}", 404)
+        size = self.files[index]['size']
+        if length is not None and offset + length > size:
+            raise UploadError(f"Chunk runs past the end of the file ({offset} + {length} > {size} bytes)")
+
+        with self._locked(index):
+            # A retried last chunk (its response was lost) still learns the file is complete
+            if self.complete(index):
+                raise UploadError(f"File {index} is already complete", 409, size)
+            closed = self.closed
+            if closed:
+                raise UploadError(f"Upload session is closed ({closed})", 410)
+            part_path = self._file(index, '.part')
+            with open(part_path, 'ab') as part:
+                received = part.tell()
+                if offset != received:
+                    raise UploadError(f"Expected offset {received}, got {offset}", 409, received)
+                remaining = size - received
+                try:
+                    while remaining:
+                        chunk = stream.read(min(COPY_BUFFER, remaining))
+                        if not chunk:
+                            break
+                        part.write(chunk)
+                        remaining -= len(chunk)
+                    if not remaining and stream.read(1):
+                        part.truncate(received)
+                        raise UploadError(f"Chunk runs past the end of the file ({size} bytes)", 400, received)
+                finally:
+                    # Also when the client dropped mid-chunk: what arrived counts, and the session is alive
+                    part.flush()
+                    os.utime(self.folder)
+                received = size - remaining
+
+            if received == size:
+                self._finish(index, part_path)
+        return received
+
+    def _finish(self, index, part_path):
+        path = self.path(index)
+        os.replace(part_path, path)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(COPY_BUFFER), b''):
+                digest.update(chunk)
+        # The .sha256 file marks the file complete, so it is written last (and atomically)
+        digest_path = self._file(index, '.sha256')
+        tmp_path = f"{digest_path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(digest.hexdigest())
+        os.replace(tmp_path, digest_path)
+
+    def wait_for(self, index, idle_timeout=None):
+        """Block until file `index` is complete.
+
+        Raises UploadAborted if the session is closed first, or receives no data for
+        idle_timeout seconds (the session is then closed as 'expired').
+        """
+        while not self.complete(index):
+            closed = self.closed
+            if closed:
+                raise UploadAborted(f"Upload session {self.id} closed ({closed}) before "
+                                    f"{self.files[index]['filename']} arrived")
+            if idle_timeout and time.time() - self.last_activity() > idle_timeout:
+                self.close('expired')
+                raise UploadAborted(f"No data received for upload session {self.id} in {idle_timeout}s")
+            time.sleep(POLL_INTERVAL)
+        return True
+
+    def close(self, reason):
+        """Stop taking chunks and drop partial files. The first reason given sticks."""
+        if self.closed:
+            return
+        try:
+            with open(os.path.join(self.folder, CLOSED), 'x', encoding='utf-8') as f:
+                f.write(reason)
+        except FileExistsError:
+            pass
+        except OSError:
+            return
+        for index in range(len(self.files)):
+            with self._locked(index):
+                try:
+                    os.remove(self._file(index, '.part'))
+                except OSError:
+                    pass
+
+
+class UploadSessions:
+    """Creates and finds upload sessions under one folder shared by all server processes."""
+
+    def __init__(self, folder, max_files=5000, max_file_bytes=None, max_session_bytes=None, idle_timeout=600):
+        self.folder = folder
+        self.max_files = max_files
+        self.max_file_bytes = max_file_bytes
+        self.max_session_bytes = max_session_bytes
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._swept_at = 0.0
+
+    def create(self, files, options=None):
+        """Declare a session for (filename, size) pairs. Raises UploadError for a batch it won't take."""
+        if not files:
+            raise UploadError("No files declared")
+        if self.max_files and len(files) > self.max_files:
+            raise UploadError(f"At most {self.max_files} files per upload session")
+        for filename, size in files:
+            if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+                raise UploadError(f"Invalid size for {filename}: {size!r}")
+            if self.max_file_bytes and size > self.max_file_bytes:
+                raise UploadError(f"{filename} is larger than {self.max_file_bytes} bytes", 413)
+        total = sum(size for _, size in files)
+        if self.max_session_bytes and total > self.max_session_bytes:
+            raise UploadError(f"Upload session is larger than {self.max_session_bytes} bytes", 413)
+
+        self._sweep()
+        session_id = uuid.uuid4().hex
+        session = UploadSession(os.path.join(self.folder, session_id), session_id,
+                                [{'filename': filename, 'size': size} for filename, size in files], options)
+        session.save()
+        with self._lock:
+            self._sessions[session_id] = session
+        return session
+
+    def get(self, session_id):
+        """The session with this ID (created by any server process), or None."""
+        if not _SESSION_ID_RE.match(session_id or ''):
+            return None
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            session = UploadSession.load(os.path.join(self.folder, session_id))
+            if session is not None:
+                with self._lock:
+                    self._sessions[session_id] = session
+        elif not os.path.isdir(session.folder):
+            with self._lock:
+                self._sessions.pop(session_id, None)
+            session = None
+        self._sweep()
+        return session
+
+    def remove(self, session):
+        """Delete a session and everything received for it."""
+        with self._lock:
+            self._sessions.pop(session.id, None)
+        shutil.rmtree(session.folder, ignore_errors=True)
+
+    def _sweep(self):
+        # Sessions idle for twice the timeout, whichever process created them; at most once a minute.
+        # A fully received session that is still open may be a batch waiting in the admission queue,
+        # so it is given a day.
+        now = time.time()
+        with self._lock:
+            if now - self._swept_at < 60:
+                return
+            self._swept_at = now
+        try:
+            entries = list(os.scandir(self.folder))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if not entry.is_dir() or not _SESSION_ID_RE.match(entry.name):
+                    continue
+                idle = now - entry.stat().st_mtime
+                if idle < 2 * self.idle_timeout:
+                    continue
+                session = UploadSession.load(entry.path)
+                if (idle < COMPLETE_SESSION_MAX_IDLE and session is not None and not session.closed
+                        and all(session.complete(i) for i in range(len(session.files)))):
+                    continue
+                shutil.rmtree(entry.path, ignore_errors=True)
+                with self._lock:
+                    self._sessions.pop(entry.name, None)
+            except OSError:
+                continue
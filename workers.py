@@ -0,0 +1,247 @@
+"""
+Supervised worker processes for per-file work with time and memory budgets.
+
+WorkerPool is a small stand-in for ProcessPoolExecutor (submit() returns a
+concurrent.futures.Future) built for untrusted input, where one file must not
+be able to stall or take down the batch:
+
+- timeout:    wall-clock seconds a task may run; the worker running it is
+              killed and the task fails with TaskTimeout
+- memory_mb:  address-space ceiling (RLIMIT_AS) of each worker, so a runaway
+              allocation raises MemoryError in the worker instead of swapping
+              the machine (POSIX only)
+- max_tasks:  a worker is replaced after this many tasks, which bounds slow
+              leaks in the PDF libraries
+
+A worker that dies mid-task (killed by the OS, segfault, ...) only fails that
+task with WorkerCrashed; replacements are started on demand. One supervisor
+thread per pool hands tasks to idle workers and watches the deadlines.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait as wait_ready
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class TaskTimeout(Exception):
+    """A task ran past the pool's timeout and its worker was stopped."""
+
+
+class WorkerCrashed(Exception):
+    """The worker process died while running a task."""
+
+
+def _worker_main(conn, memory_mb, max_tasks):
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            logger.warning("Could not set worker memory limit: %s", e)
+
+    done = 0
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        task_id, fn, args, kwargs = task
+        try:
+            reply = (task_id, True, fn(*args, **kwargs))
+        except MemoryError:
+            reply = (task_id, False, MemoryError(f"Exceeded the {memory_mb}MB worker memory limit"
+                                                 if memory_mb else "Out of memory"))
+        except BaseException as e:  # noqa: B036 - every failure goes back to the caller
+            reply = (task_id, False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # Unpicklable result or exception
+            conn.send((task_id, False, RuntimeError(f"{type(e).__name__}: {e}")))
+        done += 1
+        if (max_tasks and done >= max_tasks) or (not reply[1] and isinstance(reply[2], MemoryError)):
+            # Recycle: the supervisor starts a fresh worker when it sees this one exit
+            return
+
+
+class _Worker:
+    def __init__(self, context, memory_mb, max_tasks):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb, max_tasks),
+                                       name='pdf-worker', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None      # (task_id, future) being run
+        self.deadline = None
+        self.done = 0
+        self.retiring = False  # exits after its current task; gets no new ones
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """Process pool with per-task timeouts, per-worker memory ceilings and worker recycling."""
+
+    def __init__(self, max_workers, timeout=None, memory_mb=None, max_tasks=None, mp_context=None):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.max_tasks = max_tasks
+        self._context = mp_context or multiprocessing.get_context()
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._workers = []
+        self._ids = itertools.count()
+        self._wake_reader, self._wake_writer = self._context.Pipe(duplex=False)
+        self._shutdown = False
+        self.counts = {'started': 0, 'recycled': 0, 'timeouts': 0, 'crashes': 0}
+        self._supervisor = threading.Thread(target=self._supervise, name='worker-supervisor', daemon=True)
+        self._supervisor.start()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self._queue.append((next(self._ids), future, fn, args, kwargs))
+        self._wake()
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue:
+                    self._queue.popleft()[1].cancel()
+        self._wake()
+        if wait:
+            self._supervisor.join()
+
+    def stats(self):
+        with self._lock:
+            busy = sum(1 for worker in self._workers if worker.task is not None)
+            return dict(self.counts, workers=len(self._workers), busy=busy, queued=len(self._queue))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def _wake(self):
+        try:
+            self._wake_writer.send(None)
+        except OSError:
+            pass
+
+    def _supervise(self):
+        while True:
+            with self._lock:
+                self._dispatch()
+                busy = [worker for worker in self._workers if worker.task is not None]
+                if self._shutdown and not self._queue and not busy:
+                    break
+                watched = [self._wake_reader]
+                for worker in self._workers:
+                    watched.append(worker.process.sentinel)
+                    if worker.task is not None:
+                        watched.append(worker.conn)
+                deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+
+            timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait_ready(watched, timeout)
+
+            with self._lock:
+                if self._wake_reader in ready:
+                    while self._wake_reader.poll():
+                        self._wake_reader.recv()
+                for worker in list(self._workers):
+                    self._check(worker, ready)
+
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.process.join(5)
+            if worker.process.is_alive():
+                worker.kill()
+
+    def _dispatch(self):
+        """Hand queued tasks to idle workers, starting workers up to max_workers."""
+        while self._queue:
+            worker = next((w for w in self._workers if w.task is None and not w.retiring), None)
+            if worker is None:
+                if len(self._workers) >= self.max_workers:
+                    return
+                worker = _Worker(self._context, self.memory_mb, self.max_tasks)
+                self._workers.append(worker)
+                self.counts['started'] += 1
+
+            task_id, future, fn, args, kwargs = self._queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                worker.conn.send((task_id, fn, args, kwargs))
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            worker.task = (task_id, future)
+            worker.deadline = time.monotonic() + self.timeout if self.timeout else None
+
+    def _check(self, worker, ready):
+        """Collect a finished task, or fail it if its worker died or ran out of time."""
+        if worker.task is not None and (worker.conn in ready or worker.process.sentinel in ready):
+            try:
+                if worker.conn.poll():
+                    task_id, ok, value = worker.conn.recv()
+                    future = worker.task[1]
+                    worker.task = worker.deadline = None
+                    worker.done += 1
+                    # Mirrors the exit conditions in _worker_main
+                    if (self.max_tasks and worker.done >= self.max_tasks) or isinstance(value, MemoryError):
+                        worker.retiring = True
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+            except (EOFError, OSError):
+                pass
+
+        if worker.process.sentinel in ready or not worker.process.is_alive():
+            if worker.task is not None:
+                self.counts['crashes'] += 1
+                worker.process.join(1)
+                code = worker.process.exitcode
+                worker.task[1].set_exception(WorkerCrashed(f"Worker process exited unexpectedly (exit code {code})"))
+            else:
+                self.counts['recycled'] += 1
+            worker.kill()
+            self._workers.remove(worker)
+            return
+
+        if worker.deadline is not None and time.monotonic() >= worker.deadline:
+            self.counts['timeouts'] += 1
+            future = worker.task[1]
+            worker.kill()
+            self._workers.remove(worker)
+            logger.warning("Stopped worker %s after %ss on one task", worker.process.pid, self.timeout)
+            future.set_exception(TaskTimeout(f"Timed out after {self.timeout}s"))
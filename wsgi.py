@@ -0,0 +1,16 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app        (Linux/macOS)
+    waitress-serve --port=5000 wsgi:app          (Windows)
+
+Settings come from the PDFCONVERT_* environment variables (or a .env file), see config.py.
+"""
+
+import time
+
+started = time.perf_counter()
+
+from app import create_app  # noqa: E402
+
+app = create_app(started=started)